@@ -1,15 +1,51 @@
-from langchain_core.tools import tool
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import AIMessage, ToolMessage
-from typing import Any, Dict, AsyncIterable, Literal, List, Optional, Union
-from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
+import json
+import logging
+import textwrap
+import threading
+import time
+from typing import Any, Dict, AsyncIterable, List, Literal, Optional
 from a2a_service.types import ResponseFormat
-from a2a_service.tools import search_web
 
-# Memory saver for maintaining conversation state
-memory = MemorySaver()
+# LangChain, LangGraph and the model clients are imported lazily when the graph is
+# first built, so importing this module (and main.py) stays cheap.
+
+logger = logging.getLogger(__name__)
+
+# Memory saver for maintaining conversation state, created on first use
+_memory = None
+_memory_lock = threading.Lock()
+# Persistent checkpoint store, if configured; runs interrupted by a crash resume from it
+_checkpoint_url: Optional[str] = None
+
+
+def configure_checkpointer(url: Optional[str]):
+    """Keep agent checkpoints in a database rather than in memory. Call before any graph is built.
+
+    Args:
+        url: A sqlite:/// or postgresql:// URL, see checkpoints.open_checkpointer; None keeps them in memory.
+    """
+    global _checkpoint_url
+    _checkpoint_url = url
+
+
+def get_checkpointer():
+    """Return the shared checkpointer, creating it on first use."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                if _checkpoint_url:
+                    from a2a_service.checkpoints import open_checkpointer
+                    _memory = open_checkpointer(_checkpoint_url)
+                else:
+                    from langgraph.checkpoint.memory import MemorySaver
+                    _memory = MemorySaver()
+    return _memory
+
+
+# Chat models shared by all agents with the same model settings
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
 
 
 class Agent:
@@ -28,45 +64,285 @@ class Agent:
     - Set response status to error if there is an error while processing the request
     - Set response status to completed if the request is complete
     """
+
+    # Name of the tool the model calls to deliver its final answer in "tool" response mode
+    RESPONSE_TOOL_NAME = "respond"
+
+    RESPONSE_TOOL_INSTRUCTION = """
+    When you have your final answer, call the respond tool with the response status and message.
+    Do not answer in plain text.
+    """
      
-    def __init__(self, model_name: str = "gpt-4.1", tools: Optional[List[Any]] = None):
+    def __init__(
+        self,
+        model_name: str = "gpt-4.1",
+        tools: Optional[List[Any]] = None,
+        context_max_tokens: Optional[int] = None,
+        cache_prompt_prefix: bool = False,
+        response_mode: Literal["structured", "tool"] = "structured",
+        model_routes: Optional[List[Dict[str, Any]]] = None,
+        model_timeout: Optional[float] = None,
+        hedge_delay: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+        max_retries: int = 2,
+        max_connections: int = 100,
+        task_timeout: Optional[float] = None,
+        system_instruction: Optional[str] = None,
+        model: Optional[Any] = None,
+        callbacks: Optional[List[Any]] = None,
+    ):
         """Initialize the agent with a model and tools.
         
         Args:
             model_name: The name of the LLM model to use.
             tools: Optional list of tools. If None, default tools will be used.
+            context_max_tokens: Token budget for the conversation sent to the model each turn.
+                Older turns beyond it are summarized. If None, the full history is sent.
+                Requires the "tool" response mode, as the structured-output call of the
+                "structured" mode is always sent the full history.
+            cache_prompt_prefix: Render the system prompt once per agent and mark it for provider
+                prompt caching, instead of rebuilding it from the instruction string every turn.
+            response_mode: How the final status and message are produced. "structured" makes a
+                separate structured-output LLM call after the ReAct loop; "tool" has the model
+                return them in its last turn by calling a return-direct respond tool.
+            model_routes: Model backends to route between, in order of preference. Each entry
+                is a dict with a "model" spec ("provider:model") and optional "skills",
+                "max_input_chars", "timeout", "rpm" and "tpm" keys. If None, only model_name is used.
+            model_timeout: Seconds to wait for a backend before falling back to the next one.
+            hedge_delay: Seconds after which a second backend is queried in parallel.
+            request_timeout: HTTP timeout in seconds for a single model request.
+            max_retries: Retries made by the model client on connection errors, 429s and 5xxs.
+            max_connections: Size of the HTTP connection pool shared by the model clients.
+            task_timeout: Time budget in seconds for a whole task. Model calls are given
+                whatever remains of it as their deadline.
+            system_instruction: System prompt to use instead of SYSTEM_INSTRUCTION.
+            model: Chat model to use instead of one built from the model settings, e.g.
+                a TrafficReplay model.
+            callbacks: Callback handlers attached to every run, e.g. a TrafficRecorder.
         """
+        self.model_name = model_name
+        self.model = model
+        self.callbacks = callbacks
+        self.tools = tools
+        self.context_max_tokens = context_max_tokens
+        self.cache_prompt_prefix = cache_prompt_prefix
+        self._prompt_prefix = None
+        if response_mode not in ("structured", "tool"):
+            raise ValueError(f"Unsupported response mode: {response_mode}")
+        if context_max_tokens and response_mode != "tool":
+            raise ValueError("context_max_tokens requires the 'tool' response mode")
+        self.response_mode = response_mode
+        self.model_routes = model_routes or [{"model": model_name}]
+        self.model_timeout = model_timeout
+        self.hedge_delay = hedge_delay
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.task_timeout = task_timeout
+        self.system_instruction = system_instruction or self.SYSTEM_INSTRUCTION
+        
+        # The graph is compiled on first use or by warm_up()
+        self._graph = None
+        self._graph_lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the agent graph has been compiled."""
+        return self._graph is not None
+
+    @property
+    def graph(self):
+        """The compiled agent graph, built on first access."""
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = self._build_graph()
+        return self._graph
+
+    def warm_up(self) -> None:
+        """Import dependencies and compile the agent graph ahead of the first request."""
+        self.graph
+
+    def _build_graph(self):
+        """Create the LLM model and compile the agent graph using LangGraph."""
+        from langgraph.prebuilt import create_react_agent
+
         # Initialize the LLM model
-        self.model = ChatOpenAI(
-            model=model_name,
-            streaming=True
-        )
+        if self.model is None:
+            self.model = self._shared_model()
         
         # Use provided tools or default to the included tools
-        self.tools = tools or [search_web]
-
-        # Create the agent graph using LangGraph
-        self.graph = create_react_agent(
-            self.model, 
-            tools=self.tools, 
-            checkpointer=memory, 
-            prompt=self.SYSTEM_INSTRUCTION, 
-            response_format=ResponseFormat
+        if not self.tools:
+            from a2a_service.tools import search_web
+            self.tools = [search_web]
+
+        # Tool schemas are part of the cached prompt prefix, so keep their order stable
+        self.tools = sorted(self.tools, key=lambda t: getattr(t, "name", getattr(t, "__name__", "")))
+
+        # Keep the prompt within a token budget for long-lived sessions
+        compaction = {}
+        if self.context_max_tokens:
+            from a2a_service.context import CompactedAgentState, ContextCompactor
+            compaction = {
+                "state_schema": CompactedAgentState,
+                "pre_model_hook": ContextCompactor(self.model, max_tokens=self.context_max_tokens),
+            }
+
+        if self.response_mode == "tool":
+            # The final answer arrives as a tool call in the last ReAct turn, so no extra
+            # structured-output call is needed. tool_choice="any" makes the model always
+            # end with a tool call rather than plain text.
+            tools = [*self.tools, self._build_response_tool()]
+            model = self.model.bind_tools(tools, tool_choice="any")
+            response_kwargs = {}
+        else:
+            tools = self.tools
+            model = self.model
+            response_kwargs = {"response_format": ResponseFormat}
+
+        graph = create_react_agent(
+            model, 
+            tools=tools, 
+            checkpointer=get_checkpointer(), 
+            prompt=self._get_prompt(), 
+            **response_kwargs,
+            **compaction
         )
+        logger.info(f"Compiled agent graph for model {self.model_name}")
+        return graph
+
+    def _shared_model(self):
+        """Return the chat model for this agent's model settings, built once per process."""
+        key = json.dumps([
+            self.model_routes, self.model_timeout, self.hedge_delay, self.request_timeout,
+            self.max_retries, self.max_connections, self.task_timeout, self.cache_prompt_prefix,
+        ], sort_keys=True)
+        with _models_lock:
+            if key not in _models:
+                _models[key] = self._build_model()
+            return _models[key]
+
+    def _build_model(self):
+        """Create the chat model, routing across backends when more than one is configured."""
+        from a2a_service.callbacks import UsageMetricsHandler
+        from a2a_service.ratelimit import RateLimiter
+        from a2a_service.router import ModelBackend, ModelRouter, create_chat_model, is_anthropic_model
+
+        # Each backend reports its token usage (with prompt-cache hits) as metrics
+        backends = []
+        for route in self.model_routes:
+            model = create_chat_model(
+                route["model"],
+                request_timeout=self.request_timeout,
+                max_retries=self.max_retries,
+                max_connections=self.max_connections,
+                callbacks=[UsageMetricsHandler(route["model"])],
+            )
+            backends.append(ModelBackend(
+                name=route["model"],
+                model=model,
+                skills=set(route["skills"]) if route.get("skills") else None,
+                max_input_chars=route.get("max_input_chars"),
+                timeout=route.get("timeout"),
+                rate_limiter=(
+                    RateLimiter(route["model"], rpm=route.get("rpm"), tpm=route.get("tpm"))
+                    if route.get("rpm") or route.get("tpm") else None
+                ),
+                # The prompt is shared by all backends, so each marks it as its provider needs
+                cache_prompt=self.cache_prompt_prefix and is_anthropic_model(model),
+            ))
+        # The router also enforces deadlines and rate limits, so a single model is only
+        # used directly when there are none
+        backend = backends[0]
+        if len(backends) == 1 and not (
+            self.model_timeout or self.task_timeout or backend.timeout or backend.rate_limiter
+        ):
+            return backend.model
+        return ModelRouter(backends=backends, timeout=self.model_timeout, hedge_delay=self.hedge_delay)
+
+    def _build_response_tool(self):
+        """Create the return-direct tool the model calls with its final ResponseFormat."""
+        from langchain_core.tools import StructuredTool
+
+        def respond(status: str, message: str) -> str:
+            return message
 
-    def invoke(self, query: str, session_id: str) -> Dict[str, Any]:
+        return StructuredTool.from_function(
+            func=respond,
+            name=self.RESPONSE_TOOL_NAME,
+            description="Send the final response to the user. Call this once, when you are done.",
+            args_schema=ResponseFormat,
+            return_direct=True,
+        )
+
+    def _system_instruction(self) -> str:
+        """Return the system instruction for the configured response mode."""
+        if self.response_mode == "tool":
+            return self.system_instruction + self.RESPONSE_TOOL_INSTRUCTION
+        return self.system_instruction
+
+    def _get_prompt(self):
+        """Return the system prompt passed to the graph.
+
+        Model requests are laid out as system prompt, tool schemas, then the conversation
+        (with any compaction summary first), so the static part forms a stable prefix that
+        providers can serve from their prompt cache. In cache_prompt_prefix mode the system
+        message is rendered once and reused for every turn.
+        """
+        if not self.cache_prompt_prefix:
+            return self._system_instruction()
+        if self._prompt_prefix is None:
+            from langchain_core.messages import SystemMessage
+            from a2a_service.router import is_anthropic_model, mark_prompt_cache
+
+            prompt = SystemMessage(content=textwrap.dedent(self._system_instruction()).strip())
+            if is_anthropic_model(self.model):
+                # Anthropic only caches prefixes explicitly marked with cache_control. A
+                # ModelRouter marks the prompt for its Anthropic backends itself.
+                [prompt] = mark_prompt_cache([prompt])
+            self._prompt_prefix = prompt
+        return self._prompt_prefix
+
+    def _run_config(
+        self, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Return the graph config for a run.
+
+        A session's runs under a skill form a checkpoint thread of their own, so agents
+        sharing the checkpointer never load a history written by another skill's graph.
+        The skill and the task deadline (if there is a time budget) go into the run
+        metadata, where the model router reads them. The task goes there too, and so into
+        the metadata of the run's checkpoints, where resume looks for it.
+        """
+        thread_id = f"{skill_id}:{session_id}" if skill_id else session_id
+        config = {"configurable": {"thread_id": thread_id}}
+        if self.callbacks:
+            config["callbacks"] = self.callbacks
+        metadata = {}
+        if skill_id:
+            metadata["skill_id"] = skill_id
+        if task_id:
+            metadata["task_id"] = task_id
+        if self.task_timeout:
+            metadata["deadline"] = time.time() + self.task_timeout
+        if metadata:
+            config["metadata"] = metadata
+        return config
+
+    def invoke(
+        self, query: str, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Synchronous invocation of the agent.
         
         Args:
             query: The user query.
             session_id: A unique session identifier for maintaining conversation context.
+            skill_id: The skill requested for the task, if any.
+            task_id: The task the run is for, recorded so resume can find the run.
             
         Returns:
             A structured response containing the agent's answer.
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
         logger.info(f"Agent received query: '{query}' with session_id: {session_id}")
         
         if not query or query.strip() == "":
@@ -77,29 +353,89 @@ class Agent:
                 "content": "I didn't receive any message. How can I help you?"
             }
             
-        config = {"configurable": {"thread_id": session_id}}
+        config = self._run_config(session_id, skill_id, task_id)
         self.graph.invoke({"messages": [("user", query)]}, config)
         
         response = self.get_agent_response(config)
         logger.info(f"Agent returning response: {response}")
         return response
 
-    async def stream(self, query: str, session_id: str) -> AsyncIterable[Dict[str, Any]]:
+    def resume(self, task_id: str, session_id: str, skill_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Finish a run that was interrupted, e.g. by a crash, from its last checkpoint.
+
+        Steps completed before the interruption are not run again: a run stopped between
+        steps continues with the next one, and a run that had finished only returns its
+        answer. The run is recognized by the task id that invoke and stream record in
+        the metadata of its checkpoints, which must be the session's latest.
+
+        Args:
+            task_id: The task of the interrupted run.
+            session_id: The session of the interrupted run.
+            skill_id: The skill requested for the task, if any.
+
+        Returns:
+            The agent's answer as from invoke, or None if the session's latest checkpoint
+            is not of this task's run, so it has to be started again.
+        """
+        config = self._run_config(session_id, skill_id, task_id)
+        state = self.graph.get_state(config)
+        if not state.values or (state.metadata or {}).get("task_id") != task_id:
+            return None
+        if state.next:
+            logger.info(f"Resuming the run of task {task_id} at {', '.join(state.next)}")
+            self.graph.invoke(None, config)
+        return self.get_agent_response(config)
+
+    async def stream(
+        self, query: str, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None
+    ) -> AsyncIterable[Dict[str, Any]]:
         """Asynchronous streaming invocation of the agent.
         
         Args:
             query: The user query.
             session_id: A unique session identifier for maintaining conversation context.
+            skill_id: The skill requested for the task, if any.
+            task_id: The task the run is for, recorded so resume can find the run.
             
         Yields:
-            Intermediate and final responses from the agent.
+            Intermediate and final responses from the agent. While the answer is being
+            generated, its text is also yielded piece by piece in items with "is_chunk" set.
         """
+        from langchain_core.messages import AIMessage, ToolMessage
+
         inputs = {"messages": [("user", query)]}
-        config = {"configurable": {"thread_id": session_id}}
+        config = self._run_config(session_id, skill_id, task_id)
+        # Tool calls being streamed, to follow the respond call in "tool" response mode
+        streaming_calls: Dict[Any, Dict[str, Any]] = {}
 
-        for item in self.graph.stream(inputs, config, stream_mode="values"):
-            message = item["messages"][-1]
+        async for mode, payload in self.graph.astream(inputs, config, stream_mode=["messages", "values", "custom"]):
+            if mode == "custom":
+                # Progress reported by tools, e.g. answers streamed by delegated agents
+                if isinstance(payload, dict) and payload.get("content"):
+                    yield {
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "content": payload["content"],
+                    }
+                continue
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "agent" and isinstance(chunk, AIMessage):
+                    text = self._answer_delta(chunk, streaming_calls)
+                    if text:
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": text,
+                            "is_chunk": True,
+                        }
+                continue
+
+            message = payload["messages"][-1]
             
+            # The final answer in "tool" response mode is not an intermediate step
+            if self._is_response_message(message):
+                continue
             # When the agent is thinking about using a tool
             if (
                 isinstance(message, AIMessage)
@@ -132,7 +468,10 @@ class Agent:
             A structured response with task completion status and content.
         """
         current_state = self.graph.get_state(config)        
-        structured_response = current_state.values.get('structured_response')
+        if self.response_mode == "tool":
+            structured_response = self._find_tool_response(current_state.values.get('messages', []))
+        else:
+            structured_response = current_state.values.get('structured_response')
         
         if structured_response and isinstance(structured_response, ResponseFormat): 
             if structured_response.status == "input-required":
@@ -161,5 +500,72 @@ class Agent:
             "content": "We are unable to process your request at the moment. Please try again.",
         }
 
+    def _answer_delta(self, chunk: Any, streaming_calls: Dict[Any, Dict[str, Any]]) -> str:
+        """Return the answer text a streamed model output chunk adds.
+
+        In "structured" mode that is the text content of the chunk. In "tool" mode it is
+        the growth of the respond call's message argument, read from the partial JSON
+        arguments streamed so far.
+        """
+        if self.response_mode != "tool":
+            if isinstance(chunk.content, str) and not chunk.tool_calls and not getattr(chunk, "tool_call_chunks", None):
+                return chunk.content
+            return ""
+
+        from langchain_core.utils.json import parse_partial_json
+
+        # Models that don't stream deliver the whole message at once
+        call_chunks = getattr(chunk, "tool_call_chunks", None) or [
+            {"name": call["name"], "args": json.dumps(call["args"]), "index": i}
+            for i, call in enumerate(chunk.tool_calls)
+        ]
+        delta = ""
+        for call_chunk in call_chunks:
+            call = streaming_calls.setdefault((chunk.id, call_chunk.get("index")), {"name": None, "args": "", "sent": 0})
+            call["name"] = call["name"] or call_chunk.get("name")
+            call["args"] += call_chunk.get("args") or ""
+            if call["name"] != self.RESPONSE_TOOL_NAME:
+                continue
+            try:
+                args = parse_partial_json(call["args"])
+            except Exception:
+                continue
+            message = args.get("message") if isinstance(args, dict) else None
+            if isinstance(message, str) and len(message) > call["sent"]:
+                delta += message[call["sent"]:]
+                call["sent"] = len(message)
+        return delta
+
+    def _is_response_message(self, message: Any) -> bool:
+        """Whether a message is the respond tool call or its result."""
+        if self.response_mode != "tool":
+            return False
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            return all(call["name"] == self.RESPONSE_TOOL_NAME for call in tool_calls)
+        return getattr(message, "type", None) == "tool" and message.name == self.RESPONSE_TOOL_NAME
+
+    def _find_tool_response(self, messages: List[Any]) -> Optional[ResponseFormat]:
+        """Find the final response of the latest turn in "tool" response mode.
+
+        Reads the arguments of the respond tool call. If the model answered in plain
+        text instead, the text is treated as a completed response.
+        """
+        for message in reversed(messages):
+            if message.type == "human":
+                break
+            if message.type != "ai":
+                continue
+            for call in message.tool_calls:
+                if call["name"] == self.RESPONSE_TOOL_NAME:
+                    try:
+                        return ResponseFormat(**call["args"])
+                    except Exception as e:
+                        logger.warning(f"Invalid respond tool arguments {call['args']}: {e}")
+                        return None
+            if not message.tool_calls and isinstance(message.content, str) and message.content:
+                return ResponseFormat(status="completed", message=message.content)
+        return None
+
     # Content types supported by this agent
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"] 
\ No newline at end of file
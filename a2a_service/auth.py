@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from a2a_service.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Authenticated caller of the request being handled, for scheduling and quotas downstream
+current_principal: ContextVar[Optional[str]] = ContextVar("current_principal", default=None)
+
+
+class AuthenticationError(Exception):
+    """Raised when a request carries credentials that are not valid."""
+
+
+class Authenticator:
+    """Verifies the credentials of a request and returns the caller's principal."""
+
+    # Schemes published in the agent card's authentication section
+    schemes: List[str] = []
+
+    def authenticate(self, headers: Mapping[str, str]) -> Optional[str]:
+        """Return the principal of a request, or None if it has no credentials for this scheme.
+
+        Raises:
+            AuthenticationError: If the request has credentials for this scheme that are not valid.
+        """
+        raise NotImplementedError
+
+
+class ApiKeyAuthenticator(Authenticator):
+    """Authenticates callers by a static API key sent in the X-API-Key header.
+
+    Only SHA-256 digests of the keys are held, and a request is checked with one hash
+    and one dictionary lookup.
+    """
+
+    schemes = ["apiKey"]
+    HEADER = "x-api-key"
+
+    def __init__(self, keys: Dict[str, str]):
+        """Initialize the authenticator.
+
+        Args:
+            keys: API key per principal.
+        """
+        self._principals = {self._digest(key): principal for principal, key in keys.items()}
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def authenticate(self, headers: Mapping[str, str]) -> Optional[str]:
+        key = headers.get(self.HEADER)
+        if not key:
+            return None
+        principal = self._principals.get(self._digest(key))
+        if principal is None:
+            raise AuthenticationError("Invalid API key")
+        return principal
+
+
+class JWTAuthenticator(Authenticator):
+    """Authenticates callers by a JWT bearer token; the principal is its "sub" claim.
+
+    Tokens are verified against a shared secret or the keys of a JWKS endpoint, which
+    are fetched once and cached. Verified tokens are remembered until they expire, so a
+    caller reusing its token costs a dictionary lookup rather than a signature check.
+    Requires the PyJWT package (with cryptography for asymmetric algorithms), installed by
+    the ``jwt`` extra.
+    """
+
+    schemes = ["bearer"]
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        algorithms: Optional[List[str]] = None,
+        jwks_cache_seconds: int = 3600,
+        max_cached_tokens: int = 10000,
+    ):
+        """Initialize the authenticator.
+
+        Args:
+            secret: Shared secret for HMAC-signed tokens.
+            jwks_url: URL of the issuer's JWKS, for tokens signed with its public keys.
+            audience: Required "aud" claim, if any.
+            issuer: Required "iss" claim, if any.
+            algorithms: Accepted signing algorithms. Defaults to HS256 with a secret, RS256 with a JWKS.
+            jwks_cache_seconds: How long fetched signing keys are reused.
+            max_cached_tokens: Most verified tokens remembered at once.
+        """
+        try:
+            import jwt
+        except ImportError as e:
+            raise ValueError(
+                "JWT authentication requires the PyJWT package: pip install 'a2a-template-langgraph[jwt]'"
+            ) from e
+        if not secret and not jwks_url:
+            raise ValueError("JWT authentication needs a secret or a JWKS URL")
+
+        self._jwt = jwt
+        self.secret = secret
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = algorithms or (["HS256"] if secret else ["RS256"])
+        self._jwks_client = (
+            jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=jwks_cache_seconds) if jwks_url else None
+        )
+        self.max_cached_tokens = max_cached_tokens
+        # Verified tokens, least recently used first: token -> (principal, expiry)
+        self._verified: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _verify(self, token: str) -> Tuple[str, float]:
+        key = self._jwks_client.get_signing_key_from_jwt(token).key if self._jwks_client else self.secret
+        claims = self._jwt.decode(
+            token,
+            key,
+            algorithms=self.algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+        return str(claims["sub"]), float(claims["exp"])
+
+    def authenticate(self, headers: Mapping[str, str]) -> Optional[str]:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        now = time.time()
+        with self._lock:
+            cached = self._verified.get(token)
+            if cached and cached[1] > now:
+                self._verified.move_to_end(token)
+                return cached[0]
+
+        try:
+            principal, expires = self._verify(token)
+        except (self._jwt.PyJWTError, KeyError, ValueError) as e:
+            raise AuthenticationError(f"Invalid token: {e}") from e
+
+        with self._lock:
+            self._verified[token] = (principal, expires)
+            while len(self._verified) > self.max_cached_tokens:
+                self._verified.popitem(last=False)
+        return principal
+
+
+def authenticate(authenticators: List[Authenticator], headers: Mapping[str, str]) -> str:
+    """Return the principal of a request from the first authenticator its credentials are for.
+
+    Raises:
+        AuthenticationError: If the request has no valid credentials.
+    """
+    for authenticator in authenticators:
+        try:
+            principal = authenticator.authenticate(headers)
+        except AuthenticationError:
+            metrics.inc("a2a_auth_failures_total", help="Requests rejected for invalid or missing credentials", reason="invalid")
+            raise
+        if principal is not None:
+            return principal
+    metrics.inc("a2a_auth_failures_total", help="Requests rejected for invalid or missing credentials", reason="missing")
+    raise AuthenticationError("Missing credentials")
@@ -0,0 +1,42 @@
+import logging
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from a2a_service.metrics import metrics
+from a2a_service.ratelimit import current_token_charge
+
+logger = logging.getLogger(__name__)
+
+
+class UsageMetricsHandler(BaseCallbackHandler):
+    """Records token usage, including provider prompt-cache hits and misses, as metrics."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self._record(usage)
+
+    def _record(self, usage: dict):
+        details = usage.get("input_token_details") or {}
+        input_tokens = usage.get("input_tokens", 0)
+        cache_read = details.get("cache_read", 0) or 0
+        cache_creation = details.get("cache_creation", 0) or 0
+
+        metrics.inc("a2a_llm_requests_total", help="LLM calls", model=self.model_name)
+        metrics.inc("a2a_llm_input_tokens_total", input_tokens, help="Prompt tokens sent", model=self.model_name)
+        metrics.inc("a2a_llm_output_tokens_total", usage.get("output_tokens", 0), help="Completion tokens received", model=self.model_name)
+        metrics.inc("a2a_llm_cache_read_tokens_total", cache_read, help="Prompt tokens served from the provider's prompt cache", model=self.model_name)
+        metrics.inc("a2a_llm_cache_miss_tokens_total", input_tokens - cache_read, help="Prompt tokens not served from the prompt cache", model=self.model_name)
+        metrics.inc("a2a_llm_cache_creation_tokens_total", cache_creation, help="Prompt tokens written to the prompt cache", model=self.model_name)
+        charge = current_token_charge.get()
+        if charge:
+            charge(input_tokens + usage.get("output_tokens", 0))
+        if input_tokens:
+            logger.debug(f"LLM call on {self.model_name}: {cache_read}/{input_tokens} prompt tokens cached")
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadedCheckpointer(BaseCheckpointSaver):
+    """Gives a synchronous checkpointer the async interface by running it in worker threads.
+
+    The SQLite and Postgres checkpointers come as a synchronous class, used by graph
+    runs in worker threads, and an async class bound to one event loop. Wrapping the
+    synchronous one serves streamed runs on the event loop and invoked runs in
+    threads from the same connections.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    def get_tuple(self, config: Dict[str, Any]):
+        return self.saver.get_tuple(config)
+
+    def list(self, config: Optional[Dict[str, Any]], **kwargs: Any) -> Iterator[Any]:
+        return self.saver.list(config, **kwargs)
+
+    def put(self, config: Dict[str, Any], checkpoint: Any, metadata: Any, new_versions: Any) -> Dict[str, Any]:
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: Dict[str, Any], writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current: Any, channel: Any) -> Any:
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: Dict[str, Any]):
+        return await asyncio.to_thread(self.saver.get_tuple, config)
+
+    async def alist(self, config: Optional[Dict[str, Any]], **kwargs: Any) -> AsyncIterator[Any]:
+        for item in await asyncio.to_thread(lambda: list(self.saver.list(config, **kwargs))):
+            yield item
+
+    async def aput(self, config: Dict[str, Any], checkpoint: Any, metadata: Any, new_versions: Any) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.saver.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: Dict[str, Any], writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.saver.put_writes, config, writes, task_id, task_path)
+
+
+def open_checkpointer(url: str) -> BaseCheckpointSaver:
+    """Open a persistent checkpointer, creating its tables if needed.
+
+    Args:
+        url: "sqlite:///path/to/file.db" (requires langgraph-checkpoint-sqlite) or a
+            postgresql:// URL (requires langgraph-checkpoint-postgres).
+
+    Raises:
+        ValueError: If the URL scheme is unsupported or its package is not installed.
+    """
+    if url.startswith("sqlite:///"):
+        try:
+            import sqlite3
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as e:
+            raise ValueError("SQLite checkpoints require the langgraph-checkpoint-sqlite package") from e
+        conn = sqlite3.connect(url[len("sqlite:///"):], check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        saver = SqliteSaver(conn)
+    elif url.startswith(("postgresql://", "postgres://")):
+        try:
+            from langgraph.checkpoint.postgres import PostgresSaver
+            from psycopg.rows import dict_row
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ValueError("Postgres checkpoints require the langgraph-checkpoint-postgres package") from e
+        pool = ConnectionPool(url, kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row}, open=True)
+        saver = PostgresSaver(pool)
+    else:
+        raise ValueError(f"Unsupported checkpoint URL: {url}")
+    saver.setup()
+    logger.info(f"Storing agent checkpoints in {url.split('@')[-1]}")
+    return ThreadedCheckpointer(saver)
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import weakref
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple, Union
+
+import httpx
+from pydantic import ValidationError
+
+from a2a_service.codec import encode_json
+from a2a_service.types import (
+    A2AClientHTTPError,
+    A2AClientJSONError,
+    AgentCard,
+    GetTaskRequest,
+    GetTaskResponse,
+    SendTaskRequest,
+    SendTaskResponse,
+    SendTaskStreamingRequest,
+    SendTaskStreamingResponse,
+    TaskQueryParams,
+    TaskSendParams,
+)
+
+logger = logging.getLogger(__name__)
+
+# Connection pools per event loop (httpx clients cannot be shared across loops), then per settings
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[int, bool], httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Fetched agent cards per URL: (card, ETag, time fetched)
+_agent_cards: Dict[str, Tuple[AgentCard, Optional[str], float]] = {}
+
+# Responses worth retrying: the request may succeed once the server has recovered
+_RETRY_STATUS = {429, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client(max_connections: int = 100, http2: bool = True) -> httpx.AsyncClient:
+    """Return the shared A2A connection pool of the running event loop.
+
+    Args:
+        max_connections: Most connections open at once, across all agents.
+        http2: Use HTTP/2 where the server supports it, multiplexing requests to an
+            agent over one connection. Requires the h2 package; HTTP/1.1 is used without it.
+    """
+    http2 = http2 and _http2_available()
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get((max_connections, http2))
+    if client is None or client.is_closed:
+        client = loop_clients[(max_connections, http2)] = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60,
+            ),
+        )
+    return client
+
+
+def _join(base_url: str, path: str) -> str:
+    return base_url.rstrip("/") + "/" + path.lstrip("/")
+
+
+class A2AClient:
+    """Async client for A2A agents served by A2AServer.
+
+    Requests go through a connection pool shared by all clients in the event loop.
+    Failed connections and 429/5xx responses are retried with jittered exponential
+    backoff, honouring Retry-After. Retrying tasks/send is safe because the server
+    deduplicates sends by task id.
+    """
+
+    # Most tasks/get requests per batch; A2AServer accepts up to MAX_BATCH_SIZE
+    BATCH_SIZE = 100
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        agent_card: Optional[AgentCard] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_connections: int = 100,
+        http2: bool = True,
+    ):
+        """Initialize the client.
+
+        Args:
+            url: URL of the agent. Taken from agent_card if not given.
+            agent_card: Card of the agent, e.g. from get_agent_card.
+            headers: Headers sent with every request, e.g. {"X-API-Key": ...}.
+            timeout: Timeout in seconds for a request, and between events of a stream.
+            retries: Retries after a failed attempt.
+            backoff: Base delay in seconds before the first retry; doubled on each further retry.
+            max_connections: Size of the shared connection pool.
+            http2: Use HTTP/2 where available.
+        """
+        if url is None and agent_card is None:
+            raise ValueError("A2AClient needs an agent URL or agent card")
+        self.url = url or agent_card.url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self.http2 = http2
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return get_http_client(self.max_connections, self.http2)
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter, so clients retrying after the same failure do not retry in step
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def _post(self, path: str, content: bytes, extra_headers: Optional[Dict[str, str]] = None) -> Any:
+        """POST a JSON-RPC payload and return the decoded JSON response, retrying transient failures."""
+        headers = {"Content-Type": "application/json", **self.headers, **(extra_headers or {})}
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                response = await self._client.post(
+                    _join(self.url, path), content=content, headers=headers, timeout=self.timeout
+                )
+                if response.status_code not in _RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+            except httpx.HTTPStatusError as e:
+                raise A2AClientHTTPError(e.response.status_code, e.response.text) from e
+            except json.JSONDecodeError as e:
+                raise A2AClientJSONError(str(e)) from e
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if attempt == self.retries:
+                    raise A2AClientHTTPError(503, f"Request to {self.url} failed: {e}") from e
+            if attempt == self.retries:
+                raise A2AClientHTTPError(response.status_code, response.text)
+            delay = self._retry_delay(attempt, response)
+            logger.info(f"Retrying request to {self.url} in {delay:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    async def send_task(self, params: Union[TaskSendParams, Dict[str, Any]]) -> SendTaskResponse:
+        """Send a task and wait for its result."""
+        request = SendTaskRequest(params=params)
+        data = await self._post("", encode_json(request))
+        try:
+            return SendTaskResponse.model_validate(data)
+        except ValidationError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+    async def get_task(self, task_id: str, history_length: Optional[int] = None) -> GetTaskResponse:
+        """Fetch a task."""
+        return (await self.get_tasks([task_id], history_length))[0]
+
+    async def get_tasks(self, task_ids: List[str], history_length: Optional[int] = None) -> List[GetTaskResponse]:
+        """Fetch several tasks in JSON-RPC batch requests, returning responses in the order of task_ids."""
+        requests = [
+            GetTaskRequest(params=TaskQueryParams(id=task_id, historyLength=history_length)) for task_id in task_ids
+        ]
+        batches = [requests[i:i + self.BATCH_SIZE] for i in range(0, len(requests), self.BATCH_SIZE)]
+        results = await asyncio.gather(*(self._get_batch(batch) for batch in batches))
+        return [response for batch in results for response in batch]
+
+    async def _get_batch(self, requests: List[GetTaskRequest]) -> List[GetTaskResponse]:
+        data = await self._post("", b"[" + b",".join(encode_json(r) for r in requests) + b"]")
+        if not isinstance(data, list):
+            # A whole-batch error, such as an oversized batch
+            raise A2AClientJSONError(f"Expected a batch response, got: {data}")
+        try:
+            by_id = {item.get("id"): GetTaskResponse.model_validate(item) for item in data}
+        except ValidationError as e:
+            raise A2AClientJSONError(str(e)) from e
+        return [by_id.get(r.id) or GetTaskResponse(id=r.id) for r in requests]
+
+    async def send_task_streaming(
+        self, params: Union[TaskSendParams, Dict[str, Any]]
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Send a task and yield its streamed events until the final one.
+
+        Connecting is retried like other requests. Once events have arrived a broken stream
+        is not retried but raises A2AClientHTTPError; the task can be fetched with get_task,
+        or subscribed to again with the same task id, which replays it.
+        """
+        request = SendTaskStreamingRequest(params=params)
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream", **self.headers}
+        streamed = False
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._client.stream(
+                    "POST",
+                    _join(self.url, "send_task_subscribe"),
+                    content=encode_json(request),
+                    headers=headers,
+                    timeout=self.timeout,
+                ) as response:
+                    if response.status_code in _RETRY_STATUS and attempt < self.retries:
+                        delay = self._retry_delay(attempt, response)
+                    else:
+                        if response.status_code >= 400:
+                            await response.aread()
+                            raise A2AClientHTTPError(response.status_code, response.text)
+                        async for event in self._iter_events(response):
+                            streamed = True
+                            yield event
+                        return
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if streamed:
+                    # Sending again would replay the events already yielded
+                    raise A2AClientHTTPError(503, f"Stream from {self.url} broke: {e}") from e
+                if attempt == self.retries:
+                    raise A2AClientHTTPError(503, f"Stream from {self.url} failed: {e}") from e
+                delay = self._retry_delay(attempt)
+            logger.info(f"Retrying stream from {self.url} in {delay:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _iter_events(response: httpx.Response) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Parse server-sent events into streaming responses."""
+        data_lines: List[str] = []
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line or not data_lines:
+                continue
+            # A blank line ends the event
+            try:
+                event = SendTaskStreamingResponse.model_validate_json("\n".join(data_lines))
+            except ValidationError as e:
+                raise A2AClientJSONError(str(e)) from e
+            data_lines = []
+            yield event
+            result = event.result
+            if event.error is not None or getattr(result, "final", False):
+                return
+
+
+async def get_agent_card(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    max_age: float = 300.0,
+    timeout: float = 10.0,
+) -> AgentCard:
+    """Return the agent card of the agent at a URL, from the discovery cache if it is fresh.
+
+    Cards older than max_age are revalidated with the ETag they were served with, so an
+    unchanged card costs a 304 response rather than a download and parse.
+
+    Raises:
+        A2AClientHTTPError: If the card cannot be fetched.
+        A2AClientJSONError: If the response is not a valid agent card.
+    """
+    card_url = _join(url, ".well-known/agent.json")
+    cached = _agent_cards.get(card_url)
+    if cached and time.monotonic() - cached[2] < max_age:
+        return cached[0]
+
+    request_headers = dict(headers or {})
+    if cached and cached[1]:
+        request_headers["If-None-Match"] = cached[1]
+    try:
+        response = await get_http_client().get(card_url, headers=request_headers, timeout=timeout)
+    except (httpx.TransportError, httpx.TimeoutException) as e:
+        raise A2AClientHTTPError(503, f"Fetching {card_url} failed: {e}") from e
+
+    if response.status_code == 304 and cached:
+        _agent_cards[card_url] = (cached[0], cached[1], time.monotonic())
+        return cached[0]
+    if response.status_code >= 400:
+        raise A2AClientHTTPError(response.status_code, response.text)
+    try:
+        card = AgentCard.model_validate_json(response.content)
+    except ValidationError as e:
+        raise A2AClientJSONError(str(e)) from e
+    _agent_cards[card_url] = (card, response.headers.get("etag"), time.monotonic())
+    return card
+
+
+async def close_http_clients():
+    """Close the connection pools of the running event loop."""
+    for client in _clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.aclose()
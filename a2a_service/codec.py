@@ -0,0 +1,139 @@
+import logging
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from a2a_service.types import GetTaskRequest, JSONRPCRequest, Message, TaskSendParams, TextPart
+
+logger = logging.getLogger(__name__)
+
+RequestT = TypeVar("RequestT", bound=JSONRPCRequest)
+
+# Defaults applied to task params when the client omits them
+DEFAULT_HISTORY_LENGTH = 10
+DEFAULT_OUTPUT_MODES = ["text"]
+
+# Adapter parsing raw JSON bytes into a dict in one pass in pydantic-core (Rust), without json.loads
+_json_object_adapter: TypeAdapter[Dict[str, Any]] = TypeAdapter(Dict[str, Any])
+_get_task_batch_adapter: TypeAdapter[List[GetTaskRequest]] = TypeAdapter(List[GetTaskRequest])
+
+
+class MethodMismatchError(Exception):
+    """Raised when a request body names a different JSON-RPC method than the one decoded."""
+
+    def __init__(self, method: str):
+        self.method = method
+        super().__init__(f"Unexpected method: {method}")
+
+
+def _process_message(message_data: Any) -> Optional[Any]:
+    """Process loosely structured message data into a proper Message object."""
+    if isinstance(message_data, dict) and isinstance(message_data.get("parts"), list):
+        # The message already has parts, use as is
+        return message_data
+
+    # Create a default text part if message is a simple string or doesn't have parts
+    text = ""
+    if isinstance(message_data, str):
+        text = message_data
+    elif isinstance(message_data, dict) and "text" in message_data:
+        text = message_data["text"]
+
+    if text:
+        return Message(role="user", parts=[TextPart(text=text)])
+    return None
+
+
+def _apply_param_defaults(params: TaskSendParams) -> TaskSendParams:
+    """Fill in the defaults the server has always assumed for missing params."""
+    if params.historyLength is None:
+        params.historyLength = DEFAULT_HISTORY_LENGTH
+    if params.acceptedOutputModes is None:
+        params.acceptedOutputModes = list(DEFAULT_OUTPUT_MODES)
+    return params
+
+
+def _decode_legacy_request(body: Dict[str, Any], request_cls: Type[RequestT]) -> RequestT:
+    """Build a request from a loosely structured body (e.g. plain string messages)."""
+    request_id = body.get("id", "")
+    params_data = body.get("params", {}) or {}
+
+    params = TaskSendParams(
+        id=params_data.get("id", ""),
+        sessionId=params_data.get("sessionId", ""),
+        historyLength=params_data.get("historyLength", DEFAULT_HISTORY_LENGTH),
+        acceptedOutputModes=params_data.get("acceptedOutputModes", list(DEFAULT_OUTPUT_MODES)),
+        pushNotification=params_data.get("pushNotification", None),
+        metadata=params_data.get("metadata", None),
+    )
+
+    if "message" in params_data:
+        params.message = _process_message(params_data["message"])
+    else:
+        logger.warning("No message found in request params")
+
+    return request_cls(id=request_id, params=params)
+
+
+def decode_task_request(raw: bytes, request_cls: Type[RequestT]) -> RequestT:
+    """Decode a raw request body into a task request.
+
+    Well-formed A2A payloads are validated straight from bytes with
+    ``model_validate_json``. Payloads that don't match the schema (for example a
+    message sent as a plain string) fall back to the lenient legacy parsing.
+
+    Args:
+        raw: The raw request body.
+        request_cls: The request model to decode into.
+
+    Returns:
+        The decoded request.
+
+    Raises:
+        ValueError: If the body is not a JSON object.
+        MethodMismatchError: If the body is a request for another method.
+    """
+    try:
+        request = request_cls.model_validate_json(raw)
+        _apply_param_defaults(request.params)
+        return request
+    except ValidationError:
+        pass
+
+    try:
+        body = _json_object_adapter.validate_json(raw)
+    except ValidationError as e:
+        raise ValueError(f"Invalid JSON payload: {e}") from e
+    method = body.get("method")
+    if method and method != request_cls.model_fields["method"].default:
+        raise MethodMismatchError(method)
+    return _decode_legacy_request(body, request_cls)
+
+
+def is_batch(raw: bytes) -> bool:
+    """Whether a request body is a JSON-RPC batch (an array of requests)."""
+    return raw.lstrip()[:1] == b"["
+
+
+def decode_get_task_requests(raw: bytes) -> List[GetTaskRequest]:
+    """Decode a tasks/get request, or a JSON-RPC batch of them.
+
+    Raises:
+        ValueError: If the body is not a valid tasks/get request or batch.
+    """
+    try:
+        if is_batch(raw):
+            return _get_task_batch_adapter.validate_json(raw)
+        return [GetTaskRequest.model_validate_json(raw)]
+    except ValidationError as e:
+        raise ValueError(f"Invalid tasks/get request: {e}") from e
+
+
+def encode_json(model: BaseModel) -> bytes:
+    """Serialize a model to JSON bytes using pydantic-core's serializer directly."""
+    return model.__pydantic_serializer__.to_json(model)
+
+
+def encode_sse_event(model: BaseModel) -> bytes:
+    """Serialize a model as a single server-sent event."""
+    return b"data: " + encode_json(model) + b"\n\n"
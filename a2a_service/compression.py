@@ -0,0 +1,94 @@
+import gzip
+import json
+import logging
+from typing import Any, Optional, Tuple
+
+from a2a_service.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Compressed payloads are recognized by their frame header, so rows written with one
+# algorithm stay readable after switching to another
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError("zstd compression requires the zstandard package: pip install 'a2a-template-langgraph[zstd]'") from e
+    return zstandard
+
+
+def decompress_json(blob: bytes) -> Any:
+    """Decode a JSON payload compressed by StorageCodec."""
+    if blob[:4] == _ZSTD_MAGIC:
+        raw = _zstd().ZstdDecompressor().decompress(blob)
+    elif blob[:2] == _GZIP_MAGIC:
+        raw = gzip.decompress(blob)
+    else:
+        raise ValueError("Unknown compressed payload format")
+    return json.loads(raw)
+
+
+def load_payload(value: Any, blob: Optional[bytes]) -> Any:
+    """Return a stored payload from its JSON column or, if it was compressed, its blob column."""
+    if blob is None:
+        return value
+    return decompress_json(blob)
+
+
+class StorageCodec:
+    """Compresses large JSON payloads (messages, artifact parts) for storage.
+
+    Payloads whose JSON encoding is at least ``threshold`` bytes are compressed into a
+    binary column and their JSON column is left empty; smaller ones are stored as JSON
+    as before, since compressing them saves little and costs CPU on every read.
+    """
+
+    ALGORITHMS = ("gzip", "zstd")
+
+    def __init__(self, algorithm: str = "zstd", threshold: int = 4096, level: Optional[int] = None):
+        """Initialize the codec.
+
+        Args:
+            algorithm: "zstd" (requires the zstandard package) or "gzip".
+            threshold: Smallest JSON payload, in bytes, that is compressed.
+            level: Compression level. Defaults to 3 for zstd and 6 for gzip.
+        """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unsupported compression algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        if algorithm == "zstd":
+            _zstd()  # Fail at startup rather than on the first large payload
+            self.level = 3 if level is None else level
+        else:
+            self.level = 6 if level is None else level
+
+    def compress(self, raw: bytes) -> bytes:
+        """Compress encoded bytes with the configured algorithm."""
+        if self.algorithm == "zstd":
+            # Compressor objects are not thread-safe, so one is made per call
+            return _zstd().ZstdCompressor(level=self.level).compress(raw)
+        return gzip.compress(raw, compresslevel=self.level, mtime=0)
+
+    def encode(self, value: Any) -> Tuple[Any, Optional[bytes]]:
+        """Prepare a payload for storage.
+
+        Returns:
+            A (json_value, blob) pair for the JSON and binary columns; exactly one is set
+            for a non-empty payload.
+        """
+        if value is None:
+            return None, None
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(raw) < self.threshold:
+            return value, None
+
+        blob = self.compress(raw)
+        metrics.inc("a2a_storage_compressed_payloads_total", help="Payloads stored compressed", algorithm=self.algorithm)
+        metrics.inc("a2a_storage_uncompressed_bytes_total", len(raw), help="JSON bytes of payloads stored compressed", algorithm=self.algorithm)
+        metrics.inc("a2a_storage_compressed_bytes_total", len(blob), help="Bytes written for payloads stored compressed", algorithm=self.algorithm)
+        return None, blob
@@ -0,0 +1,162 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, NotRequired, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string, trim_messages
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt.chat_agent_executor import AgentStateWithStructuredResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CompactedAgentState(AgentStateWithStructuredResponse):
+    """Agent state with a running summary of the turns no longer sent to the model."""
+    context_summary: NotRequired[str]
+    # Number of leading messages in `messages` that the summary covers
+    summary_message_count: NotRequired[int]
+
+
+class ContextCompactor:
+    """Pre-model hook that keeps the model input within a token budget.
+
+    The full message list stays in the checkpoint; only the input sent to the model
+    is compacted:
+
+    - Tool outputs from earlier turns are truncated.
+    - When the remaining messages exceed the budget, the oldest turns are dropped
+      from the model input and summarized in a background thread.
+    - A finished summary is written to the checkpoint on the next model call and
+      sent in place of the turns it covers from then on.
+
+    Until a summary is ready, dropped turns are simply left out, so no model call
+    ever waits on summarization.
+    """
+
+    SUMMARY_PROMPT = (
+        "Summarize the conversation below for an assistant that will continue it. "
+        "Keep facts, decisions, open questions and user preferences. Be concise."
+    )
+
+    def __init__(
+        self,
+        summary_model: Any,
+        max_tokens: int = 8000,
+        max_tool_output_chars: int = 1000,
+    ):
+        """Initialize the compactor.
+
+        Args:
+            summary_model: Chat model used to summarize older turns.
+            max_tokens: Token budget for the messages sent to the model, excluding the system prompt.
+            max_tool_output_chars: Length to which tool outputs from earlier turns are truncated.
+        """
+        self.summary_model = summary_model
+        self.max_tokens = max_tokens
+        self.max_tool_output_chars = max_tool_output_chars
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-summary")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        messages: List[BaseMessage] = list(state["messages"])
+        summary = state.get("context_summary")
+        covered = state.get("summary_message_count", 0)
+        thread_id = config.get("configurable", {}).get("thread_id", "")
+        update: Dict[str, Any] = {}
+
+        # Pick up a summary finished in the background since the last call
+        finished = self._take_finished(thread_id)
+        if finished:
+            summary, covered = finished
+            update["context_summary"] = summary
+            update["summary_message_count"] = covered
+
+        recent = self._truncate_old_tool_outputs(messages[covered:])
+        if count_tokens_approximately(recent) > self.max_tokens:
+            kept = trim_messages(
+                recent,
+                max_tokens=self.max_tokens,
+                token_counter=count_tokens_approximately,
+                strategy="last",
+                start_on="human",
+            )
+            if not kept:
+                # A single turn is over budget; send it anyway rather than nothing
+                kept = recent[self._last_human_index(recent):]
+            dropped = len(recent) - len(kept)
+            self._schedule_summary(thread_id, summary, messages[covered:covered + dropped], covered + dropped)
+            recent = kept
+
+        llm_input: List[BaseMessage] = []
+        if summary:
+            llm_input.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        llm_input.extend(recent)
+        update["llm_input_messages"] = llm_input
+        return update
+
+    def _truncate_old_tool_outputs(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Truncate tool outputs that precede the latest user message."""
+        last_human = self._last_human_index(messages)
+        compacted = []
+        for i, message in enumerate(messages):
+            if (
+                i < last_human
+                and isinstance(message, ToolMessage)
+                and isinstance(message.content, str)
+                and len(message.content) > self.max_tool_output_chars
+            ):
+                message = message.model_copy(update={
+                    "content": message.content[:self.max_tool_output_chars] + " [truncated]"
+                })
+            compacted.append(message)
+        return compacted
+
+    @staticmethod
+    def _last_human_index(messages: List[BaseMessage]) -> int:
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                return i
+        return 0
+
+    def _take_finished(self, thread_id: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            future = self._pending.get(thread_id)
+            if future is None or not future.done():
+                return None
+            del self._pending[thread_id]
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"Background summarization failed for thread {thread_id}: {e}")
+            return None
+
+    def _schedule_summary(
+        self,
+        thread_id: str,
+        previous_summary: Optional[str],
+        messages: List[BaseMessage],
+        covered: int,
+    ):
+        """Start summarizing dropped messages unless a summary is already in progress."""
+        if not messages:
+            return
+        with self._lock:
+            if thread_id in self._pending:
+                return
+            self._pending[thread_id] = self._executor.submit(
+                self._summarize, previous_summary, messages, covered
+            )
+
+    def _summarize(
+        self, previous_summary: Optional[str], messages: List[BaseMessage], covered: int
+    ) -> Tuple[str, int]:
+        transcript = get_buffer_string(messages)
+        if previous_summary:
+            transcript = f"Earlier summary:\n{previous_summary}\n\n{transcript}"
+        response = self.summary_model.invoke([
+            SystemMessage(content=self.SUMMARY_PROMPT),
+            HumanMessage(content=transcript),
+        ])
+        return response.content, covered
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import IO, Iterable, List, Optional, Tuple
+
+from a2a_service.types import FileContent, FilePart, Message, Part
+
+logger = logging.getLogger(__name__)
+
+# Characters of base64 decoded per step; a multiple of 4 so chunks decode independently
+_BASE64_CHUNK = 4 * 64 * 1024
+_COPY_CHUNK = 1024 * 1024
+
+
+class FileStore:
+    """Content-addressed storage for files uploaded in task messages.
+
+    Inline base64 file parts are decoded in chunks into a spooled temporary file
+    (kept in memory up to ``spool_max_size``, on disk beyond it) while being hashed,
+    then stored once under their SHA-256 digest. Identical uploads are stored only once.
+    The part is rewritten to reference the stored file by URI, so the task, the agent
+    input and the database rows carry a reference instead of the bytes.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        base_url: str,
+        spool_max_size: int = 1024 * 1024,
+        max_file_size: int = 50 * 1024 * 1024,
+    ):
+        """Initialize the store.
+
+        Args:
+            root: Directory the files are stored in. Created if missing.
+            base_url: URL of this server; stored files are served at {base_url}/files/{digest}.
+            spool_max_size: Size up to which an upload is decoded in memory before spilling to disk.
+            max_file_size: Largest accepted file, in bytes, after decoding.
+        """
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.spool_max_size = spool_max_size
+        self.max_file_size = max_file_size
+        self._tmp_dir = self.root / "tmp"
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        """Return the path of a stored file. Raises ValueError for malformed digests."""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid file digest: {digest}")
+        return self.root / digest[:2] / digest
+
+    def uri(self, digest: str) -> str:
+        """Return the URI a stored file is served at."""
+        return f"{self.base_url}/files/{digest}"
+
+    def put(self, source: IO[bytes]) -> Tuple[str, int]:
+        """Store the contents of a binary stream and return its digest and size."""
+        return self._store(iter(lambda: source.read(_COPY_CHUNK), b""))
+
+    def put_base64(self, data: str) -> Tuple[str, int]:
+        """Decode base64 data into the store and return its digest and size.
+
+        Raises:
+            ValueError: If the data is not valid base64 or the file is too large.
+        """
+        return self._store(self._decode_base64_chunks(data))
+
+    @staticmethod
+    def _decode_base64_chunks(data: str) -> Iterable[bytes]:
+        carry = ""
+        for start in range(0, len(data), _BASE64_CHUNK):
+            # Line breaks and other whitespace are allowed in the data and skipped
+            chunk = "".join((carry + data[start:start + _BASE64_CHUNK]).split())
+            usable = len(chunk) - len(chunk) % 4
+            carry = chunk[usable:]
+            try:
+                yield base64.b64decode(chunk[:usable], validate=True)
+            except binascii.Error as e:
+                raise ValueError(f"Invalid base64 file data: {e}") from e
+        if carry:
+            raise ValueError("Invalid base64 file data: incorrect padding")
+
+    def _store(self, chunks: Iterable[bytes]) -> Tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_max_size, dir=self._tmp_dir) as spool:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_file_size:
+                    raise ValueError(f"File exceeds the maximum size of {self.max_file_size} bytes")
+                digest.update(chunk)
+                spool.write(chunk)
+
+            hex_digest = digest.hexdigest()
+            path = self.path(hex_digest)
+            if path.exists():
+                logger.debug(f"File {hex_digest} already stored")
+                return hex_digest, size
+
+            # Write under a temporary name and rename, so a file is never seen half-written
+            path.parent.mkdir(exist_ok=True)
+            spool.seek(0)
+            fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    shutil.copyfileobj(spool, out, _COPY_CHUNK)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        logger.info(f"Stored file {hex_digest} ({size} bytes)")
+        return hex_digest, size
+
+    def ingest_part(self, part: Part) -> Part:
+        """Move the inline bytes of a file part into the store and return a part referencing it."""
+        if not isinstance(part, FilePart) or not part.file.bytes:
+            return part
+        digest, size = self.put_base64(part.file.bytes)
+        return FilePart(
+            file=FileContent(name=part.file.name, mimeType=part.file.mimeType, uri=self.uri(digest)),
+            metadata={**(part.metadata or {}), "sha256": digest, "size": size},
+        )
+
+    def ingest_parts(self, parts: List[Part]) -> List[Part]:
+        """Apply ingest_part to each part."""
+        return [self.ingest_part(part) for part in parts]
+
+    def ingest_message(self, message: Optional[Message]) -> Optional[Message]:
+        """Apply ingest_part to the parts of a message, in place."""
+        if isinstance(message, Message) and any(isinstance(p, FilePart) and p.file.bytes for p in message.parts):
+            message.parts = self.ingest_parts(message.parts)
+        return message
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    """Measures event-loop lag by timing how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = 0.5, window: float = 60.0):
+        """Initialize the monitor.
+
+        Args:
+            interval: Seconds between lag samples.
+            window: Seconds of samples the worst lag is reported over.
+        """
+        self.interval = interval
+        self.window = window
+        self.lag = 0.0
+        # Samples of the last window; reading them does not reset them, so every probe
+        # sees the same worst lag
+        self._samples: Deque[float] = deque(maxlen=max(1, round(window / interval)))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            self._samples.append(self.lag)
+
+    @property
+    def max_lag(self) -> float:
+        """The worst lag sampled in the last window."""
+        return max(self._samples, default=self.lag)
+
+    def status(self) -> Dict[str, Any]:
+        """Return the latest lag sample and the worst lag of the last window."""
+        return {"lag_ms": round(self.lag * 1000, 2), "max_lag_ms": round(self.max_lag * 1000, 2)}
+
+
+async def run_check(check, timeout: float = 2.0) -> Dict[str, Any]:
+    """Run a blocking health check in a worker thread with a timeout.
+
+    Args:
+        check: A callable returning a dict of details; raising marks the check as failed.
+        timeout: Seconds to wait before the check is reported as failed.
+
+    Returns:
+        The check details with ``ok`` and ``latency_ms`` added.
+    """
+    start = time.perf_counter()
+    try:
+        details = await asyncio.wait_for(asyncio.to_thread(check), timeout)
+        result = {"ok": True, **(details or {})}
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"timed out after {timeout}s"}
+    except Exception as e:
+        logger.warning(f"Health check {getattr(check, '__name__', check)} failed: {e}")
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
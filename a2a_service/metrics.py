@@ -0,0 +1,85 @@
+import threading
+from typing import Callable, Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """A minimal in-process registry of counters and gauges.
+
+    Rendered in the Prometheus text exposition format by the server's /metrics
+    endpoint, without requiring a client library.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels):
+        """Increment a counter."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def set(self, name: str, value: float, help: str = "", **labels):
+        """Set a gauge to a value."""
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+            if help:
+                self._help.setdefault(name, help)
+
+    def gauge_callback(self, name: str, callback: Callable[[], float], help: str = ""):
+        """Register a gauge whose value is read from a callback at render time."""
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+            if help:
+                self._help.setdefault(name, help)
+
+    def get(self, name: str, **labels) -> float:
+        """Return the current value of a counter or gauge, or 0 if it was never recorded."""
+        key = self._key(labels)
+        with self._lock:
+            for metrics in (self._counters, self._gauges):
+                if name in metrics and key in metrics[name]:
+                    return metrics[name][key]
+        return 0
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            callbacks = dict(self._gauge_callbacks)
+            help_texts = dict(self._help)
+
+        for name, callback in callbacks.items():
+            try:
+                gauges.setdefault(name, {})[()] = callback()
+            except Exception:
+                continue
+
+        for kind, metrics in (("counter", counters), ("gauge", gauges)):
+            for name in sorted(metrics):
+                if name in help_texts:
+                    lines.append(f"# HELP {name} {help_texts[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(metrics[name].items()):
+                    labels = ",".join(f'{label}="{val}"' for label, val in key)
+                    lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
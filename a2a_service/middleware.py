@@ -0,0 +1,200 @@
+import gzip
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from a2a_service.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _StreamCompressor:
+    """Compresses a response body chunk by chunk, flushing after each chunk."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "zstd":
+            import zstandard
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Flushing ends each chunk on a byte boundary the client can decode, so an SSE
+        # event is delivered when it is sent rather than when the compressor's buffer fills
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class ResponseCompressionMiddleware:
+    """Compresses JSON, text and SSE responses with zstd or gzip, as the client accepts.
+
+    Complete responses are compressed in one go if they are at least ``minimum_size``
+    bytes. Streamed responses (SSE, session history pages) are compressed as they are
+    written and flushed after every chunk, so events are not held back by compression.
+    Other content types, such as uploaded files, are passed through. The ETag of an
+    encoded response is marked weak, as its bytes differ from the identity encoding.
+    """
+
+    COMPRESSIBLE_TYPES = ("application/json", "text/event-stream", "text/plain")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        algorithms: Sequence[str] = ("zstd", "gzip"),
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped application.
+            algorithms: Content encodings offered, in order of preference. zstd is skipped
+                if the zstandard package is not installed.
+            minimum_size: Smallest complete response body, in bytes, that is compressed.
+            gzip_level: gzip compression level.
+            zstd_level: zstd compression level.
+        """
+        self.app = app
+        if "zstd" in algorithms and not _zstd_available():
+            logger.warning(
+                "zstd response compression requires the zstandard package "
+                "(pip install 'a2a-template-langgraph[zstd]'); offering it is skipped"
+            )
+        self.algorithms: List[str] = [
+            a for a in algorithms if a == "gzip" or (a == "zstd" and _zstd_available())
+        ]
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Return the preferred encoding the client accepts, or None.
+
+        A coding the client names explicitly takes precedence over "*" (RFC 9110
+        section 12.5.3), so "*, gzip;q=0" accepts any coding but gzip.
+        """
+        weights: Dict[str, float] = {}
+        for item in accept_encoding.lower().split(","):
+            coding, _, params = item.strip().partition(";")
+            params = params.strip()
+            try:
+                q = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                q = 1.0
+            weights[coding.strip()] = q
+        for algorithm in self.algorithms:
+            if weights.get(algorithm, weights.get("*", 0.0)) > 0:
+                return algorithm
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.algorithms:
+            await self.app(scope, receive, send)
+            return
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(self, encoding, send).send)
+
+
+class _CompressingSender:
+    """Rewrites the messages of one response, deciding on its first body chunk."""
+
+    def __init__(self, middleware: ResponseCompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.level = middleware.levels[encoding]
+        self._send = send
+        self._start: Optional[Message] = None
+        # None until decided; then "identity", "whole" or "stream"
+        self._mode: Optional[str] = None
+        self._compressor: Optional[_StreamCompressor] = None
+
+    def _compressible(self) -> bool:
+        headers = Headers(raw=self._start["headers"])
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        return (
+            self._start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type in self.middleware.COMPRESSIBLE_TYPES
+        )
+
+    def _set_encoding_headers(self, length: Optional[int]):
+        headers = MutableHeaders(scope=self._start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+
+    def _record(self, raw: int, encoded: int):
+        metrics.inc("a2a_http_compressed_bytes_in_total", raw, help="Response bytes before compression", encoding=self.encoding)
+        metrics.inc("a2a_http_compressed_bytes_out_total", encoded, help="Response bytes sent after compression", encoding=self.encoding)
+
+    def _compress_whole(self, body: bytes) -> bytes:
+        if self.encoding == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor(level=self.level).compress(body)
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._mode == "identity":
+            if self._start is not None and self._mode is None:
+                self._mode = "identity"
+                await self._send(self._start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._mode is None:
+            if not self._compressible() or (not more_body and len(body) < self.middleware.minimum_size):
+                self._mode = "identity"
+                await self._send(self._start)
+                await self._send(message)
+                return
+            if not more_body:
+                self._mode = "whole"
+                compressed = self._compress_whole(body)
+                self._set_encoding_headers(len(compressed))
+                self._record(len(body), len(compressed))
+                metrics.inc("a2a_http_compressed_responses_total", help="Responses sent compressed", encoding=self.encoding)
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            self._mode = "stream"
+            self._compressor = _StreamCompressor(self.encoding, self.level)
+            self._set_encoding_headers(None)
+            metrics.inc("a2a_http_compressed_responses_total", help="Responses sent compressed", encoding=self.encoding)
+            await self._send(self._start)
+
+        compressed = self._compressor.compress(body) if body else b""
+        if not more_body:
+            compressed += self._compressor.finish()
+        self._record(len(body), len(compressed))
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
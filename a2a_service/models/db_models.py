@@ -1,21 +1,48 @@
-from sqlalchemy import Column, String, Integer, DateTime, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Boolean, ForeignKey, Index, LargeBinary, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from a2a_service.database import Base
 
+# JSONB on Postgres, plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Tasks whose run has been started and not yet finished (IN_FLIGHT_STATES)
+IN_FLIGHT = text("state IN ('submitted', 'working')")
+
 class TaskModel(Base):
     __tablename__ = "tasks"
-    id = Column(String, primary_key=True, index=True)
-    session_id = Column(String, index=True, nullable=False)
+    id = Column(String, primary_key=True)
+    session_id = Column(String, nullable=False)
     state = Column(String, nullable=False)
-    message = Column(JSON, nullable=True)
+    message = Column(JSONType, nullable=True)
+    input_message = Column(JSONType, nullable=True)
+    # Large payloads compressed by the storage codec, stored instead of the JSON columns
+    message_blob = Column(LargeBinary, nullable=True)
+    input_message_blob = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Process running the task and until when, renewed while it runs; expired leases of
+    # in-flight tasks mark runs orphaned by a crash
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Skill the task was sent for, to resume an orphaned run with the same agent
+    skill_id = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_tasks_session_id_created_at_id", "session_id", "created_at", "id"),
+        Index("ix_tasks_in_flight_lease_expires_at", "lease_expires_at", postgresql_where=IN_FLIGHT, sqlite_where=IN_FLIGHT),
+    )
 
 class ArtifactModel(Base):
     __tablename__ = "artifacts"
-    id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(String, ForeignKey("tasks.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     index = Column(Integer, nullable=False)
     append = Column(Boolean, default=False, nullable=False)
-    parts = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) 
\ No newline at end of file
+    parts = Column(JSONType, nullable=True)
+    parts_blob = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_artifacts_task_id_id", "task_id", "id"),
+    )
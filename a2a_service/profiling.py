@@ -0,0 +1,259 @@
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames of threads that are waiting rather than running: the event loop's
+# selector, lock and condition waits, and idle executor workers
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a CPU profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+def _format_frame(frame) -> str:
+    code = frame.f_code
+    return f'  File "{code.co_filename}", line {frame.f_lineno}, in {getattr(code, "co_qualname", code.co_name)}'
+
+
+def _await_chain(task: asyncio.Task) -> List[str]:
+    """Return the frames a task's coroutine is suspended in, outermost first, and what it awaits."""
+    lines = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is not None:
+            lines.append(_format_frame(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    waiter = getattr(task, "_fut_waiter", None)
+    if waiter is not None:
+        lines.append(f"  awaiting {repr(waiter)[:300]}")
+    return lines
+
+
+class Profiler:
+    """Diagnostics for a live process: CPU profiles, task and thread stacks, memory snapshots.
+
+    CPU profiles sample the stacks of all threads at a fixed interval, so the event loop,
+    executor threads and model calls are covered without instrumenting the code, and
+    the overhead is one stack walk per thread per sample. Profiles are written in the
+    collapsed-stack format read by flamegraph.pl and speedscope.
+
+    Memory snapshots use tracemalloc, which is only enabled on request since it slows
+    allocations down while tracing.
+    """
+
+    # Upper bound on a CPU profile's duration, so a forgotten request cannot run for long
+    MAX_PROFILE_SECONDS = 120.0
+
+    def __init__(self, task_manager: Any = None):
+        """Initialize the profiler.
+
+        Args:
+            task_manager: Task manager whose in-memory structures are sized in memory reports.
+        """
+        self.task_manager = task_manager
+        self._profile_lock = threading.Lock()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def cpu_profile(self, seconds: float = 10.0, interval: float = 0.01, idle: bool = False) -> str:
+        """Sample the stacks of all threads for a while and return them in collapsed-stack format.
+
+        Blocks for the duration; call it from a worker thread.
+
+        Args:
+            seconds: How long to sample, up to MAX_PROFILE_SECONDS.
+            interval: Seconds between samples.
+            idle: Also count samples of threads waiting on I/O, locks or work.
+
+        Returns:
+            One line per distinct stack, "thread;outer frame;...;inner frame count".
+
+        Raises:
+            ProfilerBusyError: If another CPU profile is running.
+        """
+        if not self._profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A CPU profile is already running")
+        try:
+            seconds = min(max(seconds, interval), self.MAX_PROFILE_SECONDS)
+            me = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == me or (not idle and _is_idle(frame)):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+            logger.info(f"CPU profile: {samples} samples over {seconds}s, {len(stacks)} distinct stacks")
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        finally:
+            self._profile_lock.release()
+
+    def task_stacks(self) -> str:
+        """Return the stacks of all asyncio tasks and threads as text.
+
+        Call it on the event loop. Each task is listed with the chain of coroutines it is
+        suspended in and what it awaits, so stuck runs show where they are stuck. A count
+        of tasks by coroutine comes first.
+        """
+        tasks = sorted(asyncio.all_tasks(), key=lambda t: t.get_coro().__qualname__ if t.get_coro() else "")
+        current = asyncio.current_task()
+        out = io.StringIO()
+        by_coroutine = Counter(getattr(t.get_coro(), "__qualname__", "?") for t in tasks)
+        out.write(f"{len(tasks)} asyncio tasks\n")
+        for name, count in by_coroutine.most_common():
+            out.write(f"{count:>6}  {name}\n")
+
+        for task in tasks:
+            coro = task.get_coro()
+            out.write(f"\nTask {task.get_name()}: {getattr(coro, '__qualname__', coro)}")
+            if task is current:
+                out.write(" (this request)\n")
+                continue
+            out.write("\n")
+            out.write("\n".join(_await_chain(task)) + "\n")
+
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        out.write(f"\n{len(frames)} threads\n")
+        for ident, frame in frames.items():
+            out.write(f"\nThread {names.get(ident, ident)}\n")
+            stack = []
+            while frame is not None:
+                stack.append(_format_frame(frame))
+                frame = frame.f_back
+            out.write("\n".join(reversed(stack)) + "\n")
+        return out.getvalue()
+
+    def start_tracing(self, frames: int = 10):
+        """Start tracing memory allocations, recording up to `frames` frames per allocation."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._last_snapshot = None
+            logger.info(f"Started tracing memory allocations ({frames} frames)")
+
+    def stop_tracing(self):
+        """Stop tracing memory allocations and drop the traces."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._last_snapshot = None
+            logger.info("Stopped tracing memory allocations")
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        """Take a snapshot of traced allocations, without tracemalloc's own.
+
+        Raises:
+            RuntimeError: If memory allocations are not being traced.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Memory allocations are not being traced; start tracing first")
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def structure_sizes(self) -> Dict[str, Any]:
+        """Return the sizes of the task manager's and checkpointer's in-memory structures."""
+        sizes: Dict[str, Any] = {}
+        tm = self.task_manager
+        for name in ("tasks", "active_runs", "streaming_runs", "artifact_chunks"):
+            if hasattr(tm, name):
+                sizes[name] = len(getattr(tm, name))
+        if hasattr(tm, "sse_queues"):
+            # Copies, as this may run outside the event loop that changes them
+            queues = [q for subscribers in list(tm.sse_queues.values()) for q in list(subscribers)]
+            sizes["sse_queues"] = {
+                "tasks": len(tm.sse_queues),
+                "subscribers": len(queues),
+                "queued_events": sum(q.qsize() for q in queues),
+            }
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        from a2a_service import agent
+
+        checkpointer = agent._memory
+        if isinstance(checkpointer, InMemorySaver):
+            # Copies, as runs in worker threads add checkpoints meanwhile
+            storage = dict(checkpointer.storage)
+            sizes["checkpointer"] = {
+                "threads": len(storage),
+                "checkpoints": sum(len(checkpoints) for namespaces in storage.values() for checkpoints in list(namespaces.values())),
+                "writes": len(checkpointer.writes),
+                "blobs": len(checkpointer.blobs),
+            }
+        elif checkpointer is not None:
+            # Persistent checkpoints are not held in memory
+            sizes["checkpointer"] = "n/a"
+        return sizes
+
+    def memory_report(self, top: int = 30, key_type: str = "lineno") -> str:
+        """Take a snapshot and report the top allocation sites, and their growth since the last report.
+
+        Args:
+            top: Number of allocation sites listed.
+            key_type: Grouping of allocations: "lineno", "filename" or "traceback".
+        """
+        snapshot = self.snapshot()
+        out = io.StringIO()
+        current, peak = tracemalloc.get_traced_memory()
+        out.write(f"Traced memory: {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)\n")
+        out.write("\nIn-memory structures:\n")
+        for name, size in self.structure_sizes().items():
+            out.write(f"  {name}: {size}\n")
+
+        out.write(f"\nTop {top} allocation sites:\n")
+        for stat in snapshot.statistics(key_type)[:top]:
+            out.write(self._format_stat(stat))
+
+        if self._last_snapshot is not None:
+            out.write(f"\nTop {top} changes since the previous report:\n")
+            for stat in snapshot.compare_to(self._last_snapshot, key_type)[:top]:
+                out.write(self._format_stat(stat))
+        else:
+            out.write("\nNo previous report to compare with; the next report will show growth since this one.\n")
+        self._last_snapshot = snapshot
+        return out.getvalue()
+
+    def dump_snapshot(self, path: str):
+        """Write a snapshot of traced allocations to a file, for tracemalloc.Snapshot.load."""
+        self.snapshot().dump(path)
+
+    @staticmethod
+    def _format_stat(stat: Any) -> str:
+        line = f"  {stat}\n"
+        if len(stat.traceback) > 1:
+            line += "".join(f"    {frame}\n" for frame in stat.traceback.format())
+        return line
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Optional, Tuple
+
+from a2a_service.metrics import metrics
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of rejecting requests.
+
+    A reservation always succeeds: it takes its amount from the bucket, which may go
+    into debt, and returns how long the caller has to wait until the bucket has
+    refilled past that debt. Callers are therefore served in arrival order, and a
+    burst is spread out at the refill rate rather than sent all at once.
+    """
+
+    def __init__(self, capacity: float, per_minute: float):
+        """Initialize a full bucket.
+
+        Args:
+            capacity: Maximum amount the bucket holds, i.e. the largest burst sent without waiting.
+            per_minute: Refill rate per minute.
+        """
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self._level = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take an amount from the bucket and return the seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+            return -self._level / self.rate if self._level < 0 else 0.0
+
+    def try_take(self, amount: float) -> float:
+        """Take an amount if the bucket holds it; otherwise return the seconds until it will."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._level >= amount:
+                self._level -= amount
+                return 0.0
+            return (amount - self._level) / self.rate
+
+    def adjust(self, amount: float):
+        """Take a further amount (or return it, if negative) without waiting, e.g. to reconcile an estimate."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level - amount)
+
+
+class RateLimiter:
+    """Paces model requests to a provider's requests-per-minute and tokens-per-minute quotas.
+
+    Requests over quota are queued (delayed) on the client, so a burst of tasks does not
+    turn into a storm of 429 responses and retries.
+    """
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """Initialize the limiter.
+
+        Args:
+            name: Name used in metrics, usually the model spec.
+            rpm: Requests per minute allowed, or None for no request limit.
+            tpm: Tokens (prompt and completion) per minute allowed, or None for no token limit.
+        """
+        self.name = name
+        self.requests = TokenBucket(rpm, rpm) if rpm else None
+        self.tokens = TokenBucket(tpm, tpm) if tpm else None
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            metrics.inc("a2a_model_rate_limited_total", help="Model requests delayed by the client-side rate limiter", backend=self.name)
+            metrics.inc("a2a_model_rate_limit_wait_seconds_total", wait, help="Time model requests spent queued by the rate limiter", backend=self.name)
+        return wait
+
+    def acquire(self, tokens: int):
+        """Block until a request estimated at the given number of tokens may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int):
+        """Wait until a request estimated at the given number of tokens may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: int):
+        """Correct the token bucket once a response reports the tokens actually used."""
+        if self.tokens and actual:
+            self.tokens.adjust(actual - estimated)
+
+
+class CallerQuotas:
+    """Per-caller quotas on task requests and LLM tokens, enforced when a request arrives.
+
+    A request is rejected, before any agent or database work, if the caller has used up
+    its requests per minute or is in debt on its LLM tokens per minute. Token usage is
+    only known once the model has answered, so it is charged afterwards (see
+    charge_tokens) and throttles the caller's following requests.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, max_callers: int = 10000):
+        """Initialize the quotas.
+
+        Args:
+            rpm: Task requests per minute allowed per caller, or None for no limit.
+            tpm: LLM tokens per minute allowed per caller, or None for no limit.
+            max_callers: Most callers tracked at once; the least recently seen are forgotten.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_callers = max_callers
+        self._buckets: "OrderedDict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _caller_buckets(self, caller: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        with self._lock:
+            buckets = self._buckets.get(caller)
+            if buckets is None:
+                buckets = self._buckets[caller] = (
+                    TokenBucket(self.rpm, self.rpm) if self.rpm else None,
+                    TokenBucket(self.tpm, self.tpm) if self.tpm else None,
+                )
+                while len(self._buckets) > self.max_callers:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(caller)
+            return buckets
+
+    def admit(self, caller: str) -> float:
+        """Count a request against the caller's quotas.
+
+        Returns:
+            0 if the request is admitted, else the seconds after which the caller may retry.
+        """
+        requests, tokens = self._caller_buckets(caller)
+        if tokens:
+            wait = tokens.try_take(0)
+            if wait > 0:
+                metrics.inc("a2a_quota_rejections_total", help="Requests rejected by per-caller quotas", quota="tokens")
+                return wait
+        if requests:
+            wait = requests.try_take(1)
+            if wait > 0:
+                metrics.inc("a2a_quota_rejections_total", help="Requests rejected by per-caller quotas", quota="requests")
+                return wait
+        return 0.0
+
+    def charge_tokens(self, caller: str, amount: int):
+        """Charge LLM tokens used on the caller's behalf against its token quota."""
+        requests, tokens = self._caller_buckets(caller)
+        if tokens:
+            tokens.adjust(amount)
+
+
+# Charges LLM token usage to the caller of the request being handled, if it has quotas
+current_token_charge: ContextVar[Optional[Callable[[int], None]]] = ContextVar("current_token_charge", default=None)
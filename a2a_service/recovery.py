@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRecovery:
+    """Background service that heartbeats this process's task leases and recovers orphaned tasks.
+
+    Every run holds a lease on its task, renewed here a few times per lease period. A
+    process that crashes stops renewing, and once its leases expire, the recovery pass
+    of any process sharing the task store takes its in-flight tasks over and finishes
+    them from the agent's last checkpoint (see AgentTaskManager.resume_task). The pass
+    runs at startup, which recovers a restarted process's own tasks, and periodically.
+    """
+
+    def __init__(self, task_manager, interval: Optional[float] = None, batch_size: int = 100):
+        """Initialize the service.
+
+        Args:
+            task_manager: A task manager with leases, e.g. DatabaseTaskManager. With one
+                without leases (lease_ttl None), such as the in-memory AgentTaskManager,
+                there is nothing to recover and the service does not run.
+            interval: Seconds between recovery passes. Defaults to the lease TTL.
+            batch_size: Most orphaned tasks taken over per pass.
+        """
+        self.task_manager = task_manager
+        lease_ttl = getattr(task_manager, "lease_ttl", None)
+        self.enabled = lease_ttl is not None
+        self.heartbeat_interval = lease_ttl / 3 if self.enabled else None
+        self.interval = interval or lease_ttl
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        # Recovered runs, referenced so they are not garbage collected while running
+        self._runs: Set[asyncio.Task] = set()
+
+    def start(self):
+        """Start heartbeats and recovery passes on the running event loop."""
+        if not self.enabled:
+            logger.info(f"{type(self.task_manager).__name__} keeps no task leases; task recovery is off")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop heartbeats and recovery passes. Recovered runs in progress continue."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_pass = loop.time()
+        while True:
+            try:
+                await self.task_manager.renew_leases(list(self.task_manager.active_runs))
+            except Exception as e:
+                logger.error(f"Renewing task leases failed: {e}")
+            if loop.time() >= next_pass:
+                try:
+                    await self.recover_once()
+                except Exception as e:
+                    logger.error(f"Task recovery pass failed: {e}")
+                next_pass = loop.time() + self.interval
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def recover_once(self) -> int:
+        """Take over orphaned tasks and start finishing them. Returns the number taken over."""
+        orphans = await self.task_manager.claim_orphaned_tasks(self.batch_size)
+        for orphan in orphans:
+            logger.warning(f"Recovering task {orphan['id']}, orphaned by {orphan.get('lease_owner') or 'an unknown process'}")
+            run = asyncio.create_task(self.task_manager.resume_task(orphan))
+            self._runs.add(run)
+            run.add_done_callback(self._runs.discard)
+        return len(orphans)
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+from typing import Any, AsyncIterable, Dict, List, Optional
+
+from a2a_service.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """Serves several skills from one process, each with its own agent configuration.
+
+    Each skill maps to a set of Agent settings (model, tools, system instruction,
+    response mode, ...) layered over the defaults. Agents are created on first use and
+    cached by configuration, so skills with identical settings share one compiled graph
+    and no request ever compiles a graph that was compiled before. All agents share the
+    checkpointer, with a thread per skill and session, and agents with the same model
+    settings share the chat model clients.
+
+    The registry has the same interface as Agent, so a task manager can use either.
+    """
+
+    SUPPORTED_CONTENT_TYPES = Agent.SUPPORTED_CONTENT_TYPES
+
+    def __init__(self, defaults: Dict[str, Any], skills: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Initialize the registry.
+
+        Args:
+            defaults: Agent keyword arguments used for tasks without a configured skill.
+            skills: Agent keyword arguments per skill id, overriding the defaults.
+        """
+        self.defaults = defaults
+        self.skills = skills or {}
+        self._agents: Dict[str, Agent] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config_key(config: Dict[str, Any]) -> str:
+        """Return a cache key for an agent configuration, identifying tools by name."""
+        normalized = dict(config)
+        if normalized.get("tools"):
+            normalized["tools"] = sorted(getattr(t, "name", getattr(t, "__name__", repr(t))) for t in normalized["tools"])
+        return json.dumps(normalized, sort_keys=True, default=repr)
+
+    def agent_for(self, skill_id: Optional[str] = None) -> Agent:
+        """Return the agent for a skill, or the default agent for unknown or missing skills."""
+        config = {**self.defaults, **self.skills.get(skill_id, {})}
+        key = self._config_key(config)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                agent = self._agents[key] = Agent(**config)
+                logger.info(f"Registered agent for skill {skill_id or '(default)'}")
+            return agent
+
+    def agents(self) -> List[Agent]:
+        """Return the agents of the default configuration and every configured skill."""
+        agents = [self.agent_for(None)]
+        for skill_id in self.skills:
+            agent = self.agent_for(skill_id)
+            if agent not in agents:
+                agents.append(agent)
+        return agents
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the graphs of all configured agents have been compiled."""
+        return all(agent.is_ready for agent in self.agents())
+
+    def warm_up(self) -> None:
+        """Compile the graphs of all configured agents ahead of the first request."""
+        for agent in self.agents():
+            agent.warm_up()
+
+    def invoke(
+        self, query: str, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Invoke the agent for the skill. See Agent.invoke."""
+        return self.agent_for(skill_id).invoke(query, session_id, skill_id, task_id)
+
+    def resume(self, task_id: str, session_id: str, skill_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Resume an interrupted run with the agent for the skill. See Agent.resume."""
+        return self.agent_for(skill_id).resume(task_id, session_id, skill_id)
+
+    async def stream(
+        self, query: str, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None
+    ) -> AsyncIterable[Dict[str, Any]]:
+        """Stream from the agent for the skill. See Agent.stream."""
+        async for item in self.agent_for(skill_id).stream(query, session_id, skill_id, task_id):
+            yield item
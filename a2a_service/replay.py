@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import BaseTool, ToolException
+
+from a2a_service.traffic import REPLAY_SESSION_KEY, current_task_params, read_traffic
+
+
+def _args_key(args: Any) -> str:
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+class ReplayError(Exception):
+    """Raised when a replayed run makes a model or tool call the recording has no output for."""
+
+
+class TrafficReplay:
+    """Serves the model and tool outputs of a traffic recording in place of the real ones.
+
+    Each replayed task names its recorded session in its metadata. Its model calls
+    get the recorded model outputs of that session in order, and its tool calls the
+    recorded output of the same tool with the same arguments, each after the recorded
+    latency (scaled by ``latency_scale``). Replayed tasks get new session ids, so the
+    same recording can be replayed any number of times against one server.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        """Load a recording.
+
+        Args:
+            path: The traffic recording.
+            latency_scale: Factor applied to recorded model and tool latencies; 0 answers at once.
+        """
+        self.latency_scale = latency_scale
+        self._messages: Dict[str, List[Tuple[AIMessage, float]]] = defaultdict(list)
+        self._tools: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for entry in read_traffic(path):
+            if entry["kind"] == "llm":
+                message = messages_from_dict([entry["message"]])[0]
+                self._messages[entry["session"]].append((message, entry["latency"]))
+            elif entry["kind"] == "tool":
+                self._tools[(entry["session"], entry["name"], _args_key(entry["args"]))].append(entry)
+        # Position in the recording per replayed session (and tool call)
+        self._cursors: Dict[Any, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sessions() -> Tuple[str, str]:
+        """Return the recorded and the live session of the current task."""
+        params = current_task_params.get()
+        if params is None:
+            raise ReplayError("Model or tool call outside of a task")
+        recorded = (params.metadata or {}).get(REPLAY_SESSION_KEY) or params.sessionId
+        return recorded, params.sessionId
+
+    def _next(self, entries: List[Any], cursor: Any, what: str) -> Any:
+        with self._lock:
+            index = self._cursors[cursor]
+            if index >= len(entries):
+                raise ReplayError(f"No recorded output left for {what}")
+            self._cursors[cursor] = index + 1
+        return entries[index]
+
+    def next_message(self) -> Tuple[AIMessage, float]:
+        """Return the next recorded model output of the current task's session, with its delay."""
+        recorded, live = self._sessions()
+        message, latency = self._next(self._messages.get(recorded, []), ("llm", live), f"model call in session {recorded}")
+        return message.model_copy(deep=True), latency * self.latency_scale
+
+    def tool_output(self, name: str, args: Any) -> Tuple[Dict[str, Any], float]:
+        """Return the recorded result of a tool call in the current task's session, with its delay."""
+        recorded, live = self._sessions()
+        key = _args_key(args)
+        entry = self._next(self._tools.get((recorded, name, key), []), ("tool", live, name, key), f"tool {name} in session {recorded}")
+        return entry, entry["latency"] * self.latency_scale
+
+    def chat_model(self, **kwargs: Any) -> "ReplayChatModel":
+        """Return a chat model answering with the recorded model outputs."""
+        return ReplayChatModel(replay=self, **kwargs)
+
+    def tools(self, tools: Sequence[Any]) -> Dict[str, "ReplayTool"]:
+        """Return stand-ins for tools that answer with their recorded outputs, by tool name."""
+        return {
+            tool.name: ReplayTool(name=tool.name, description=tool.description, args_schema=tool.args_schema, replay=self)
+            for tool in tools
+        }
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that answers with the model outputs of a traffic recording."""
+
+    replay: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "traffic-replay"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ReplayChatModel":
+        # The recorded outputs already contain the tool calls
+        return self
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        return self | RunnableLambda(lambda message: _parse_structured(schema, message))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message, delay = self.replay.next_message()
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message, delay = self.replay.next_message()
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _parse_structured(schema: Any, message: AIMessage) -> Any:
+    """Parse a recorded structured-output call, made with tool calling or JSON output."""
+    if message.tool_calls:
+        data = message.tool_calls[0]["args"]
+    elif isinstance(message.additional_kwargs.get("parsed"), dict):
+        data = message.additional_kwargs["parsed"]
+    else:
+        data = json.loads(message.content)
+    return schema.model_validate(data) if hasattr(schema, "model_validate") else data
+
+
+class ReplayTool(BaseTool):
+    """Stand-in for a tool that answers with the outputs of a traffic recording.
+
+    Outputs are looked up by the arguments as the model sent them, before the tool's
+    schema fills in defaults. Called with a tool call it returns a ToolMessage, with
+    plain arguments the recorded output, as other tools do.
+    """
+
+    replay: Any
+
+    @staticmethod
+    def _output(entry: Dict[str, Any]) -> Any:
+        if "error" in entry:
+            raise ToolException(entry["error"])
+        return entry["output"]
+
+    def _result(self, input: Any, entry: Dict[str, Any]) -> Any:
+        output = self._output(entry)
+        if _is_tool_call(input):
+            return ToolMessage(content=output, name=self.name, tool_call_id=input["id"])
+        return output
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        entry, delay = self.replay.tool_output(self.name, kwargs)
+        time.sleep(delay)
+        return self._output(entry)
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        entry, delay = self.replay.tool_output(self.name, kwargs)
+        await asyncio.sleep(delay)
+        return self._output(entry)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        entry, delay = self.replay.tool_output(self.name, _tool_args(input))
+        time.sleep(delay)
+        return self._result(input, entry)
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        entry, delay = self.replay.tool_output(self.name, _tool_args(input))
+        await asyncio.sleep(delay)
+        return self._result(input, entry)
+
+
+def _is_tool_call(input: Any) -> bool:
+    return isinstance(input, dict) and input.get("type") == "tool_call" and "id" in input
+
+
+def _tool_args(input: Any) -> Any:
+    return input["args"] if _is_tool_call(input) else input
@@ -0,0 +1,352 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import click
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from a2a_service.compression import load_payload
+from a2a_service.database import SessionLocal, engine
+from a2a_service.models.db_models import ArtifactModel, TaskModel
+from a2a_service.types import TaskState
+
+logger = logging.getLogger(__name__)
+
+# States a task never leaves on its own, and so can safely expire
+TERMINAL_STATES = (TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED)
+
+
+class RetentionPolicy:
+    """How long finished tasks are kept and how they are removed."""
+
+    def __init__(
+        self,
+        ttls: Dict[TaskState, timedelta],
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        interval: float = 3600,
+        archive_dir: Optional[str] = None,
+        partition_artifacts: bool = False,
+        partitions_ahead: int = 2,
+    ):
+        """Initialize the policy.
+
+        Args:
+            ttls: Time to keep a task after its last update, per state. States without a TTL are kept forever.
+            batch_size: Number of tasks deleted per transaction.
+            batch_pause: Seconds to sleep between batches so other writers aren't starved.
+            interval: Seconds between retention runs.
+            archive_dir: If set, expired rows are exported there as gzipped JSONL before deletion.
+            partition_artifacts: Whether to maintain monthly partitions of the artifacts table.
+            partitions_ahead: Number of future monthly partitions to keep created.
+        """
+        self.ttls = ttls
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self.partition_artifacts = partition_artifacts
+        self.partitions_ahead = partitions_ahead
+
+    @classmethod
+    def from_env(cls) -> Optional["RetentionPolicy"]:
+        """Build a policy from RETENTION_* environment variables, or None if no TTL is configured.
+
+        TTLs are given in days per state, e.g. ``RETENTION_TTL_COMPLETED=30``.
+        """
+        ttls = {}
+        for state in TERMINAL_STATES + (TaskState.INPUT_REQUIRED,):
+            value = os.getenv(f"RETENTION_TTL_{state.name}")
+            if value:
+                ttls[state] = timedelta(days=float(value))
+        if not ttls:
+            return None
+        return cls(
+            ttls=ttls,
+            batch_size=int(os.getenv("RETENTION_BATCH_SIZE", 500)),
+            interval=float(os.getenv("RETENTION_INTERVAL", 3600)),
+            archive_dir=os.getenv("RETENTION_ARCHIVE_DIR") or None,
+            partition_artifacts=os.getenv("RETENTION_PARTITION_ARTIFACTS", "false").lower() == "true",
+        )
+
+
+class RetentionWorker:
+    """Background service that expires old tasks in small batches."""
+
+    def __init__(self, policy: RetentionPolicy):
+        self.policy = policy
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the periodic retention loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the retention loop."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}")
+            await asyncio.sleep(self.policy.interval)
+
+    def run_once(self) -> int:
+        """Expire all tasks past their TTL. Returns the number of deleted tasks."""
+        now = datetime.now(timezone.utc)
+        archive_path = None
+        if self.policy.archive_dir:
+            os.makedirs(self.policy.archive_dir, exist_ok=True)
+            archive_path = os.path.join(
+                self.policy.archive_dir, f"tasks-{now.strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+            )
+
+        deleted = 0
+        for state, ttl in self.policy.ttls.items():
+            cutoff = now - ttl
+            while True:
+                count = self._delete_batch(state, cutoff, archive_path)
+                deleted += count
+                if count < self.policy.batch_size:
+                    break
+                time.sleep(self.policy.batch_pause)
+
+        if self.policy.partition_artifacts:
+            ensure_artifact_partitions(self.policy.partitions_ahead)
+            max_ttl = max(self.policy.ttls.values())
+            drop_empty_artifact_partitions(now - max_ttl)
+
+        if deleted:
+            logger.info(f"Retention removed {deleted} expired tasks")
+        return deleted
+
+    def _delete_batch(self, state: TaskState, cutoff: datetime, archive_path: Optional[str]) -> int:
+        """Delete one batch of expired tasks in a short transaction, archiving them first."""
+        db: Session = SessionLocal()
+        try:
+            # SKIP LOCKED so we never wait on rows a live request is updating
+            tasks = (
+                db.query(TaskModel)
+                  .filter(TaskModel.state == state.value, TaskModel.updated_at < cutoff)
+                  .order_by(TaskModel.updated_at)
+                  .limit(self.policy.batch_size)
+                  .with_for_update(skip_locked=True)
+                  .all()
+            )
+            if not tasks:
+                db.rollback()
+                return 0
+
+            task_ids = [task.id for task in tasks]
+            if archive_path:
+                artifacts = (
+                    db.query(ArtifactModel)
+                      .filter(ArtifactModel.task_id.in_(task_ids))
+                      .order_by(ArtifactModel.task_id, ArtifactModel.id)
+                      .all()
+                )
+                _archive(archive_path, tasks, artifacts)
+
+            # Artifacts are removed by the ON DELETE CASCADE foreign key
+            db.query(TaskModel).filter(TaskModel.id.in_(task_ids)).delete(synchronize_session=False)
+            db.commit()
+            return len(task_ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def _archive(path: str, tasks: List[TaskModel], artifacts: List[ArtifactModel]):
+    """Append tasks and their artifacts to a gzipped JSONL file and flush it to disk."""
+    artifacts_by_task: Dict[str, List[dict]] = {}
+    for art in artifacts:
+        artifacts_by_task.setdefault(art.task_id, []).append({
+            "id": art.id,
+            "index": art.index,
+            "append": art.append,
+            "parts": load_payload(art.parts, art.parts_blob),
+            "created_at": art.created_at.isoformat(),
+        })
+
+    # Each append adds a new gzip member; concatenated members are a valid gzip file
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+            for task in tasks:
+                record = {
+                    "id": task.id,
+                    "session_id": task.session_id,
+                    "state": task.state,
+                    "message": load_payload(task.message, task.message_blob),
+                    "created_at": task.created_at.isoformat(),
+                    "updated_at": task.updated_at.isoformat(),
+                    "artifacts": artifacts_by_task.get(task.id, []),
+                }
+                archive.write(json.dumps(record, default=str).encode("utf-8") + b"\n")
+        # Make sure the archive is durable before the rows are deleted
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+## Artifact partitioning (Postgres only)
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(moment: datetime) -> datetime:
+    return (moment.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"artifacts_p{month.strftime('%Y%m')}"
+
+
+def _is_partitioned(conn) -> bool:
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'artifacts'"
+    )).scalar())
+
+
+def _create_partitions(conn, start: datetime, end: datetime):
+    """Create monthly partitions covering [start, end)."""
+    month = _month_start(start)
+    while month < end:
+        upper = _next_month(month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF artifacts "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
+
+
+def ensure_artifact_partitions(months_ahead: int = 2):
+    """Create partitions for the current month and the next few, if artifacts is partitioned."""
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            logger.warning("Artifact partitioning is enabled but the artifacts table is not partitioned")
+            return
+        now = _month_start(datetime.now(timezone.utc))
+        end = now
+        for _ in range(months_ahead + 1):
+            end = _next_month(end)
+        _create_partitions(conn, now, end)
+
+
+def drop_empty_artifact_partitions(older_than: datetime):
+    """Drop monthly partitions that end before ``older_than`` and hold no rows.
+
+    Batched task deletion empties old partitions through the cascading foreign key;
+    dropping them afterwards returns their space and index pages at once.
+    """
+    with engine.begin() as conn:
+        if not _is_partitioned(conn):
+            return
+        partitions = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'artifacts' AND c.relname LIKE 'artifacts_p%'"
+        )).scalars().all()
+        for name in partitions:
+            upper = _next_month(datetime.strptime(name[len("artifacts_p"):], "%Y%m").replace(tzinfo=timezone.utc))
+            if upper > older_than:
+                continue
+            if conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).scalar():
+                continue
+            conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Dropped empty artifact partition {name}")
+
+
+def partition_artifacts_table(months_ahead: int = 2):
+    """Convert the artifacts table to a table range-partitioned by month on created_at.
+
+    This copies every artifact row and holds an exclusive lock while it does, so run
+    it during a maintenance window. The primary key becomes (id, created_at), as
+    Postgres requires the partition key to be part of it.
+    """
+    with engine.begin() as conn:
+        if _is_partitioned(conn):
+            logger.info("The artifacts table is already partitioned")
+            return
+
+        conn.execute(text("LOCK TABLE artifacts IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("ALTER TABLE artifacts RENAME TO artifacts_unpartitioned"))
+        conn.execute(text("ALTER TABLE artifacts_unpartitioned RENAME CONSTRAINT artifacts_pkey TO artifacts_unpartitioned_pkey"))
+        conn.execute(text("ALTER TABLE artifacts_unpartitioned RENAME CONSTRAINT artifacts_task_id_fkey TO artifacts_unpartitioned_task_id_fkey"))
+        conn.execute(text("ALTER INDEX ix_artifacts_task_id_id RENAME TO ix_artifacts_unpartitioned_task_id_id"))
+
+        conn.execute(text("""
+            CREATE TABLE artifacts (
+                id INTEGER NOT NULL DEFAULT nextval('artifacts_id_seq'),
+                task_id VARCHAR NOT NULL,
+                "index" INTEGER NOT NULL,
+                append BOOLEAN NOT NULL,
+                parts JSONB,
+                parts_blob BYTEA,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                CONSTRAINT artifacts_pkey PRIMARY KEY (id, created_at),
+                CONSTRAINT artifacts_task_id_fkey FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE
+            ) PARTITION BY RANGE (created_at)
+        """))
+        conn.execute(text("CREATE INDEX ix_artifacts_task_id_id ON artifacts (task_id, id)"))
+        conn.execute(text("CREATE TABLE artifacts_default PARTITION OF artifacts DEFAULT"))
+
+        now = datetime.now(timezone.utc)
+        oldest = conn.execute(text("SELECT min(created_at) FROM artifacts_unpartitioned")).scalar() or now
+        end = _month_start(now)
+        for _ in range(months_ahead + 1):
+            end = _next_month(end)
+        _create_partitions(conn, oldest, end)
+
+        conn.execute(text(
+            'INSERT INTO artifacts (id, task_id, "index", append, parts, parts_blob, created_at) '
+            'SELECT id, task_id, "index", append, parts, parts_blob, created_at FROM artifacts_unpartitioned'
+        ))
+        conn.execute(text("ALTER SEQUENCE artifacts_id_seq OWNED BY artifacts.id"))
+        conn.execute(text("DROP TABLE artifacts_unpartitioned"))
+    logger.info("Converted the artifacts table to monthly partitions")
+
+
+@click.group()
+def cli():
+    """Task retention maintenance commands."""
+
+
+@cli.command("run")
+def run_command():
+    """Run a single retention pass using RETENTION_* settings."""
+    policy = RetentionPolicy.from_env()
+    if policy is None:
+        raise click.ClickException("No RETENTION_TTL_<STATE> variables are set")
+    deleted = RetentionWorker(policy).run_once()
+    click.echo(f"Deleted {deleted} expired tasks")
+
+
+@cli.command("partition-artifacts")
+@click.option("--months-ahead", default=2, show_default=True, help="Future monthly partitions to create.")
+def partition_artifacts_command(months_ahead: int):
+    """Convert the artifacts table to monthly partitions (Postgres only)."""
+    partition_artifacts_table(months_ahead)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    cli()
@@ -0,0 +1,484 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.messages.ai import add_usage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableBinding
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.constants import TAG_NOSTREAM
+
+from a2a_service.metrics import metrics
+from a2a_service.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Backend calls run nested in the router's run. LangGraph streams the tokens of the
+# router's run only, so a hedged or abandoned backend never leaks partial output.
+_BACKEND_CONFIG = {"tags": [TAG_NOSTREAM]}
+
+# Threads for backend calls made from synchronous graph runs; hedged calls need more than one
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="model-router")
+
+# HTTP clients shared by all OpenAI models with the same pool size, so connections
+# (and their TLS sessions) are reused across backends and agents
+_http_clients: Dict[int, Tuple[Any, Any]] = {}
+_http_clients_lock = threading.Lock()
+
+
+def get_http_clients(max_connections: int = 100) -> Tuple[Any, Any]:
+    """Return the shared sync and async HTTP clients for a connection pool size."""
+    with _http_clients_lock:
+        if max_connections not in _http_clients:
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            )
+            _http_clients[max_connections] = (
+                httpx.Client(limits=limits),
+                httpx.AsyncClient(limits=limits),
+            )
+        return _http_clients[max_connections]
+
+
+def create_chat_model(
+    spec: str,
+    request_timeout: Optional[float] = None,
+    max_retries: int = 2,
+    max_connections: int = 100,
+    **kwargs,
+) -> BaseChatModel:
+    """Create a chat model from a "provider:model" spec, e.g. "anthropic:claude-3-7-sonnet-latest".
+
+    Specs without a provider prefix use OpenAI.
+
+    Args:
+        spec: The model spec.
+        request_timeout: HTTP timeout in seconds for a single model request.
+        max_retries: Retries made by the provider client on connection errors, 429s and 5xxs.
+        max_connections: Size of the shared connection pool (OpenAI only; the Anthropic
+            client keeps its own pool per model).
+    """
+    provider, _, model_name = spec.partition(":")
+    if not model_name:
+        provider, model_name = "openai", spec
+
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        http_client, http_async_client = get_http_clients(max_connections)
+        return ChatOpenAI(
+            model=model_name,
+            streaming=True,
+            stream_usage=True,
+            timeout=request_timeout,
+            max_retries=max_retries,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **kwargs,
+        )
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(
+            model=model_name,
+            streaming=True,
+            default_request_timeout=request_timeout,
+            max_retries=max_retries,
+            **kwargs,
+        )
+    raise ValueError(f"Unsupported model provider: {provider}")
+
+
+def is_anthropic_model(model: Any) -> bool:
+    """Whether a chat model, or a chat model with tools bound, is an Anthropic model."""
+    try:
+        from langchain_anthropic import ChatAnthropic
+    except ImportError:
+        return False
+    if isinstance(model, RunnableBinding):
+        model = model.bound
+    return isinstance(model, ChatAnthropic)
+
+
+def mark_prompt_cache(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Mark a leading system prompt with cache_control, which Anthropic requires to cache a prefix."""
+    if not messages or not isinstance(messages[0], SystemMessage) or not isinstance(messages[0].content, str):
+        return messages
+    content = [{"type": "text", "text": messages[0].content, "cache_control": {"type": "ephemeral"}}]
+    return [messages[0].model_copy(update={"content": content}), *messages[1:]]
+
+
+class ModelBackend:
+    """A chat model the router can send requests to, with the requests it prefers."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Runnable,
+        skills: Optional[Set[str]] = None,
+        max_input_chars: Optional[int] = None,
+        timeout: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache_prompt: bool = False,
+    ):
+        """Initialize the backend.
+
+        Args:
+            name: Name used in logs and metrics.
+            model: The chat model (or a chat model with tools bound).
+            skills: Skill ids this backend is preferred for. If None, it serves any skill.
+            max_input_chars: Longest prompt, in characters, this backend is preferred for.
+            timeout: Seconds to wait for this backend before falling back. Overrides the router's timeout.
+            rate_limiter: Paces requests to the backend's provider quotas.
+            cache_prompt: Mark the system prompt of each request for prompt caching, as
+                Anthropic models need.
+        """
+        self.name = name
+        self.model = model
+        self.skills = skills
+        self.max_input_chars = max_input_chars
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache_prompt = cache_prompt
+
+    def prefers(self, skill_id: Optional[str], input_chars: int) -> bool:
+        """Whether this backend is a preferred route for a request."""
+        if self.skills is not None and skill_id not in self.skills:
+            return False
+        if self.max_input_chars is not None and input_chars > self.max_input_chars:
+            return False
+        return True
+
+    def with_model(self, model: Runnable) -> "ModelBackend":
+        return ModelBackend(
+            self.name, model, self.skills, self.max_input_chars, self.timeout, self.rate_limiter, self.cache_prompt
+        )
+
+    def invoke(self, messages: List[BaseMessage], deadline: float, **kwargs: Any) -> AIMessage:
+        """Call the model once the rate limiter allows, with an HTTP timeout ending at the deadline (time.monotonic)."""
+        estimated = count_tokens_approximately(messages)
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimated)
+        message = self.model.invoke(self._request(messages), _BACKEND_CONFIG, **self._call_kwargs(deadline - time.monotonic(), kwargs))
+        self._record_usage(estimated, getattr(message, "usage_metadata", None))
+        return message
+
+    async def ainvoke(self, messages: List[BaseMessage], deadline: float, **kwargs: Any) -> AIMessage:
+        """Async version of invoke; the deadline is in event loop time."""
+        loop = asyncio.get_running_loop()
+        estimated = count_tokens_approximately(messages)
+        if self.rate_limiter:
+            await self.rate_limiter.aacquire(estimated)
+        message = await self.model.ainvoke(self._request(messages), _BACKEND_CONFIG, **self._call_kwargs(deadline - loop.time(), kwargs))
+        self._record_usage(estimated, getattr(message, "usage_metadata", None))
+        return message
+
+    def stream(self, messages: List[BaseMessage], deadline: float, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        """Streaming version of invoke."""
+        estimated = count_tokens_approximately(messages)
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimated)
+        usage = None
+        for chunk in self.model.stream(self._request(messages), _BACKEND_CONFIG, **self._call_kwargs(deadline - time.monotonic(), kwargs)):
+            if chunk.usage_metadata:
+                usage = add_usage(usage, chunk.usage_metadata)
+            yield chunk
+        self._record_usage(estimated, usage)
+
+    async def astream(self, messages: List[BaseMessage], deadline: float, **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        """Streaming version of ainvoke."""
+        loop = asyncio.get_running_loop()
+        estimated = count_tokens_approximately(messages)
+        if self.rate_limiter:
+            await self.rate_limiter.aacquire(estimated)
+        usage = None
+        async for chunk in self.model.astream(self._request(messages), _BACKEND_CONFIG, **self._call_kwargs(deadline - loop.time(), kwargs)):
+            if chunk.usage_metadata:
+                usage = add_usage(usage, chunk.usage_metadata)
+            yield chunk
+        self._record_usage(estimated, usage)
+
+    def _request(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        return mark_prompt_cache(messages) if self.cache_prompt else messages
+
+    @staticmethod
+    def _call_kwargs(remaining: float, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if remaining == math.inf:
+            return kwargs
+        if remaining <= 0:
+            raise TimeoutError("deadline exceeded while waiting for the rate limiter")
+        # Passed through to the provider SDK as the timeout of this request
+        return {**kwargs, "timeout": remaining}
+
+    def _record_usage(self, estimated: int, usage: Optional[Dict[str, Any]]):
+        if self.rate_limiter and usage:
+            self.rate_limiter.record_usage(estimated, usage.get("total_tokens", 0))
+
+
+class ModelRouterError(Exception):
+    """Raised when every backend failed or timed out."""
+
+
+class ModelRouter(BaseChatModel):
+    """Chat model that routes each call across several backends.
+
+    Backends are tried in order of preference: those whose skills and prompt-length
+    limits match the request come first (in configured order), the rest serve as
+    fallbacks. A backend that errors or exceeds its timeout is abandoned for the next.
+    With ``hedge_delay`` set, a second backend is also started once the first has been
+    running that long, and whichever answers first wins. In async calls the losing
+    request is cancelled. Synchronous calls run backends in worker threads, which
+    cannot be interrupted: a losing or timed-out request runs on until its HTTP
+    timeout and is billed, so hedging costs more there.
+
+    Streamed calls go to one backend at a time. A backend that fails or times out
+    before its first chunk is abandoned for the next; once chunks have been passed on,
+    an error ends the stream. Streams are not hedged.
+
+    The skill of a request is read from the ``skill_id`` key of the run metadata, and the
+    time budget of its task from the ``deadline`` key (a Unix timestamp): no backend is
+    waited on past it.
+    """
+
+    backends: List[Any]
+    timeout: Optional[float] = None
+    hedge_delay: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "model-router"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        """Bind tools to every backend in its own provider format."""
+        router = self.model_copy(update={
+            "backends": [b.with_model(b.model.bind_tools(tools, **kwargs)) for b in self.backends]
+        })
+        # The backends carry the real binding. Binding the OpenAI-format schemas here as
+        # well lets callers such as create_react_agent see that tools are already bound.
+        return router.bind(tools=[convert_to_openai_tool(t) for t in tools])
+
+    def _candidates(self, messages: List[BaseMessage], run_manager: Any) -> List[ModelBackend]:
+        skill_id = (getattr(run_manager, "metadata", None) or {}).get("skill_id")
+        input_chars = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+        preferred = [b for b in self.backends if b.prefers(skill_id, input_chars)]
+        return preferred + [b for b in self.backends if b not in preferred]
+
+    @staticmethod
+    def _run_deadline(run_manager: Any, now: float) -> float:
+        """Convert the task deadline in the run metadata to the clock `now` was read from."""
+        deadline = (getattr(run_manager, "metadata", None) or {}).get("deadline")
+        if deadline is None:
+            return math.inf
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise ModelRouterError("Task deadline exceeded before the model call")
+        return now + remaining
+
+    def _deadline(self, backend: ModelBackend, now: float, run_deadline: float) -> float:
+        timeout = backend.timeout if backend.timeout is not None else self.timeout
+        return min(now + timeout if timeout is not None else math.inf, run_deadline)
+
+    @staticmethod
+    def _to_result(backend: ModelBackend, message: AIMessage) -> ChatResult:
+        message.response_metadata = {**message.response_metadata, "router_backend": backend.name}
+        metrics.inc("a2a_model_router_calls_total", help="Backend calls by outcome", backend=backend.name, outcome="success")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _to_chunk(backend: ModelBackend, message: AIMessageChunk, first: bool) -> ChatGenerationChunk:
+        if first:
+            message.response_metadata = {**message.response_metadata, "router_backend": backend.name}
+        return ChatGenerationChunk(message=message)
+
+    @staticmethod
+    def _record_failure(backend: ModelBackend, outcome: str, error: Any, errors: List[str]):
+        logger.warning(f"Model backend {backend.name} {outcome}: {error}")
+        metrics.inc("a2a_model_router_calls_total", help="Backend calls by outcome", backend=backend.name, outcome=outcome)
+        errors.append(f"{backend.name}: {outcome} ({error})")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        kwargs.pop("tools", None)  # Already bound on each backend
+        candidates = iter(self._candidates(messages, run_manager))
+        run_deadline = self._run_deadline(run_manager, time.monotonic())
+        pending: Dict[Future, Tuple[ModelBackend, float]] = {}
+        errors: List[str] = []
+
+        def launch() -> bool:
+            backend = next(candidates, None)
+            if backend is None:
+                return False
+            deadline = self._deadline(backend, time.monotonic(), run_deadline)
+            # Run in the caller's context, so usage callbacks can charge the calling principal
+            call = contextvars.copy_context().run
+            pending[_executor.submit(call, backend.invoke, messages, deadline, stop=stop, **kwargs)] = (backend, deadline)
+            return True
+
+        launch()
+        hedge_at = time.monotonic() + self.hedge_delay if self.hedge_delay is not None else math.inf
+        while pending:
+            wake_at = min([hedge_at, *(deadline for _, deadline in pending.values())])
+            timeout = None if wake_at == math.inf else max(0.0, wake_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                backend, _ = pending.pop(future)
+                try:
+                    return self._to_result(backend, future.result())
+                except Exception as e:
+                    self._record_failure(backend, "error", e, errors)
+
+            now = time.monotonic()
+            for future, (backend, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(future)
+                    future.cancel()
+                    self._record_failure(backend, "timeout", "deadline exceeded", errors)
+
+            if not pending:
+                launch()
+            elif now >= hedge_at:
+                # Only hedge once per call; further backends are fallbacks only
+                hedge_at = math.inf
+                if launch():
+                    metrics.inc("a2a_model_router_hedges_total", help="Hedged backend calls started")
+
+        raise ModelRouterError(f"All model backends failed: {'; '.join(errors)}")
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        kwargs.pop("tools", None)  # Already bound on each backend
+        run_deadline = self._run_deadline(run_manager, time.monotonic())
+        errors: List[str] = []
+        for backend in self._candidates(messages, run_manager):
+            # The provider's HTTP timeout ends the wait for the first chunk at the deadline
+            chunks = backend.stream(messages, self._deadline(backend, time.monotonic(), run_deadline), stop=stop, **kwargs)
+            try:
+                first = next(chunks, None)
+            except Exception as e:
+                self._record_failure(backend, "timeout" if isinstance(e, TimeoutError) else "error", e, errors)
+                continue
+            if first is not None:
+                for i, message in enumerate(itertools.chain([first], chunks)):
+                    chunk = self._to_chunk(backend, message, i == 0)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            metrics.inc("a2a_model_router_calls_total", help="Backend calls by outcome", backend=backend.name, outcome="success")
+            return
+        raise ModelRouterError(f"All model backends failed: {'; '.join(errors)}")
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        kwargs.pop("tools", None)  # Already bound on each backend
+        loop = asyncio.get_running_loop()
+        run_deadline = self._run_deadline(run_manager, loop.time())
+        errors: List[str] = []
+        for backend in self._candidates(messages, run_manager):
+            deadline = self._deadline(backend, loop.time(), run_deadline)
+            chunks = backend.astream(messages, deadline, stop=stop, **kwargs)
+            try:
+                timeout = None if deadline == math.inf else max(0.0, deadline - loop.time())
+                first = await asyncio.wait_for(anext(chunks, None), timeout)
+            except Exception as e:
+                await chunks.aclose()
+                self._record_failure(backend, "timeout" if isinstance(e, TimeoutError) else "error", e, errors)
+                continue
+            if first is not None:
+                chunk = self._to_chunk(backend, first, True)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+                async for message in chunks:
+                    chunk = self._to_chunk(backend, message, False)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            metrics.inc("a2a_model_router_calls_total", help="Backend calls by outcome", backend=backend.name, outcome="success")
+            return
+        raise ModelRouterError(f"All model backends failed: {'; '.join(errors)}")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        kwargs.pop("tools", None)  # Already bound on each backend
+        candidates = iter(self._candidates(messages, run_manager))
+        loop = asyncio.get_running_loop()
+        run_deadline = self._run_deadline(run_manager, loop.time())
+        pending: Dict[asyncio.Task, Tuple[ModelBackend, float]] = {}
+        errors: List[str] = []
+
+        def launch() -> bool:
+            backend = next(candidates, None)
+            if backend is None:
+                return False
+            deadline = self._deadline(backend, loop.time(), run_deadline)
+            pending[asyncio.create_task(backend.ainvoke(messages, deadline, stop=stop, **kwargs))] = (backend, deadline)
+            return True
+
+        launch()
+        hedge_at = loop.time() + self.hedge_delay if self.hedge_delay is not None else math.inf
+        try:
+            while pending:
+                wake_at = min([hedge_at, *(deadline for _, deadline in pending.values())])
+                timeout = None if wake_at == math.inf else max(0.0, wake_at - loop.time())
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    backend, _ = pending.pop(task)
+                    try:
+                        return self._to_result(backend, task.result())
+                    except Exception as e:
+                        self._record_failure(backend, "error", e, errors)
+
+                now = loop.time()
+                for task, (backend, deadline) in list(pending.items()):
+                    if now >= deadline:
+                        pending.pop(task)
+                        task.cancel()
+                        self._record_failure(backend, "timeout", "deadline exceeded", errors)
+
+                if not pending:
+                    launch()
+                elif now >= hedge_at:
+                    hedge_at = math.inf
+                    if launch():
+                        metrics.inc("a2a_model_router_hedges_total", help="Hedged backend calls started")
+        finally:
+            # Cancel hedged requests that lost the race
+            for task in pending:
+                task.cancel()
+
+        raise ModelRouterError(f"All model backends failed: {'; '.join(errors)}")
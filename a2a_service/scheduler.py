@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional
+
+from a2a_service.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerQueueFullError(Exception):
+    """Raised when a run cannot wait for a slot because its class's queue is full."""
+
+
+class PriorityClass:
+    """A class of tasks sharing a scheduling weight and a concurrency cap."""
+
+    def __init__(
+        self,
+        name: str,
+        weight: float = 1.0,
+        max_concurrent: Optional[int] = None,
+        max_waiting: Optional[int] = None,
+        skills: Iterable[str] = (),
+        principals: Iterable[str] = (),
+    ):
+        """Initialize the class.
+
+        Args:
+            name: Class name, used in task metadata ("priority") and metrics.
+            weight: Share of the agent slots the class gets while other classes are waiting too.
+            max_concurrent: Most agent runs of the class executing at once, or None for no cap.
+            max_waiting: Most runs of the class waiting for a slot; further runs are refused.
+                None queues without limit.
+            skills: Skill ids whose tasks belong to the class.
+            principals: Authenticated callers whose tasks belong to the class.
+        """
+        if weight <= 0:
+            raise ValueError(f"Priority class {name} needs a positive weight")
+        self.name = name
+        self.weight = weight
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.skills = set(skills)
+        self.principals = set(principals)
+        self.running = 0
+        # Start tag of the class's next run; classes are served in order of this tag
+        self.virtual_time = 0.0
+        # Waiting runs per caller, served round-robin
+        self.queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.max_concurrent is None or self.running < self.max_concurrent
+
+
+class TaskScheduler:
+    """Admits agent runs by priority class with weighted fair queuing.
+
+    While runs are queued, free slots go to the class with the smallest virtual time
+    (start-time fair queuing): each admitted run advances its class's virtual time by
+    1/weight, so under contention classes get slots in proportion to their weights and
+    a low-weight class still drains. Within a class, callers are served round-robin,
+    so one caller submitting many tasks cannot starve others of the same class. A class
+    that was idle rejoins at the current virtual time rather than with banked credit.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        classes: Optional[List[PriorityClass]] = None,
+        default_class: str = "default",
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrent: Most agent runs executing at once across all classes, or None for no limit.
+            classes: The priority classes. A class named default_class is added if missing.
+            default_class: Class of tasks that no other class claims.
+        """
+        self.max_concurrent = max_concurrent
+        self.classes: Dict[str, PriorityClass] = {c.name: c for c in classes or []}
+        self.classes.setdefault(default_class, PriorityClass(default_class))
+        self.default_class = default_class
+        self.running = 0
+        self._virtual_time = 0.0
+
+    def classify(
+        self,
+        principal: Optional[str] = None,
+        skill_id: Optional[str] = None,
+        requested: Optional[str] = None,
+    ) -> str:
+        """Return the class of a task.
+
+        The class is taken from the caller's principal, else the skill, else the default.
+        A class requested in the task metadata is honoured only if its weight is not above
+        that class, so callers can lower their priority but not raise it.
+        """
+        derived = self.default_class
+        for priority_class in self.classes.values():
+            if principal and principal in priority_class.principals:
+                derived = priority_class.name
+                break
+        else:
+            for priority_class in self.classes.values():
+                if skill_id and skill_id in priority_class.skills:
+                    derived = priority_class.name
+                    break
+
+        if requested in self.classes and self.classes[requested].weight <= self.classes[derived].weight:
+            return requested
+        return derived
+
+    def _has_capacity(self) -> bool:
+        return self.max_concurrent is None or self.running < self.max_concurrent
+
+    def _start(self, priority_class: PriorityClass):
+        self._virtual_time = priority_class.virtual_time
+        priority_class.virtual_time += 1.0 / priority_class.weight
+        priority_class.running += 1
+        self.running += 1
+
+    def _dispatch(self):
+        """Admit queued runs while slots are free."""
+        while self._has_capacity():
+            eligible = [c for c in self.classes.values() if c.queues and c.has_capacity]
+            if not eligible:
+                return
+            priority_class = min(eligible, key=lambda c: (c.virtual_time, -c.weight))
+            caller, queue = next(iter(priority_class.queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                priority_class.queues.move_to_end(caller)
+            else:
+                del priority_class.queues[caller]
+            if waiter.done():
+                continue  # Cancelled while queued
+            self._start(priority_class)
+            waiter.set_result(None)
+        self._update_metrics()
+
+    def _remove_waiter(self, priority_class: PriorityClass, caller: str, waiter: asyncio.Future):
+        queue = priority_class.queues.get(caller)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del priority_class.queues[caller]
+
+    def _release(self, priority_class: PriorityClass):
+        priority_class.running -= 1
+        self.running -= 1
+        self._dispatch()
+
+    def _update_metrics(self):
+        for priority_class in self.classes.values():
+            metrics.set("a2a_scheduler_queue_depth", priority_class.waiting, help="Agent runs waiting for a slot", priority_class=priority_class.name)
+            metrics.set("a2a_scheduler_running", priority_class.running, help="Agent runs executing", priority_class=priority_class.name)
+
+    @asynccontextmanager
+    async def slot(self, class_name: Optional[str], caller: str) -> AsyncIterator[None]:
+        """Wait for an agent slot for a run of the given class and caller, and hold it.
+
+        Raises:
+            SchedulerQueueFullError: If the run would have to wait and the class already
+                has max_waiting runs waiting.
+        """
+        priority_class = self.classes.get(class_name) or self.classes[self.default_class]
+        queued_at = time.monotonic()
+
+        if self._has_capacity() and priority_class.has_capacity and not priority_class.queues:
+            self._start(priority_class)
+            self._update_metrics()
+        else:
+            if priority_class.max_waiting is not None and priority_class.waiting >= priority_class.max_waiting:
+                metrics.inc("a2a_scheduler_rejected_total", help="Agent runs refused by a full queue", priority_class=priority_class.name)
+                raise SchedulerQueueFullError(f"Too many runs of priority class {priority_class.name} are waiting")
+            if not priority_class.queues:
+                # An idle class competes from now on, without credit for the time it was idle
+                priority_class.virtual_time = max(priority_class.virtual_time, self._virtual_time)
+            waiter = asyncio.get_running_loop().create_future()
+            priority_class.queues.setdefault(caller, deque()).append(waiter)
+            self._update_metrics()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Admitted just as the caller went away
+                    self._release(priority_class)
+                else:
+                    self._remove_waiter(priority_class, caller, waiter)
+                    self._update_metrics()
+                raise
+
+        metrics.inc("a2a_scheduler_admitted_total", help="Agent runs admitted", priority_class=priority_class.name)
+        metrics.inc(
+            "a2a_scheduler_wait_seconds_total",
+            time.monotonic() - queued_at,
+            help="Time agent runs waited for a slot",
+            priority_class=priority_class.name,
+        )
+        try:
+            yield
+        finally:
+            self._release(priority_class)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Report running and waiting runs per class."""
+        return {
+            name: {"running": c.running, "waiting": c.waiting, "limit": c.max_concurrent}
+            for name, c in self.classes.items()
+        }
@@ -1,17 +1,85 @@
+import asyncio
+import hashlib
+import json
 import logging
-import fastapi
+import math
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterable
+from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from typing import Any, List, Optional
 import uvicorn
-from a2a_service.types import AgentCapabilities, AgentSkill, AgentCard, SendTaskRequest, TaskSendParams, SendTaskStreamingRequest, Message, TextPart
+from a2a_service.auth import Authenticator, AuthenticationError, authenticate, current_principal
+from a2a_service.codec import (
+    MethodMismatchError,
+    decode_get_task_requests,
+    decode_task_request,
+    encode_json,
+    encode_sse_event,
+    is_batch,
+)
+from a2a_service.health import EventLoopMonitor
+from a2a_service.metrics import metrics
+from a2a_service.middleware import ResponseCompressionMiddleware
+from a2a_service.profiling import Profiler, ProfilerBusyError
+from a2a_service.ratelimit import CallerQuotas, current_token_charge
+from a2a_service.traffic import TrafficRecorder, current_task_params
+from a2a_service.types import (
+    AgentAuthentication,
+    AgentCard,
+    GetTaskResponse,
+    SendTaskRequest,
+    SendTaskStreamingRequest,
+    JSONRPCResponse,
+    JSONParseError,
+    InvalidParamsError,
+    InvalidRequestError,
+    MethodNotFoundError,
+    TaskNotFoundError,
+    UnsupportedOperationError,
+)
 
 logger = logging.getLogger(__name__)
 
 class A2AServer:
     """A server for A2A (Agent-to-Agent) communication."""
+
+    # Upper bound on tasks returned per session history page
+    MAX_HISTORY_PAGE_SIZE = 500
+    # Upper bound on requests in a tasks/get batch
+    MAX_BATCH_SIZE = 100
+    # Seconds clients may use a fetched agent card before revalidating it
+    AGENT_CARD_MAX_AGE = 300
     
-    def __init__(self, agent_card: AgentCard, task_manager, host: str = "0.0.0.0", port: int = 10000):
+    def __init__(
+        self,
+        agent_card: AgentCard,
+        task_manager,
+        host: str = "0.0.0.0",
+        port: int = 10000,
+        max_event_loop_lag: float = 0.5,
+        services: Optional[List[Any]] = None,
+        authenticators: Optional[List[Authenticator]] = None,
+        quotas: Optional[CallerQuotas] = None,
+        cors_origins: Optional[List[str]] = None,
+        cors_max_age: int = 600,
+        compression: Optional[List[str]] = None,
+        compression_min_size: int = 1024,
+        keep_alive_timeout: float = 5.0,
+        http2: bool = False,
+        ssl_certfile: Optional[str] = None,
+        ssl_keyfile: Optional[str] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        admin_principals: Optional[List[str]] = None,
+        max_request_size: Optional[int] = None,
+    ):
         """Initialize the server.
         
         Args:
@@ -19,137 +87,485 @@ class A2AServer:
             task_manager: Manager for handling agent tasks.
             host: Host to bind the server.
             port: Port to bind the server.
+            max_event_loop_lag: Event-loop lag in seconds above which the server reports itself not ready.
+            services: Background services with start() and async stop() methods, run for the server's lifetime.
+            authenticators: Accepted ways for callers to authenticate. Requests need none if empty.
+            quotas: Per-caller request and token quotas applied to task submissions.
+            cors_origins: Origins allowed to call the API from a browser. Defaults to any origin.
+            cors_max_age: Seconds browsers may cache a CORS preflight response.
+            compression: Response content encodings offered ("zstd", "gzip"), in order of
+                preference. Responses are not compressed if empty.
+            compression_min_size: Smallest response body, in bytes, that is compressed.
+            keep_alive_timeout: Seconds an idle client connection is kept open.
+            http2: Serve HTTP/2 (with HTTP/1.1 fallback) using hypercorn instead of uvicorn.
+            ssl_certfile: TLS certificate file; HTTPS is served if set with ssl_keyfile.
+            ssl_keyfile: TLS private key file.
+            recorder: Records task requests for replay. The agents record their model and
+                tool outputs if it is also among their callbacks.
+            admin_principals: Authenticated principals allowed to use the /admin profiling
+                endpoints. The endpoints are not served if empty.
+            max_request_size: Largest task request body accepted, in bytes. Bodies are read
+                whole before they are decoded, so this bounds the memory a request takes.
         """
+        self.authenticators = authenticators or []
+        self.admin_principals = set(admin_principals or [])
+        if self.admin_principals and not self.authenticators:
+            raise ValueError("Admin endpoints require authenticators to identify admin principals")
+        if self.authenticators and agent_card.authentication is None:
+            # Publish the schemes that are enforced
+            schemes = [scheme for a in self.authenticators for scheme in a.schemes]
+            agent_card = agent_card.model_copy(update={"authentication": AgentAuthentication(schemes=schemes)})
+        self.quotas = quotas
         self.agent_card = agent_card
         self.task_manager = task_manager
         self.host = host
         self.port = port
+        self.max_event_loop_lag = max_event_loop_lag
+        self.keep_alive_timeout = keep_alive_timeout
+        self.http2 = http2
+        self.ssl_certfile = ssl_certfile
+        self.ssl_keyfile = ssl_keyfile
+        self.recorder = recorder
+        self.max_request_size = max_request_size
+        self.profiler = Profiler(task_manager)
+        self.loop_monitor = EventLoopMonitor()
+        self.services = [self.loop_monitor, *(services or [])]
+        self._warm_up_task = None
         
         # Create FastAPI app
-        self.app = FastAPI(title=f"{agent_card.name} API", version=agent_card.version)
+        self.app = FastAPI(
+            title=f"{agent_card.name} API",
+            version=agent_card.version,
+            lifespan=self._lifespan,
+        )
         
         # Add CORS middleware
         self.app.add_middleware(
             CORSMiddleware,
-            allow_origins=["*"],
+            allow_origins=cors_origins or ["*"],
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            # Let browsers reuse preflight results instead of sending one per request
+            max_age=cors_max_age,
         )
+        if compression:
+            self.app.add_middleware(
+                ResponseCompressionMiddleware,
+                algorithms=compression,
+                minimum_size=compression_min_size,
+            )
+        
+        # The agent card never changes, so serialize it once
+        self._agent_card_json = encode_json(agent_card)
+        self._agent_card_etag = '"' + hashlib.sha256(self._agent_card_json).hexdigest()[:32] + '"'
         
         # Register routes
         self._register_routes()
+        if self.admin_principals:
+            self._register_admin_routes()
         
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Start background services and agent warm-up once the server is bound."""
+        self._warm_up_task = asyncio.create_task(self.task_manager.warm_up())
+        for service in self.services:
+            service.start()
+        yield
+        for service in reversed(self.services):
+            await service.stop()
+        if self.recorder:
+            self.recorder.close()
+        if not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+
     def _register_routes(self):
         """Register API routes."""
         
+        @self.app.get("/metrics")
+        async def get_metrics():
+            """Expose process metrics in the Prometheus text format."""
+            return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+        @self.app.get("/healthz")
+        async def healthz():
+            """Liveness probe: the process is up and its event loop is running."""
+            return JSONResponse(
+                content={"status": "ok", "event_loop": self.loop_monitor.status()}
+            )
+
+        @self.app.get("/readyz")
+        async def readyz():
+            """Readiness probe: dependencies are healthy and there is spare capacity."""
+            checks = await self.task_manager.health_status()
+            event_loop = self.loop_monitor.status()
+            event_loop["ok"] = self.loop_monitor.lag <= self.max_event_loop_lag
+            checks["event_loop"] = event_loop
+
+            ready = all(check.get("ok", False) for check in checks.values())
+            return JSONResponse(
+                status_code=200 if ready else 503,
+                content={"status": "ready" if ready else "unavailable", "checks": checks},
+            )
+        
         @self.app.get("/")
-        async def get_agent_info():
+        async def get_agent_info(request: Request):
             """Return information about the agent."""
-            return self.agent_card
+            return self._agent_card_response(request)
             
         @self.app.get("/.well-known/agent.json")
-        async def get_agent_json():
+        async def get_agent_json(request: Request):
             """Serve the agent card at the .well-known location."""
-            return self.agent_card
+            return self._agent_card_response(request)
             
-        def _process_message(message_data):
-            """Helper method to process message data into proper Message object."""
-            if "parts" in message_data and isinstance(message_data["parts"], list):
-                # The message already has parts, use as is
-                return message_data
-            else:
-                # Create a default text part if message is a simple string or doesn't have parts
-                text = ""
-                if isinstance(message_data, str):
-                    text = message_data
-                elif isinstance(message_data, dict) and "text" in message_data:
-                    text = message_data["text"]
-                
-                if text:
-                    # Create a proper Message object with text part
-                    return Message(
-                        role="user", 
-                        parts=[TextPart(text=text)]
-                    )
-            return None
-                        
+        @self.app.get("/sessions/{session_id}/tasks")
+        async def get_session_history(
+            request: Request,
+            session_id: str,
+            limit: int = 50,
+            cursor: Optional[str] = None,
+            historyLength: Optional[int] = None,
+        ):
+            """Return a page of a session's tasks, newest first, with their message history."""
+            refused = self._authorize(request)
+            if refused:
+                return refused
+            limit = max(1, min(limit, self.MAX_HISTORY_PAGE_SIZE))
+            try:
+                rows = self.task_manager.iter_session_history(session_id, limit, cursor, historyLength)
+            except NotImplementedError as e:
+                return self._create_response(
+                    JSONRPCResponse(id=None, error=UnsupportedOperationError(message=str(e)))
+                )
+            except ValueError as e:
+                return self._create_response(
+                    JSONRPCResponse(id=None, error=InvalidParamsError(message=str(e)))
+                )
+            return StreamingResponse(
+                self._stream_session_page(session_id, rows, limit),
+                media_type="application/json",
+            )
+
+        @self.app.get("/files/{digest}")
+        async def get_file(digest: str, request: Request):
+            """Serve a file uploaded in a task message, by its SHA-256 digest."""
+            refused = self._authorize(request)
+            if refused:
+                return refused
+            file_store = getattr(self.task_manager, "file_store", None)
+            try:
+                path = file_store.path(digest) if file_store else None
+            except ValueError:
+                path = None
+            if path is None or not path.is_file():
+                return JSONResponse(status_code=404, content={"detail": "File not found"})
+            # Content-addressed files never change
+            return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
         @self.app.post("/")
         async def send_task(request: Request):
-            """Handle send_task requests."""
-            body = await request.json()
-            
-            # Debug logging
-            logger.info(f"Received request body: {body}")
-            
-            # Convert the dict to a properly structured SendTaskRequest object
-            
-            # Extract parameters from the request body
-            request_id = body.get("id", "")
-            params_data = body.get("params", {})
-            
-            # Create TaskSendParams object
-            params = TaskSendParams(
-                id=params_data.get("id", ""),
-                sessionId=params_data.get("sessionId", ""),
-                historyLength=params_data.get("historyLength", 10),
-                acceptedOutputModes=params_data.get("acceptedOutputModes", ["text"]),
-                pushNotification=params_data.get("pushNotification", None)
-            )
-            
-            # Add message if present
-            if "message" in params_data:
-                message_data = params_data["message"]
-                logger.info(f"Message found in params: {message_data}")
-                params.message = _process_message(message_data)
-                if params.message:
-                    logger.info(f"Processed message: {params.message}")
-            else:
-                logger.warning("No message found in request params")
-                
-            # Create SendTaskRequest object
-            request_obj = SendTaskRequest(id=request_id, params=params)
-            
-            return await self.task_manager.on_send_task(request_obj)
+            """Handle send_task requests, and tasks/get requests or batches of them.
+
+            Only sends count against the caller's request quota; reading tasks is free.
+            """
+            refused = self._authorize(request)
+            if refused:
+                return refused
+            raw = await self._read_body(request)
+            if isinstance(raw, Response):
+                return raw
+            if is_batch(raw):
+                return await self._get_tasks(raw)
+            try:
+                request_obj = self._decode_request(raw, SendTaskRequest)
+            except MethodMismatchError as e:
+                if e.method == "tasks/get":
+                    return await self._get_tasks(raw)
+                return self._create_response(JSONRPCResponse(id=None, error=MethodNotFoundError()))
+            if isinstance(request_obj, Response):
+                return request_obj
+            refused = self._admit(request)
+            if refused:
+                return refused
+
+            self._track_task(request_obj)
+            result = await self.task_manager.on_send_task(request_obj)
+            return self._create_response(result)
             
         @self.app.post("/send_task_subscribe")
         async def send_task_subscribe(request: Request):
             """Handle streaming task requests."""
-            body = await request.json()
-            
-            # Debug logging
-            logger.info(f"Received streaming request body: {body}")
-            
-            # Convert the dict to a properly structured SendTaskStreamingRequest object
-            
-            # Extract parameters from the request body
-            request_id = body.get("id", "")
-            params_data = body.get("params", {})
-            
-            # Create TaskSendParams object
-            params = TaskSendParams(
-                id=params_data.get("id", ""),
-                sessionId=params_data.get("sessionId", ""),
-                historyLength=params_data.get("historyLength", 10),
-                acceptedOutputModes=params_data.get("acceptedOutputModes", ["text"]),
-                pushNotification=params_data.get("pushNotification", None)
+            refused = self._authorize(request)
+            if refused:
+                return refused
+            raw = await self._read_body(request)
+            if isinstance(raw, Response):
+                return raw
+            try:
+                request_obj = self._decode_request(raw, SendTaskStreamingRequest)
+            except MethodMismatchError:
+                return self._create_response(JSONRPCResponse(id=None, error=MethodNotFoundError()))
+            if isinstance(request_obj, Response):
+                return request_obj
+            refused = self._admit(request)
+            if refused:
+                return refused
+
+            self._track_task(request_obj)
+            result = await self.task_manager.on_send_task_subscribe(request_obj)
+            return self._create_response(result)
+
+    def _register_admin_routes(self):
+        """Register the profiling endpoints, for admin principals only."""
+
+        @self.app.get("/admin/profile/cpu")
+        async def cpu_profile(request: Request, seconds: float = 10.0, interval_ms: float = 10.0, idle: bool = False):
+            """Sample the stacks of all threads for a while; returns collapsed stacks for a flame graph."""
+            refused = self._authorize_admin(request)
+            if refused:
+                return refused
+            try:
+                profile = await asyncio.to_thread(self.profiler.cpu_profile, seconds, interval_ms / 1000, idle)
+            except ProfilerBusyError as e:
+                return JSONResponse(status_code=409, content={"detail": str(e)})
+            return self._download(profile, "cpu", "folded")
+
+        @self.app.get("/admin/tasks")
+        async def task_stacks(request: Request):
+            """Dump the stacks of all asyncio tasks and threads."""
+            refused = self._authorize_admin(request)
+            if refused:
+                return refused
+            return self._download(self.profiler.task_stacks(), "tasks", "txt")
+
+        @self.app.post("/admin/memory/tracing")
+        async def start_tracing(request: Request, frames: int = 10):
+            """Start tracing memory allocations."""
+            refused = self._authorize_admin(request)
+            if refused:
+                return refused
+            self.profiler.start_tracing(max(1, min(frames, 100)))
+            return JSONResponse(content={"tracing": True})
+
+        @self.app.delete("/admin/memory/tracing")
+        async def stop_tracing(request: Request):
+            """Stop tracing memory allocations."""
+            refused = self._authorize_admin(request)
+            if refused:
+                return refused
+            self.profiler.stop_tracing()
+            return JSONResponse(content={"tracing": False})
+
+        @self.app.get("/admin/memory/snapshot")
+        async def memory_snapshot(request: Request, top: int = 30, group_by: str = "lineno", format: str = "text"):
+            """Report the top allocation sites and their growth since the last report, or download a raw snapshot."""
+            refused = self._authorize_admin(request)
+            if refused:
+                return refused
+            if group_by not in ("lineno", "filename", "traceback"):
+                return JSONResponse(status_code=400, content={"detail": "group_by must be lineno, filename or traceback"})
+            try:
+                if format == "raw":
+                    fd, path = tempfile.mkstemp(suffix=".tracemalloc")
+                    os.close(fd)
+                    await asyncio.to_thread(self.profiler.dump_snapshot, path)
+                    return FileResponse(
+                        path,
+                        filename=f"memory-{int(time.time())}.tracemalloc",
+                        background=BackgroundTask(os.unlink, path),
+                    )
+                report = await asyncio.to_thread(self.profiler.memory_report, top, group_by)
+            except RuntimeError as e:
+                return JSONResponse(status_code=409, content={"detail": str(e)})
+            return self._download(report, "memory", "txt")
+
+    def _authorize_admin(self, request: Request) -> Optional[Response]:
+        """Authenticate a request and require an admin principal."""
+        refused = self._authorize(request)
+        if refused:
+            return refused
+        principal = current_principal.get()
+        if principal not in self.admin_principals:
+            logger.warning(f"Refused admin request from {principal}")
+            return JSONResponse(status_code=403, content={"detail": "Admin access required"})
+        return None
+
+    @staticmethod
+    def _download(content: str, name: str, extension: str) -> Response:
+        """Return a diagnostics result as a file download."""
+        return Response(
+            content=content,
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="{name}-{int(time.time())}.{extension}"'},
+        )
+
+    def _authorize(self, request: Request) -> Optional[Response]:
+        """Authenticate a request before any other work.
+
+        Returns an error response if the request is refused. Otherwise the caller's
+        principal applies for the rest of the request.
+        """
+        if self.authenticators:
+            try:
+                principal = authenticate(self.authenticators, request.headers)
+            except AuthenticationError as e:
+                return JSONResponse(
+                    status_code=401,
+                    content={"detail": str(e)},
+                    headers={"WWW-Authenticate": ", ".join(self.agent_card.authentication.schemes)},
+                )
+            current_principal.set(principal)
+        return None
+
+    def _admit(self, request: Request) -> Optional[Response]:
+        """Count a task submission against the quotas of the authorized caller.
+
+        Called once per HTTP request, before the task manager is involved. Returns an
+        error response if the caller is over quota. Otherwise the caller's token usage is
+        charged to it for the rest of the request.
+        """
+        if self.quotas:
+            caller = current_principal.get() or f"ip:{request.client.host if request.client else 'unknown'}"
+            retry_after = self.quotas.admit(caller)
+            if retry_after:
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Quota exceeded"},
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+            current_token_charge.set(partial(self.quotas.charge_tokens, caller))
+        return None
+
+    async def _read_body(self, request: Request):
+        """Read a request body, or return a 413 response once it exceeds max_request_size.
+
+        The declared Content-Length is checked first, and the streamed body is counted as
+        it arrives, so an oversized request is refused without being buffered.
+        """
+        if self.max_request_size is None:
+            return await request.body()
+        too_large = JSONResponse(
+            status_code=413, content={"detail": f"Request body exceeds {self.max_request_size} bytes"}
+        )
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > self.max_request_size:
+            return too_large
+        chunks = []
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > self.max_request_size:
+                return too_large
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _track_task(self, request_obj):
+        """Make the task's parameters known to its run, and record the request if recording."""
+        current_task_params.set(request_obj.params)
+        if self.recorder:
+            self.recorder.record_request(request_obj.method, request_obj.params)
+
+    def _stream_session_page(self, session_id: str, rows, limit: int):
+        """Write a session history page as JSON incrementally, one task at a time."""
+        yield b'{"sessionId":' + json.dumps(session_id).encode("utf-8") + b',"tasks":['
+        count = 0
+        last_cursor = None
+        for task, row_cursor in rows:
+            if count:
+                yield b","
+            yield encode_json(task)
+            count += 1
+            last_cursor = row_cursor
+        next_cursor = last_cursor if count == limit else None
+        yield b'],"nextCursor":' + json.dumps(next_cursor).encode("utf-8") + b"}"
+
+    def _agent_card_response(self, request: Request) -> Response:
+        """Return the pre-serialized agent card, or 304 if the client's copy is current."""
+        headers = {
+            "ETag": self._agent_card_etag,
+            "Cache-Control": f"public, max-age={self.AGENT_CARD_MAX_AGE}",
+        }
+        # Weak comparison: the compression middleware marks the ETag of encoded copies weak
+        client_tags = request.headers.get("if-none-match", "").split(",")
+        if any(tag.strip().removeprefix("W/") == self._agent_card_etag for tag in client_tags):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self._agent_card_json, media_type="application/json", headers=headers)
+
+    async def _get_tasks(self, raw: bytes) -> Response:
+        """Answer a tasks/get request, or a JSON-RPC batch of them."""
+        try:
+            requests = decode_get_task_requests(raw)
+        except ValueError as e:
+            logger.warning(f"Rejecting malformed request: {e}")
+            return self._create_response(JSONRPCResponse(id=None, error=JSONParseError()))
+        if len(requests) > self.MAX_BATCH_SIZE:
+            return self._create_response(JSONRPCResponse(
+                id=None, error=InvalidRequestError(message=f"Batches are limited to {self.MAX_BATCH_SIZE} requests")
+            ))
+
+        responses = []
+        for request_obj in requests:
+            task = await self.task_manager.get_task(request_obj.params.id)
+            responses.append(
+                GetTaskResponse(id=request_obj.id, result=task)
+                if task else GetTaskResponse(id=request_obj.id, error=TaskNotFoundError())
             )
-            
-            # Add message if present
-            if "message" in params_data:
-                message_data = params_data["message"]
-                logger.info(f"Message found in params: {message_data}")
-                params.message = _process_message(message_data)
-                if params.message:
-                    logger.info(f"Processed message: {params.message}")
-            else:
-                logger.warning("No message found in request params")
-                
-            # Create SendTaskStreamingRequest object
-            request_obj = SendTaskStreamingRequest(id=request_id, params=params)
-            
-            return await self.task_manager.on_send_task_subscribe(request_obj)
+        if not is_batch(raw):
+            return self._create_response(responses[0])
+        return Response(
+            content=b"[" + b",".join(encode_json(r) for r in responses) + b"]",
+            media_type="application/json",
+        )
+
+    def _decode_request(self, raw: bytes, request_cls):
+        """Decode the raw request body, returning an error response if it is not valid JSON."""
+        # Bodies can carry large attachments, so only their size is logged
+        logger.debug(f"Received request body ({len(raw)} bytes)")
+        try:
+            return decode_task_request(raw, request_cls)
+        except ValueError as e:
+            logger.warning(f"Rejecting malformed request: {e}")
+            return self._create_response(JSONRPCResponse(id=None, error=JSONParseError()))
+
+    def _create_response(self, result: Any) -> Response:
+        """Serialize a task manager result into a raw HTTP response."""
+        if isinstance(result, AsyncIterable):
+            async def event_generator():
+                async for item in result:
+                    yield encode_sse_event(item)
+
+            return StreamingResponse(event_generator(), media_type="text/event-stream")
+        if isinstance(result, BaseModel):
+            return Response(content=encode_json(result), media_type="application/json")
+
+        logger.error(f"Unexpected result type: {type(result)}")
+        raise ValueError(f"Unexpected result type: {type(result)}")
             
     def start(self):
         """Start the server."""
-        uvicorn.run(self.app, host=self.host, port=self.port) 
\ No newline at end of file
+        if self.http2:
+            self._start_hypercorn()
+            return
+        uvicorn.run(
+            self.app,
+            host=self.host,
+            port=self.port,
+            timeout_keep_alive=self.keep_alive_timeout,
+            ssl_certfile=self.ssl_certfile,
+            ssl_keyfile=self.ssl_keyfile,
+        )
+
+    def _start_hypercorn(self):
+        """Serve HTTP/2 with hypercorn: over TLS via ALPN, or cleartext (h2c) without it."""
+        try:
+            from hypercorn.asyncio import serve
+            from hypercorn.config import Config
+        except ImportError as e:
+            raise ValueError("HTTP/2 requires the hypercorn package: pip install 'a2a-template-langgraph[http2]'") from e
+
+        config = Config()
+        config.bind = [f"{self.host}:{self.port}"]
+        config.keep_alive_timeout = self.keep_alive_timeout
+        config.certfile = self.ssl_certfile
+        config.keyfile = self.ssl_keyfile
+        asyncio.run(serve(self.app, config)) 
\ No newline at end of file
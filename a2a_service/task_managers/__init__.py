@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 import asyncio
 import logging
 from a2a_service.agent import Agent
@@ -9,27 +9,129 @@ from a2a_service.types import (
     Artifact,
     Task,
     TaskSendParams,
+    TextPart,
     SendTaskStreamingResponse,
     TaskArtifactUpdateEvent,
     TaskStatusUpdateEvent,
     InternalError,
 )
 
+# States of a task whose run has been started and not yet finished
+IN_FLIGHT_STATES = (TaskState.SUBMITTED, TaskState.WORKING)
+
+
+def is_duplicate_submission(state: TaskState, stored_message: Any, message: Any) -> bool:
+    """Whether a send for an existing task repeats an earlier submission rather than continuing it.
+
+    Only a task waiting for input accepts a new message for the same id; re-sending the
+    message it was started with is still a retry. A failed task may be run again. Sends
+    for tasks that are running or finished are retries and must not start another run.
+
+    Args:
+        state: Stored state of the task.
+        stored_message: The message the current run was started with, as JSON.
+        message: The message of the new send, as JSON.
+    """
+    if state == TaskState.INPUT_REQUIRED:
+        return message == stored_message
+    return state != TaskState.FAILED
+
+
+class ArtifactAssembler:
+    """Merges the streamed chunks of a task's artifacts.
+
+    Text appended by successive chunks is kept as a list of pieces and only joined
+    when the artifact is complete, so assembling an answer of n chunks costs O(n)
+    rather than the O(n^2) of concatenating it chunk by chunk.
+    """
+
+    def __init__(self):
+        self._artifacts: Dict[int, Artifact] = {}
+        # Parts per artifact index; runs of appended text are lists of strings
+        self._parts: Dict[int, List[Any]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._parts)
+
+    def add(self, artifact: Artifact):
+        """Add a chunk. Chunks without append set replace the artifact at their index."""
+        if not artifact.append or artifact.index not in self._parts:
+            self._parts[artifact.index] = []
+        parts = self._parts[artifact.index]
+        for part in artifact.parts:
+            if isinstance(part, TextPart) and not part.metadata:
+                if parts and isinstance(parts[-1], list):
+                    parts[-1].append(part.text)
+                else:
+                    parts.append([part.text])
+            else:
+                parts.append(part)
+        self._artifacts[artifact.index] = artifact
+
+    def _joined(self, index: int) -> List[Any]:
+        return [
+            TextPart(text="".join(part)) if isinstance(part, list) else part
+            for part in self._parts[index]
+        ]
+
+    def pop(self, index: int) -> Artifact:
+        """Remove an artifact and return it with its chunks joined."""
+        parts = self._joined(index)
+        del self._parts[index]
+        artifact = self._artifacts.pop(index)
+        return artifact.model_copy(update={"parts": parts, "append": False, "lastChunk": True})
+
+    def snapshot(self) -> List[Artifact]:
+        """Return the artifacts streamed so far, each as one chunk that replaces its index."""
+        return [
+            artifact.model_copy(update={"parts": self._joined(index), "append": False, "lastChunk": False})
+            for index, artifact in self._artifacts.items()
+        ]
+
+
 # Base in-memory task manager
 class InMemoryTaskManager:
+    # Seconds a run's lease on its task lasts; in-memory tasks have no leases
+    lease_ttl: Optional[float] = None
+
     def __init__(self):
         self.tasks = {}
-        self.sse_queues = {}
+        # SSE subscriber queues per task; every subscriber receives every event
+        self.sse_queues: Dict[str, List[asyncio.Queue]] = {}
+        # Artifacts being streamed, per task, until their last chunk
+        self.artifact_chunks: Dict[str, ArtifactAssembler] = {}
         self.logger = logging.getLogger(__name__)
 
     async def upsert_task(self, task_params: TaskSendParams):
         """Creates or updates a task."""
         self.tasks[task_params.id] = Task(
             id=task_params.id,
+            sessionId=task_params.sessionId,
             status=TaskStatus(state=TaskState.WORKING),
-            artifacts=[]
+            artifacts=[],
+            history=[task_params.message] if task_params.message else None,
         )
 
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        """Returns a stored task, or None if it does not exist."""
+        return self.tasks.get(task_id)
+
+    async def claim_task(self, task_params: TaskSendParams) -> Tuple[bool, Optional[Task]]:
+        """Starts a run for a send request unless it repeats an earlier submission.
+
+        Returns:
+            (True, None) if the caller should run the agent, or (False, task) with the
+            stored task if the send is a retry of a run that is in flight or finished.
+        """
+        task = self.tasks.get(task_params.id)
+        if task is not None:
+            stored = task.history[0].model_dump(mode="json") if task.history else None
+            message = task_params.message.model_dump(mode="json") if task_params.message else None
+            if is_duplicate_submission(task.status.state, stored, message):
+                return False, task
+        await self.upsert_task(task_params)
+        return True, None
+
     async def update_store(self, task_id: str, task_status: TaskStatus, artifacts: List[Artifact] = None) -> Task:
         """Updates a task's status and artifacts in the store."""
         if task_id not in self.tasks:
@@ -40,19 +142,65 @@ class InMemoryTaskManager:
                 self.tasks[task_id].artifacts.extend(artifacts)
         return self.tasks[task_id]
 
+    async def append_artifact_chunk(self, task_id: str, artifact: Artifact) -> Optional[Artifact]:
+        """Buffers a streamed artifact chunk.
+
+        Returns the complete artifact, with its chunks merged, once its last chunk
+        arrives, for the caller to store with update_store.
+        """
+        assembler = self.artifact_chunks.setdefault(task_id, ArtifactAssembler())
+        assembler.add(artifact)
+        if not artifact.lastChunk:
+            return None
+        complete = assembler.pop(artifact.index)
+        if not assembler:
+            del self.artifact_chunks[task_id]
+        return complete
+
+    def discard_artifact_chunks(self, task_id: str):
+        """Drops the buffered chunks of a task whose stream ended early."""
+        self.artifact_chunks.pop(task_id, None)
+
+    async def renew_leases(self, task_ids: List[str]):
+        """Extends this process's leases on the tasks it is running. In-memory tasks have no leases."""
+
+    async def claim_orphaned_tasks(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Takes over in-flight tasks whose runner stopped renewing their lease.
+
+        In-memory tasks end with their process, so there are never any to take over.
+
+        Returns:
+            The tasks taken over, each with "id", "session_id", "message" (the input
+            message as JSON), "skill_id" and the "lease_owner" that stopped.
+        """
+        return []
+
+    def iter_session_history(self, session_id: str, limit: int = 50, cursor: str = None, history_length: int = None):
+        """Iterates over a page of a session's tasks. Requires a persistent task store."""
+        raise NotImplementedError("Session history is not supported by the in-memory task store")
+
     async def setup_sse_consumer(self, task_id: str, clear_if_exists: bool = True):
-        """Sets up an async queue for SSE events."""
-        if task_id in self.sse_queues and clear_if_exists:
-            # Clear existing queue
-            self.sse_queues[task_id] = asyncio.Queue()
-        elif task_id not in self.sse_queues:
-            self.sse_queues[task_id] = asyncio.Queue()
-        return self.sse_queues[task_id]
+        """Sets up an async queue for a new SSE subscriber of a task.
+
+        With clear_if_exists, earlier subscribers of the task stop receiving events.
+        """
+        queue = asyncio.Queue()
+        if clear_if_exists or task_id not in self.sse_queues:
+            self.sse_queues[task_id] = []
+        self.sse_queues[task_id].append(queue)
+        return queue
 
     async def enqueue_events_for_sse(self, task_id: str, event):
-        """Enqueues events for SSE consumers."""
-        if task_id in self.sse_queues:
-            await self.sse_queues[task_id].put(event)
+        """Enqueues events for all SSE subscribers of a task."""
+        for queue in self.sse_queues.get(task_id, []):
+            await queue.put(event)
+
+    def _remove_sse_consumer(self, task_id: str, queue: asyncio.Queue):
+        queues = self.sse_queues.get(task_id)
+        if queues and queue in queues:
+            queues.remove(queue)
+            if not queues:
+                del self.sse_queues[task_id]
 
     async def dequeue_events_for_sse(self, request_id: str, task_id: str, queue):
         """Dequeues events for SSE consumers."""
@@ -62,23 +210,12 @@ class InMemoryTaskManager:
                 if isinstance(event, InternalError):
                     yield SendTaskStreamingResponse(id=request_id, error=event)
                 elif isinstance(event, TaskStatusUpdateEvent):
+                    yield SendTaskStreamingResponse(id=request_id, result=event)
                     if event.final:
                         # Final event, close the stream
-                        yield SendTaskStreamingResponse(
-                            id=request_id, 
-                            result={"id": task_id, "status": event.status}
-                        )
                         break
-                    else:
-                        yield SendTaskStreamingResponse(
-                            id=request_id, 
-                            result={"id": task_id, "status": event.status}
-                        )
                 elif isinstance(event, TaskArtifactUpdateEvent):
-                    yield SendTaskStreamingResponse(
-                        id=request_id, 
-                        result={"id": task_id, "artifact": event.artifact}
-                    )
+                    yield SendTaskStreamingResponse(id=request_id, result=event)
         except asyncio.CancelledError:
             self.logger.info(f"SSE stream for task {task_id} was cancelled")
         except Exception as e:
@@ -87,4 +224,6 @@ class InMemoryTaskManager:
                 id=request_id,
                 error=InternalError(message=f"Stream error: {str(e)}")
             )
+        finally:
+            self._remove_sse_consumer(task_id, queue)
 
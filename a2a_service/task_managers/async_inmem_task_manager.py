@@ -1,8 +1,17 @@
-from typing import AsyncIterable, Union, Dict, Any, List, Optional
+from typing import AsyncIterable, Union, Dict, Any, List, Optional, Set
+from contextlib import asynccontextmanager
 import asyncio
+import json
 import logging
+import time
 import traceback
-from a2a_service.agent import Agent
+from a2a_service.agent import Agent, get_checkpointer
+from a2a_service.auth import current_principal
+from a2a_service.files import FileStore
+from a2a_service.health import run_check
+from a2a_service.metrics import metrics
+from a2a_service.registry import AgentRegistry
+from a2a_service.scheduler import TaskScheduler
 from a2a_service.types import (
     TaskState,
     Message,
@@ -19,80 +28,297 @@ from a2a_service.types import (
     InternalError,
     InvalidParamsError,
     JSONRPCResponse,
-    TextPart
+    TextPart,
+    FilePart,
+    DataPart,
 )
-from a2a_service.task_managers import InMemoryTaskManager
+from a2a_service.task_managers import InMemoryTaskManager, IN_FLIGHT_STATES
 
 
 class AgentTaskManager(InMemoryTaskManager):
-    def __init__(self, agent: Agent):
+    # A retried send for a task running in another process polls the store this often
+    ATTACH_POLL_INTERVAL = 0.5
+    # and gives up after this long, returning the task as it then stands
+    ATTACH_TIMEOUT = 600.0
+
+    def __init__(
+        self,
+        agent: Union[Agent, AgentRegistry],
+        max_concurrent_runs: Optional[int] = None,
+        file_store: Optional[FileStore] = None,
+        scheduler: Optional[TaskScheduler] = None,
+    ):
         super().__init__()
         self.agent = agent
+        # Inline file parts are moved here and replaced by references, if configured
+        self.file_store = file_store
         self.logger = logging.getLogger(__name__)
 
+        # Concurrency limit for agent runs; excess runs wait for a free slot, which the
+        # scheduler hands out by priority class and caller
+        self.scheduler = scheduler or TaskScheduler(max_concurrent_runs)
+        self.max_concurrent_runs = self.scheduler.max_concurrent
+
+        # Runs executing in this process, set when they finish, so retried sends can attach
+        self.active_runs: Dict[str, asyncio.Event] = {}
+        # Tasks of active_runs that publish their progress as SSE events
+        self.streaming_runs: Set[str] = set()
+
+    @asynccontextmanager
+    async def _agent_run(self, task_send_params: TaskSendParams):
+        """Holds a concurrency slot, granted by the scheduler for the task's priority class, while an agent run executes."""
+        metadata = task_send_params.metadata or {}
+        priority_class = self.scheduler.classify(
+            self._get_principal(task_send_params), self._get_skill_id(task_send_params), metadata.get("priority")
+        )
+        async with self.scheduler.slot(priority_class, self._get_caller(task_send_params)):
+            yield
+
+    @property
+    def in_flight_runs(self) -> int:
+        return self.scheduler.running
+
+    @property
+    def waiting_runs(self) -> int:
+        return sum(c.waiting for c in self.scheduler.classes.values())
+
+    def capacity_status(self) -> Dict[str, Any]:
+        """Reports in-flight agent runs against the concurrency limit."""
+        saturated = (
+            self.max_concurrent_runs is not None
+            and self.in_flight_runs >= self.max_concurrent_runs
+        )
+        return {
+            "ok": not saturated,
+            "in_flight": self.in_flight_runs,
+            "waiting": self.waiting_runs,
+            "limit": self.max_concurrent_runs,
+            "classes": self.scheduler.status(),
+        }
+
+    async def health_status(self) -> Dict[str, Dict[str, Any]]:
+        """Checks the components this task manager depends on."""
+        def check_checkpointer():
+            return {"type": type(get_checkpointer()).__name__}
+
+        return {
+            "agent": {"ok": self.is_ready()},
+            "checkpointer": await run_check(check_checkpointer),
+            "capacity": self.capacity_status(),
+        }
+
+    def is_ready(self) -> bool:
+        """Whether the agent is ready to serve requests."""
+        return self.agent.is_ready
+
+    def _start_run(self, task_id: str, streaming: bool = False):
+        """Registers a run executing in this process."""
+        self.active_runs[task_id] = asyncio.Event()
+        if streaming:
+            self.streaming_runs.add(task_id)
+
+    def _finish_run(self, task_id: str):
+        """Unregisters a run and wakes the sends waiting for it."""
+        self.streaming_runs.discard(task_id)
+        done = self.active_runs.pop(task_id, None)
+        if done is not None:
+            done.set()
+
+    async def _wait_for_task(self, task: Task) -> Task:
+        """Waits until a task's run has finished and returns the stored task.
+
+        Runs in this process are awaited directly; runs in other processes sharing the
+        task store are polled until they finish or ATTACH_TIMEOUT passes.
+        """
+        done = self.active_runs.get(task.id)
+        if done is not None:
+            await done.wait()
+            return await self.get_task(task.id) or task
+
+        deadline = time.monotonic() + self.ATTACH_TIMEOUT
+        while task.status.state in IN_FLIGHT_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(self.ATTACH_POLL_INTERVAL)
+            task = await self.get_task(task.id) or task
+        return task
+
+    def _send_stream_snapshot(self, task: Task, queue: asyncio.Queue):
+        """Sends a subscriber attaching to a run streaming in this process the answer so far.
+
+        Must be called without yielding to the event loop after the subscriber's queue was
+        set up, so the run's following events continue exactly where the snapshot ends.
+        """
+        assembler = self.artifact_chunks.get(task.id)
+        for artifact in assembler.snapshot() if assembler else []:
+            queue.put_nowait(TaskArtifactUpdateEvent(id=task.id, artifact=artifact))
+        queue.put_nowait(TaskStatusUpdateEvent(id=task.id, status=task.status, final=False))
+
+    async def _replay_task(self, task: Task, queue: asyncio.Queue):
+        """Sends a subscriber attaching to an existing task its stored artifacts and status once its run has finished."""
+        task = await self._wait_for_task(task)
+        for artifact in task.artifacts or []:
+            await queue.put(TaskArtifactUpdateEvent(id=task.id, artifact=artifact))
+        await queue.put(TaskStatusUpdateEvent(id=task.id, status=task.status, final=True))
+
+    async def warm_up(self):
+        """Compiles the agent graph in a worker thread so the event loop stays responsive."""
+        try:
+            await asyncio.to_thread(self.agent.warm_up)
+            self.logger.info("Agent warm-up completed")
+        except Exception as e:
+            self.logger.error(f"Agent warm-up failed: {e}")
+
     async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
         """Runs the agent in streaming mode and updates the task status and artifacts."""
         task_send_params: TaskSendParams = request.params
-        query = self._get_user_query(task_send_params)
+        query = self._get_agent_query(task_send_params)
+
+        # Answer text already sent to the client as artifact chunks
+        streamed: List[str] = []
 
         try:
-            async for item in self.agent.stream(query, task_send_params.sessionId):
-                is_task_complete = item["is_task_complete"]
-                require_user_input = item["require_user_input"]
-                artifact = None
-                message = None
-                # Convert raw content to TextPart for Message, keep as dict for Artifact
-                content_text = item["content"]
-                text_parts_for_message = [TextPart(text=content_text)]
-                parts_for_artifact = [{"type": "text", "text": content_text}]
-                end_stream = False
-
-                if not is_task_complete and not require_user_input:
-                    # Agent is still working
-                    task_state = TaskState.WORKING
-                    message = Message(role="agent", parts=text_parts_for_message)
-                elif require_user_input:
-                    # Agent needs more input from the user
-                    task_state = TaskState.INPUT_REQUIRED
-                    message = Message(role="agent", parts=text_parts_for_message)
-                    end_stream = True
-                else:
-                    # Agent has completed the task
-                    task_state = TaskState.COMPLETED
-                    # Make sure we use dictionaries for parts, not TextPart objects
-                    artifact = Artifact(parts=parts_for_artifact, index=0, append=False)
-                    end_stream = True
-
-                task_status = TaskStatus(state=task_state, message=message)
-                latest_task = await self.update_store(
-                    task_send_params.id,
-                    task_status,
-                    None if artifact is None else [artifact],
-                )
+            async with self._agent_run(task_send_params):
+                async for item in self.agent.stream(
+                    query, task_send_params.sessionId, self._get_skill_id(task_send_params), task_send_params.id
+                ):
+                    if item.get("is_chunk"):
+                        # Deliver the answer progressively; the store merges the chunks
+                        artifact = Artifact(
+                            parts=[TextPart(text=item["content"])],
+                            index=0,
+                            append=bool(streamed),
+                            lastChunk=False,
+                        )
+                        streamed.append(item["content"])
+                        await self.append_artifact_chunk(task_send_params.id, artifact)
+                        await self.enqueue_events_for_sse(
+                            task_send_params.id, TaskArtifactUpdateEvent(id=task_send_params.id, artifact=artifact)
+                        )
+                        continue
+
+                    is_task_complete = item["is_task_complete"]
+                    require_user_input = item["require_user_input"]
+                    artifact = None
+                    stored_artifact = None
+                    message = None
+                    # Convert raw content to TextPart for Message
+                    content_text = item["content"]
+                    text_parts_for_message = [TextPart(text=content_text)]
+                    end_stream = False
+
+                    if not is_task_complete and not require_user_input:
+                        # Agent is still working
+                        task_state = TaskState.WORKING
+                        message = Message(role="agent", parts=text_parts_for_message)
+                    elif require_user_input:
+                        # Agent needs more input from the user
+                        task_state = TaskState.INPUT_REQUIRED
+                        message = Message(role="agent", parts=text_parts_for_message)
+                        end_stream = True
+                        if streamed:
+                            # Close the streamed artifact; the answer itself is in the status message
+                            artifact = self._last_artifact_chunk(content_text, streamed)
+                            self.discard_artifact_chunks(task_send_params.id)
+                    else:
+                        # Agent has completed the task
+                        task_state = TaskState.COMPLETED
+                        artifact = self._last_artifact_chunk(content_text, streamed)
+                        # Stored as a single artifact with all chunks merged
+                        stored_artifact = await self.append_artifact_chunk(task_send_params.id, artifact)
+                        end_stream = True
 
-                # If there's an artifact, send it as an event
-                if artifact:
-                    task_artifact_update_event = TaskArtifactUpdateEvent(
-                        id=task_send_params.id, artifact=artifact
+                    task_status = TaskStatus(state=task_state, message=message)
+                    latest_task = await self.update_store(
+                        task_send_params.id,
+                        task_status,
+                        None if stored_artifact is None else [stored_artifact],
                     )
-                    await self.enqueue_events_for_sse(
-                        task_send_params.id, task_artifact_update_event
-                    )                    
+
+                    # If there's an artifact, send it as an event
+                    if artifact:
+                        task_artifact_update_event = TaskArtifactUpdateEvent(
+                            id=task_send_params.id, artifact=artifact
+                        )
+                        await self.enqueue_events_for_sse(
+                            task_send_params.id, task_artifact_update_event
+                        )                    
                 
-                # Send status update event
-                task_update_event = TaskStatusUpdateEvent(
-                    id=task_send_params.id, status=task_status, final=end_stream
-                )
-                await self.enqueue_events_for_sse(
-                    task_send_params.id, task_update_event
-                )
+                    # Send status update event
+                    task_update_event = TaskStatusUpdateEvent(
+                        id=task_send_params.id, status=task_status, final=end_stream
+                    )
+                    await self.enqueue_events_for_sse(
+                        task_send_params.id, task_update_event
+                    )
 
         except Exception as e:
             self.logger.error(f"An error occurred while streaming the response: {e}")
+            self.discard_artifact_chunks(task_send_params.id)
             await self.enqueue_events_for_sse(
                 task_send_params.id,
                 InternalError(message=f"An error occurred while streaming the response: {e}")                
             )
+            task_status = await self._fail_task(task_send_params.id, e)
+            await self.enqueue_events_for_sse(
+                task_send_params.id,
+                TaskStatusUpdateEvent(id=task_send_params.id, status=task_status, final=True),
+            )
+        finally:
+            self._finish_run(task_send_params.id)
+
+    async def _fail_task(self, task_id: str, error: Exception) -> TaskStatus:
+        """Marks a task as failed, so a retried send runs it again."""
+        task_status = TaskStatus(
+            state=TaskState.FAILED,
+            message=Message(role="agent", parts=[TextPart(text=f"Error invoking agent: {error}")]),
+        )
+        await self.update_store(task_id, task_status, None)
+        return task_status
+
+    async def resume_task(self, orphan: Dict[str, Any]):
+        """Finishes a task whose run was orphaned, e.g. by a crash, as taken over by claim_orphaned_tasks.
+
+        The run continues from the agent's last checkpoint, so model and tool calls it
+        completed are not made again. Without a checkpoint of the task's run the task
+        fails, and a retried send starts it over.
+        """
+        task_id = orphan["id"]
+        self._start_run(task_id)
+        try:
+            params = TaskSendParams(
+                id=task_id,
+                sessionId=orphan["session_id"],
+                message=Message.model_validate(orphan["message"]) if orphan.get("message") else None,
+                metadata={"skill_id": orphan["skill_id"]} if orphan.get("skill_id") else None,
+            )
+            async with self._agent_run(params):
+                agent_response = await asyncio.to_thread(
+                    self.agent.resume, task_id, params.sessionId, self._get_skill_id(params)
+                )
+            if agent_response is None:
+                await self._fail_task(task_id, RuntimeError("the run was interrupted before its first checkpoint"))
+                outcome = "failed"
+            else:
+                await self._process_agent_response(SendTaskRequest(id=task_id, params=params), agent_response)
+                outcome = "resumed"
+        except Exception as e:
+            self.logger.error(f"Recovering task {task_id} failed: {e}")
+            await self._fail_task(task_id, e)
+            outcome = "failed"
+        finally:
+            self._finish_run(task_id)
+        self.logger.info(f"Recovered orphaned task {task_id}: {outcome}")
+        metrics.inc("a2a_tasks_recovered_total", help="Orphaned tasks taken over from a stopped process", outcome=outcome)
+
+    def _last_artifact_chunk(self, content: str, streamed: List[str]) -> Artifact:
+        """Returns the chunk that completes the answer artifact.
+
+        The final answer usually extends the streamed text, so only the rest is sent.
+        Otherwise (e.g. a structured response that rephrased it) it replaces the artifact.
+        """
+        streamed_text = "".join(streamed)
+        if streamed_text and content.startswith(streamed_text):
+            return Artifact(parts=[TextPart(text=content[len(streamed_text):])], index=0, append=True, lastChunk=True)
+        return Artifact(parts=[TextPart(text=content)], index=0, append=False, lastChunk=True)
 
     def _validate_request(
         self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
@@ -125,54 +351,83 @@ class AgentTaskManager(InMemoryTaskManager):
             id=request_id, 
             error=InvalidParamsError(message="Incompatible content types")
         )
+
+    async def _store_files(
+        self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
+    ) -> JSONRPCResponse | None:
+        """Moves inline file bytes of the task message into the file store."""
+        if not self.file_store:
+            return None
+        try:
+            await asyncio.to_thread(self.file_store.ingest_message, request.params.message)
+        except ValueError as e:
+            return JSONRPCResponse(id=request.id, error=InvalidParamsError(message=str(e)))
+        return None
         
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
         """Handles the 'send task' request."""
-        validation_error = self._validate_request(request)
+        validation_error = self._validate_request(request) or await self._store_files(request)
         if validation_error:
             return SendTaskResponse(id=request.id, error=validation_error.error)
 
-        await self.upsert_task(request.params)
-        task = await self.update_store(
-            request.params.id, TaskStatus(state=TaskState.WORKING), None
-        )
-
         task_send_params: TaskSendParams = request.params
-        query = self._get_user_query(task_send_params)
-        self.logger.info(f"Extracted query for agent: '{query}'")
-        
-        if not query:
-            self.logger.warning("Empty query extracted, setting to default")
-            query = "Hello"
-        
+        # A retry of a send that already started a run gets that run's result
+        claimed, existing_task = await self.claim_task(task_send_params)
+        if not claimed:
+            self.logger.info(f"Task {task_send_params.id} was already submitted, attaching to its run")
+            return SendTaskResponse(id=request.id, result=await self._wait_for_task(existing_task))
+
+        self._start_run(task_send_params.id)
         try:
-            self.logger.info(f"Invoking agent with query: '{query}' and session: {task_send_params.sessionId}")
-            agent_response = self.agent.invoke(query, task_send_params.sessionId)
-            self.logger.info(f"Agent response: {agent_response}")
-        except Exception as e:
-            self.logger.error(f"Error invoking agent: {e}")
-            return SendTaskResponse(
-                id=request.id,
-                error=InternalError(message=f"Error invoking agent: {e}")
-            )
-            
-        return await self._process_agent_response(request, agent_response)
+            query = self._get_agent_query(task_send_params)
+
+            try:
+                self.logger.info(f"Invoking agent with query: '{query}' and session: {task_send_params.sessionId}")
+                # Run the blocking graph invocation off the event loop so health probes stay responsive
+                async with self._agent_run(task_send_params):
+                    agent_response = await asyncio.to_thread(
+                        self.agent.invoke,
+                        query,
+                        task_send_params.sessionId,
+                        self._get_skill_id(task_send_params),
+                        task_send_params.id,
+                    )
+                self.logger.info(f"Agent response: {agent_response}")
+            except Exception as e:
+                self.logger.error(f"Error invoking agent: {e}")
+                await self._fail_task(task_send_params.id, e)
+                return SendTaskResponse(
+                    id=request.id,
+                    error=InternalError(message=f"Error invoking agent: {e}")
+                )
+
+            return await self._process_agent_response(request, agent_response)
+        finally:
+            self._finish_run(task_send_params.id)
 
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         """Handles the 'send task subscribe' request for streaming responses."""
         try:
-            error = self._validate_request(request)
+            error = self._validate_request(request) or await self._store_files(request)
             if error:
                 return error
 
-            await self.upsert_task(request.params)
-
             task_send_params: TaskSendParams = request.params
-            sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)            
+            claimed, existing_task = await self.claim_task(task_send_params)
+            sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)
 
-            asyncio.create_task(self._run_streaming_agent(request))
+            if claimed:
+                self._start_run(task_send_params.id, streaming=True)
+                asyncio.create_task(self._run_streaming_agent(request))
+            else:
+                # A retry subscribes to the existing run instead of starting another
+                self.logger.info(f"Task {task_send_params.id} was already submitted, attaching to its run")
+                if task_send_params.id in self.streaming_runs:
+                    self._send_stream_snapshot(existing_task, sse_event_queue)
+                else:
+                    asyncio.create_task(self._replay_task(existing_task, sse_event_queue))
 
             return self.dequeue_events_for_sse(
                 request.id, task_send_params.id, sse_event_queue
@@ -223,6 +478,40 @@ class AgentTaskManager(InMemoryTaskManager):
             }
         )
 
+    def _get_principal(self, task_send_params: TaskSendParams) -> Optional[str]:
+        """Returns the authenticated caller of a task, if known."""
+        return current_principal.get()
+
+    def _get_caller(self, task_send_params: TaskSendParams) -> str:
+        """Returns the key runs are shared fairly by within a priority class: the caller, else the session."""
+        return self._get_principal(task_send_params) or task_send_params.sessionId or task_send_params.id
+
+    def _get_skill_id(self, task_send_params: TaskSendParams) -> Optional[str]:
+        """Extracts the requested skill id from the task metadata, if any."""
+        metadata = task_send_params.metadata or {}
+        return metadata.get("skill_id") or metadata.get("skillId")
+
+    def _describe_part(self, part: Union[FilePart, DataPart]) -> str:
+        """Describes a file or data part for the agent, referring to files by URI rather than content."""
+        if isinstance(part, DataPart):
+            return f"Attached data:\n{json.dumps(part.data)}"
+        file = part.file
+        size = (part.metadata or {}).get("size")
+        details = [file.mimeType, f"{size} bytes" if size is not None else None]
+        label = f"Attached file {file.name}" if file.name else "Attached file"
+        if any(details):
+            label += f" ({', '.join(d for d in details if d)})"
+        return f"{label}: {file.uri or 'inline content, not stored'}"
+
+    def _get_agent_query(self, task_send_params: TaskSendParams) -> str:
+        """Returns the query an agent run is started with: the user query, or a greeting if it is empty."""
+        query = self._get_user_query(task_send_params)
+        self.logger.info(f"Extracted query for agent: '{query}'")
+        if not query:
+            self.logger.warning("Empty query extracted, setting to default")
+            query = "Hello"
+        return query
+
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
         """Extracts the user query from the task parameters."""
         self.logger.info(f"Extracting query from task params: {task_send_params.__dict__}")
@@ -245,14 +534,16 @@ class AgentTaskManager(InMemoryTaskManager):
                     return text
         # Handle case where message is a Message object with parts attribute
         elif hasattr(task_send_params.message, "parts"):
-            parts = task_send_params.message.parts # parts is List[TextPart] here
+            parts = task_send_params.message.parts
             self.logger.info(f"Found message parts (object): {parts}")
-            
-            for part_obj in parts: # renamed part to part_obj
-                if part_obj.type == "text": # part_obj is a TextPart object
-                    text = part_obj.text
-                    self.logger.info(f"Extracted text from part: {text}")
-                    return text
+
+            # Text parts are the query; file and data parts are passed along with it
+            texts = [part.text for part in parts if isinstance(part, TextPart)]
+            attachments = [self._describe_part(part) for part in parts if not isinstance(part, TextPart)]
+            text = "\n\n".join(texts + attachments)
+            if text:
+                self.logger.info(f"Extracted text from parts: {text}")
+                return text
                     
         self.logger.warning("No text parts found in message")
         return "" 
\ No newline at end of file
@@ -1,23 +1,93 @@
+import asyncio
+import base64
+import json
 import logging
-from typing import List, Any, Dict
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from typing import List, Any, Dict, Iterator, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from a2a_service.task_managers import IN_FLIGHT_STATES, is_duplicate_submission
 from a2a_service.task_managers.async_inmem_task_manager import AgentTaskManager
-from a2a_service.database import SessionLocal
-from a2a_service.models.db_models import TaskModel, ArtifactModel
-from a2a_service.types import Task, TaskStatus, Artifact, Message, TextPart, TaskState
+from a2a_service.compression import StorageCodec, load_payload
+from a2a_service.database import SessionLocal, check_database
+from a2a_service.files import FileStore
+from a2a_service.health import run_check
+from a2a_service.models.db_models import IN_FLIGHT, TaskModel, ArtifactModel
+from a2a_service.scheduler import TaskScheduler
+from a2a_service.types import Task, TaskStatus, Artifact, Message, TextPart, FilePart, DataPart, Part, TaskState
+
+_part_adapter: TypeAdapter[Part] = TypeAdapter(Part)
+
+
+def _encode_cursor(created_at: datetime, task_id: str) -> str:
+    """Encode a keyset position as an opaque cursor string."""
+    raw = json.dumps([created_at.isoformat(), task_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by _encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(task_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
 
 
 class DatabaseTaskManager(AgentTaskManager):
     """Task manager that persists tasks and artifacts using SQLAlchemy."""
 
-    def __init__(self, agent):
-        super().__init__(agent)
+    def __init__(
+        self,
+        agent,
+        max_concurrent_runs: Optional[int] = None,
+        file_store: Optional[FileStore] = None,
+        storage_codec: Optional[StorageCodec] = None,
+        scheduler: Optional[TaskScheduler] = None,
+        lease_ttl: float = 30.0,
+    ):
+        super().__init__(agent, max_concurrent_runs=max_concurrent_runs, file_store=file_store, scheduler=scheduler)
         self.logger = logging.getLogger(__name__)
+        # Compresses large messages and artifact parts, if configured
+        self.storage_codec = storage_codec
+        # Runs started here hold a lease on their task for lease_ttl seconds, renewed while
+        # they run; other processes take over tasks whose lease has expired
+        self.lease_ttl = lease_ttl
+        self.lease_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_ttl)
+
+    def _encode_payload(self, value: Any) -> Tuple[Any, Optional[bytes]]:
+        """Split a payload into its (JSON column, blob column) values."""
+        if self.storage_codec is None:
+            return value, None
+        return self.storage_codec.encode(value)
+
+    def _set_message(self, db_task: TaskModel, msg_json: Any, input_message: bool = False):
+        """Store a task's message, and optionally its input message, compressed if large."""
+        db_task.message, db_task.message_blob = self._encode_payload(msg_json)
+        if input_message:
+            db_task.input_message, db_task.input_message_blob = db_task.message, db_task.message_blob
+
+    async def health_status(self) -> Dict[str, Dict[str, Any]]:
+        """Checks the agent components and the database connection pool."""
+        status = await super().health_status()
+        status["database"] = await run_check(check_database)
+        return status
 
     def _convert_part_to_dict(self, part: Any) -> Dict:
-        """Convert a TextPart object to a dictionary that can be serialized to JSON."""
+        """Convert a part object to a dictionary that can be serialized to JSON."""
         if isinstance(part, TextPart):
             return {"type": "text", "text": part.text, "metadata": part.metadata}
+        elif isinstance(part, (FilePart, DataPart)):
+            # File parts carry a URI here once the file store has taken their bytes
+            return part.model_dump(mode="json", exclude_none=True)
         elif isinstance(part, dict):
             return part
         else:
@@ -29,35 +99,222 @@ class DatabaseTaskManager(AgentTaskManager):
         """Convert a list of parts to a list of dictionaries for database storage."""
         return [self._convert_part_to_dict(part) for part in parts]
 
+    def _message_from_db(self, data: Any, task_id: str) -> Optional[Message]:
+        """Rebuild a Message from its stored JSON, skipping parts that no longer validate."""
+        if not (data and isinstance(data, dict) and 'parts' in data and 'role' in data):
+            return None
+        try:
+            reconstructed_parts = []
+            for p in data['parts']:
+                try:
+                    reconstructed_parts.append(_part_adapter.validate_python(p))
+                except ValidationError:
+                    self.logger.warning(f"Skipping invalid stored part for task {task_id}: {p}")
+            if reconstructed_parts:
+                return Message(role=data['role'], parts=reconstructed_parts)
+            self.logger.warning(f"Could not reconstruct message parts from DB for task {task_id}")
+        except Exception as e:
+            self.logger.error(f"Error reconstructing message from DB for task {task_id}: {e}")
+        return None
+
+    def iter_session_history(
+        self,
+        session_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        history_length: Optional[int] = None,
+    ) -> Iterator[Tuple[Task, str]]:
+        """Iterate over a page of a session's tasks, newest first.
+
+        Uses keyset pagination on (session_id, created_at, id), so every page is an
+        index range scan regardless of how deep into the session it starts. The key never
+        changes once a task is created, so tasks updated while a client pages through the
+        session are neither repeated nor skipped. Rows are
+        fetched in small batches and yielded as they arrive rather than loaded as a list.
+
+        Args:
+            session_id: The session to read.
+            limit: Maximum number of tasks in the page.
+            cursor: Cursor of the last task of the previous page, if any.
+            history_length: Maximum number of messages to include in each task's history.
+
+        Returns:
+            An iterator of (task, cursor) pairs; the cursor of the last pair fetches the next page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        position = _decode_cursor(cursor) if cursor else None
+        return self._iter_session_rows(session_id, limit, position, history_length)
+
+    def _iter_session_rows(
+        self,
+        session_id: str,
+        limit: int,
+        position: Optional[Tuple[datetime, str]],
+        history_length: Optional[int],
+    ) -> Iterator[Tuple[Task, str]]:
+        db: Session = SessionLocal()
+        try:
+            query = db.query(TaskModel).filter(TaskModel.session_id == session_id)
+            if position:
+                query = query.filter(tuple_(TaskModel.created_at, TaskModel.id) < tuple_(*position))
+            query = (
+                query.order_by(TaskModel.created_at.desc(), TaskModel.id.desc())
+                     .limit(limit)
+                     .yield_per(100)
+            )
+
+            for db_task in query:
+                # Compressed payloads are only decoded here, when a task is read
+                task = self._history_task(
+                    db_task.id,
+                    db_task.session_id,
+                    db_task.state,
+                    load_payload(db_task.message, db_task.message_blob),
+                    load_payload(db_task.input_message, db_task.input_message_blob),
+                    db_task.updated_at,
+                    history_length,
+                )
+                yield task, _encode_cursor(db_task.created_at, db_task.id)
+        finally:
+            db.close()
+
+    def _history_task(
+        self,
+        task_id: str,
+        session_id: str,
+        state: str,
+        message: Any,
+        input_message: Any,
+        updated_at: datetime,
+        history_length: Optional[int],
+    ) -> Task:
+        """Build a session history entry from a task's stored messages."""
+        history = [
+            msg for msg in (
+                self._message_from_db(input_message, task_id),
+                self._message_from_db(message, task_id) if message != input_message else None,
+            )
+            if msg is not None
+        ]
+        if history_length is not None:
+            history = history[-history_length:] if history_length > 0 else []
+
+        return Task(
+            id=task_id,
+            sessionId=session_id,
+            status=TaskStatus(
+                state=state,
+                message=self._message_from_db(message, task_id),
+                timestamp=updated_at,
+            ),
+            history=history,
+        )
+
+    def _input_message_json(self, task_params) -> Optional[Dict]:
+        """Extract the user message of a send request as stored JSON."""
+        if not (hasattr(task_params, 'message') and task_params.message):
+            return None
+        raw_msg = task_params.message
+        if isinstance(raw_msg, dict):
+            return raw_msg
+        elif isinstance(raw_msg, Message):
+            return {"role": raw_msg.role, "parts": self._prepare_parts_for_db(raw_msg.parts)}
+        self.logger.warning(f"Unexpected message type in task params: {type(raw_msg)}")
+        return None
+
+    def _start_task(self, db: Session, db_task: Optional[TaskModel], task_params, msg_json: Optional[Dict]):
+        """Create the task row, or reset an existing one, for a new run."""
+        if db_task:
+            db_task.session_id = task_params.sessionId
+            db_task.state = TaskState.WORKING
+        else:
+            db_task = TaskModel(
+                id=task_params.id,
+                session_id=task_params.sessionId,
+                state=TaskState.WORKING,
+            )
+            db.add(db_task)
+        self._set_message(db_task, msg_json, input_message=True)
+        db_task.skill_id = self._get_skill_id(task_params)
+        db_task.lease_owner = self.lease_owner
+        db_task.lease_expires_at = self._lease_expiry()
+
+    def _load_artifacts(self, db: Session, task_id: str) -> List[Artifact]:
+        """Load a task's artifacts in insertion order."""
+        db_artifacts = (
+            db.query(ArtifactModel)
+              .filter_by(task_id=task_id)
+              .order_by(ArtifactModel.id)
+              .all()
+        )
+        return [
+            Artifact(parts=load_payload(db_art.parts, db_art.parts_blob), index=db_art.index, append=db_art.append)
+            for db_art in db_artifacts
+        ]
+
+    def _task_from_db(self, db: Session, db_task: TaskModel) -> Task:
+        """Build the Task of a row, with its status message and artifacts."""
+        message = self._message_from_db(load_payload(db_task.message, db_task.message_blob), db_task.id)
+        return Task(
+            id=db_task.id,
+            sessionId=db_task.session_id,
+            status=TaskStatus(state=db_task.state, message=message, timestamp=db_task.updated_at),
+            artifacts=self._load_artifacts(db, db_task.id),
+        )
+
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        """Return a stored task, or None if it does not exist."""
+        return await asyncio.to_thread(self._load_task, task_id)
+
+    def _load_task(self, task_id: str) -> Optional[Task]:
+        db: Session = SessionLocal()
+        try:
+            db_task = db.get(TaskModel, task_id)
+            return self._task_from_db(db, db_task) if db_task else None
+        finally:
+            db.close()
+
+    async def claim_task(self, task_params) -> Tuple[bool, Optional[Task]]:
+        """Start a run for a send request unless the task was already submitted.
+
+        The tasks row is the deduplication record: the row is locked while it is
+        checked, and of two concurrent first submissions only one can insert it.
+        Waiting for the lock happens in a worker thread, not on the event loop.
+        """
+        return await asyncio.to_thread(self._claim_task, task_params)
+
+    def _claim_task(self, task_params) -> Tuple[bool, Optional[Task]]:
+        msg_json = self._input_message_json(task_params)
+        db: Session = SessionLocal()
+        try:
+            db_task = db.query(TaskModel).filter_by(id=task_params.id).with_for_update().one_or_none()
+            if db_task is not None:
+                stored_input = load_payload(db_task.input_message, db_task.input_message_blob)
+                if is_duplicate_submission(db_task.state, stored_input, msg_json):
+                    return False, self._task_from_db(db, db_task)
+            self._start_task(db, db_task, task_params, msg_json)
+            db.commit()
+            return True, None
+        except IntegrityError:
+            # A concurrent submission of the same task inserted the row first
+            db.rollback()
+            return False, self._task_from_db(db, db.get(TaskModel, task_params.id))
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     async def upsert_task(self, task_params):
         """Create or update a task record in the database."""
+        await asyncio.to_thread(self._upsert_task, task_params)
+
+    def _upsert_task(self, task_params):
         db: Session = SessionLocal()
         try:
-            db_task = db.get(TaskModel, task_params.id)
-            # Extract initial user message if present
-            msg_json = None
-            if hasattr(task_params, 'message') and task_params.message:
-                raw_msg = task_params.message
-                if isinstance(raw_msg, dict):
-                    msg_json = raw_msg
-                elif isinstance(raw_msg, Message):
-                    msg_json = {"role": raw_msg.role, "parts": [{"type": "text", "text": part.text} for part in raw_msg.parts]}
-                else:
-                    self.logger.warning(f"Unexpected message type in upsert_task: {type(raw_msg)}")
-                    msg_json = None
-
-            if db_task:
-                db_task.session_id = task_params.sessionId
-                db_task.state = TaskState.WORKING
-                db_task.message = msg_json
-            else:
-                db_task = TaskModel(
-                    id=task_params.id,
-                    session_id=task_params.sessionId,
-                    state=TaskState.WORKING,
-                    message=msg_json
-                )
-                db.add(db_task)
+            self._start_task(db, db.get(TaskModel, task_params.id), task_params, self._input_message_json(task_params))
             db.commit()
         except Exception:
             db.rollback()
@@ -65,88 +322,151 @@ class DatabaseTaskManager(AgentTaskManager):
         finally:
             db.close()
 
+    def _status_message_json(self, task_status: TaskStatus, artifacts: Optional[List[Artifact]]) -> Optional[Dict]:
+        """Determine the message to store: the status message, or else the latest artifact."""
+        if task_status.message:
+            return {
+                "role": task_status.message.role,
+                "parts": self._prepare_parts_for_db(task_status.message.parts)
+            }
+        elif artifacts:
+            # Use last artifact as message
+            last_art = artifacts[-1]
+            return {
+                "role": "agent",
+                "parts": self._prepare_parts_for_db(last_art.parts)
+            }
+        return None
+
     async def update_store(self, task_id: str, task_status: TaskStatus, artifacts: List[Artifact] = None) -> Task:
         """Update task status and artifacts in the database and return the updated Task."""
+        return await asyncio.to_thread(self._update_task, task_id, task_status, artifacts)
+
+    def _update_task(self, task_id: str, task_status: TaskStatus, artifacts: Optional[List[Artifact]]) -> Task:
         db: Session = SessionLocal()
         try:
             # Update or insert task record
             db_task = db.get(TaskModel, task_id)
 
-            # Determine message to store: use TaskStatus.message or fallback to latest artifact
-            if task_status.message:
-                msg_json = {
-                    "role": task_status.message.role,
-                    "parts": [{"type": "text", "text": part.text} for part in task_status.message.parts]
-                }
-            elif artifacts:
-                # Use last artifact as message
-                last_art = artifacts[-1]
-                msg_json = {
-                    "role": "agent",
-                    "parts": self._prepare_parts_for_db(last_art.parts)
-                }
-            else:
-                msg_json = None
+            msg_json = self._status_message_json(task_status, artifacts)
 
             if not db_task:
                 db_task = TaskModel(
                     id=task_id,
                     session_id="",
                     state=task_status.state,
-                    message=msg_json
                 )
                 db.add(db_task)
             else:
                 db_task.state = task_status.state
-                db_task.message = msg_json
+            self._set_message(db_task, msg_json)
+            if task_status.state not in IN_FLIGHT_STATES:
+                # The run is over; nothing is left to recover
+                db_task.lease_owner = None
+                db_task.lease_expires_at = None
 
             # Insert artifacts
             if artifacts:
                 for art in artifacts:
+                    parts, parts_blob = self._encode_payload(self._prepare_parts_for_db(art.parts))
                     db_art = ArtifactModel(
                         task_id=task_id,
                         index=art.index,
                         append=art.append,
-                        parts=self._prepare_parts_for_db(art.parts)
+                        parts=parts,
+                        parts_blob=parts_blob,
                     )
                     db.add(db_art)
 
             db.commit()
 
             # Load all artifacts for this task
-            db_artifacts = (
-                db.query(ArtifactModel)
-                  .filter_by(task_id=task_id)
-                  .order_by(ArtifactModel.id)
-                  .all()
-            )
-            # Map to Pydantic artifacts
-            py_artifacts: List[Artifact] = [
-                Artifact(parts=db_art.parts, index=db_art.index, append=db_art.append)
-                for db_art in db_artifacts
-            ]
+            py_artifacts = self._load_artifacts(db, task_id)
 
             # Construct TaskStatus
-            reconstructed_message_object = None
-            if db_task.message and isinstance(db_task.message, dict) and 'parts' in db_task.message and 'role' in db_task.message:
-                try:
-                    reconstructed_parts = [TextPart(text=p['text']) for p in db_task.message['parts'] if p.get('type') == 'text' and 'text' in p]
-                    if reconstructed_parts:
-                         reconstructed_message_object = Message(role=db_task.message['role'], parts=reconstructed_parts)
-                    else:
-                        self.logger.warning(f"Could not reconstruct message parts from DB for task {task_id}")
-                except Exception as e:
-                    self.logger.error(f"Error reconstructing message from DB for task {task_id}: {e}")
-
-            final_message_for_status = reconstructed_message_object
-            if task_status.message and not reconstructed_message_object: 
-                pass
+            final_message_for_status = self._message_from_db(msg_json, task_id)
 
             py_status = TaskStatus(state=db_task.state, message=final_message_for_status)
 
-            return Task(id=task_id, status=py_status, artifacts=py_artifacts)
+            return Task(id=task_id, sessionId=db_task.session_id, status=py_status, artifacts=py_artifacts)
         except Exception:
             db.rollback()
             raise
         finally:
-            db.close() 
\ No newline at end of file
+            db.close()
+
+    async def renew_leases(self, task_ids: List[str]):
+        """Extend this process's leases on the tasks it is running."""
+        if task_ids:
+            await asyncio.to_thread(self._renew_leases, list(task_ids))
+
+    def _renew_leases(self, task_ids: List[str]):
+        db: Session = SessionLocal()
+        try:
+            (
+                db.query(TaskModel)
+                  .filter(TaskModel.id.in_(task_ids), TaskModel.lease_owner == self.lease_owner)
+                  # Heartbeats must not move the task in its session's history
+                  .update(
+                      {TaskModel.lease_expires_at: self._lease_expiry(), TaskModel.updated_at: TaskModel.updated_at},
+                      synchronize_session=False,
+                  )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def claim_orphaned_tasks(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Take over in-flight tasks whose lease has expired, oldest first.
+
+        Tasks without a lease are never taken over: they were started by a version that
+        kept none, which may still be running them during a rolling deploy. SKIP LOCKED
+        lets several processes recover at once without taking over the same task twice.
+        """
+        return await asyncio.to_thread(self._claim_orphaned_tasks, limit)
+
+    def _claim_orphaned_tasks(self, limit: int) -> List[Dict[str, Any]]:
+        db: Session = SessionLocal()
+        try:
+            db_tasks = (
+                db.query(TaskModel)
+                  .filter(IN_FLIGHT)
+                  .filter(TaskModel.lease_expires_at < datetime.now(timezone.utc))
+                  .order_by(TaskModel.updated_at)
+                  .limit(limit)
+                  .with_for_update(skip_locked=True)
+                  .all()
+            )
+            orphans = [
+                {
+                    "id": db_task.id,
+                    "session_id": db_task.session_id,
+                    "message": load_payload(db_task.input_message, db_task.input_message_blob),
+                    "skill_id": db_task.skill_id,
+                    "lease_owner": db_task.lease_owner,
+                }
+                for db_task in db_tasks
+            ]
+            if orphans:
+                (
+                    db.query(TaskModel)
+                      .filter(TaskModel.id.in_([orphan["id"] for orphan in orphans]))
+                      .update(
+                          {
+                              TaskModel.lease_owner: self.lease_owner,
+                              TaskModel.lease_expires_at: self._lease_expiry(),
+                              TaskModel.updated_at: TaskModel.updated_at,
+                          },
+                          synchronize_session=False,
+                      )
+                )
+            db.commit()
+            return orphans
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
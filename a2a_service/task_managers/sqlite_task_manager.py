@@ -0,0 +1,546 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from a2a_service.compression import StorageCodec, load_payload
+from a2a_service.files import FileStore
+from a2a_service.health import run_check
+from a2a_service.metrics import metrics
+from a2a_service.scheduler import TaskScheduler
+from a2a_service.task_managers import is_duplicate_submission
+from a2a_service.task_managers.async_inmem_task_manager import AgentTaskManager
+from a2a_service.task_managers.db_task_manager import DatabaseTaskManager, _encode_cursor
+from a2a_service.types import Artifact, Task, TaskState, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 3
+
+# The same tables and indexes as the Postgres schema. JSON columns hold JSON text, and
+# timestamps fixed-width ISO 8601 UTC text, which sorts in time order.
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        message TEXT,
+        input_message TEXT,
+        message_blob BLOB,
+        input_message_blob BLOB,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        lease_owner TEXT,
+        lease_expires_at TEXT,
+        skill_id TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS artifacts (
+        id INTEGER PRIMARY KEY,
+        task_id TEXT NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+        "index" INTEGER NOT NULL,
+        append INTEGER NOT NULL DEFAULT 0,
+        parts TEXT,
+        parts_blob BLOB,
+        created_at TEXT NOT NULL
+    )
+    """,
+]
+
+# Changes bringing a database of the previous schema version to each version
+MIGRATIONS = {
+    2: [
+        "ALTER TABLE tasks ADD COLUMN lease_owner TEXT",
+        "ALTER TABLE tasks ADD COLUMN lease_expires_at TEXT",
+        "ALTER TABLE tasks ADD COLUMN skill_id TEXT",
+    ],
+    3: ["DROP INDEX IF EXISTS ix_tasks_session_id_updated_at_id"],
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_tasks_session_id_created_at_id ON tasks (session_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_artifacts_task_id_id ON artifacts (task_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_in_flight_lease_expires_at ON tasks (lease_expires_at) "
+    "WHERE state IN ('submitted', 'working')",
+]
+
+# Statements are constants with placeholders, so each connection's statement cache
+# prepares them once
+_SELECT_TASK = "SELECT id, session_id, state, message, message_blob, updated_at FROM tasks WHERE id = ?"
+_SELECT_INPUT = "SELECT state, input_message, input_message_blob FROM tasks WHERE id = ?"
+_SELECT_ARTIFACTS = 'SELECT "index", append, parts, parts_blob FROM artifacts WHERE task_id = ? ORDER BY id'
+_START_TASK = """
+    INSERT INTO tasks (
+        id, session_id, state, message, message_blob, input_message, input_message_blob,
+        created_at, updated_at, lease_owner, lease_expires_at, skill_id
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        session_id = excluded.session_id,
+        state = excluded.state,
+        message = excluded.message,
+        message_blob = excluded.message_blob,
+        input_message = excluded.input_message,
+        input_message_blob = excluded.input_message_blob,
+        updated_at = excluded.updated_at,
+        lease_owner = excluded.lease_owner,
+        lease_expires_at = excluded.lease_expires_at,
+        skill_id = excluded.skill_id
+"""
+# Leases are dropped once the run is over
+_UPDATE_TASK = """
+    INSERT INTO tasks (id, session_id, state, message, message_blob, created_at, updated_at)
+    VALUES (?, '', ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        state = excluded.state,
+        message = excluded.message,
+        message_blob = excluded.message_blob,
+        updated_at = excluded.updated_at,
+        lease_owner = CASE WHEN excluded.state IN ('submitted', 'working') THEN lease_owner END,
+        lease_expires_at = CASE WHEN excluded.state IN ('submitted', 'working') THEN lease_expires_at END
+"""
+_RENEW_LEASE = "UPDATE tasks SET lease_expires_at = ? WHERE id = ? AND lease_owner = ?"
+_SELECT_ORPHANS = """
+    SELECT id, session_id, input_message, input_message_blob, skill_id, lease_owner FROM tasks
+    WHERE state IN ('submitted', 'working') AND lease_expires_at < ?
+    ORDER BY updated_at LIMIT ?
+"""
+_TAKE_OVER = "UPDATE tasks SET lease_owner = ?, lease_expires_at = ? WHERE id = ?"
+_INSERT_ARTIFACT = 'INSERT INTO artifacts (task_id, "index", append, parts, parts_blob, created_at) VALUES (?, ?, ?, ?, ?, ?)'
+_SELECT_SESSION = """
+    SELECT id, session_id, state, message, message_blob, input_message, input_message_blob, created_at, updated_at
+    FROM tasks WHERE session_id = ? ORDER BY created_at DESC, id DESC LIMIT ?
+"""
+_SELECT_SESSION_AFTER = """
+    SELECT id, session_id, state, message, message_blob, input_message, input_message_blob, created_at, updated_at
+    FROM tasks WHERE session_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?
+"""
+
+
+def _timestamp(moment: Optional[datetime] = None) -> str:
+    """Format a moment, by default now, as stored: ISO 8601 UTC with microseconds."""
+    moment = (moment or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, separators=(",", ":"))
+
+
+def _loads(value: Optional[str], blob: Optional[bytes]) -> Any:
+    return load_payload(None if value is None else json.loads(value), blob)
+
+
+class SQLiteWriter:
+    """Runs all writes to a SQLite database on one thread, committing them in batches.
+
+    SQLite allows one writer at a time, so writers on several connections would wait
+    on each other's locks. Here writes are queued to a single connection instead, and
+    whatever has queued up while a transaction was committing goes into the next one,
+    so under load one commit (and one WAL sync) covers many writes. Each write runs in
+    its own savepoint, so a failing write is rolled back alone.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_batch: int = 64):
+        """Start the writer thread.
+
+        Args:
+            connect: Opens a connection to the database.
+            max_batch: Most writes committed in one transaction.
+        """
+        self.max_batch = max_batch
+        self._connect = connect
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting for the writer."""
+        return self._queue.qsize()
+
+    def submit(self, write: Callable[..., Any], *args: Any) -> Future:
+        """Queue a write, called as write(connection, *args) inside a transaction.
+
+        Returns:
+            A future resolved with the write's result once its transaction has committed.
+        """
+        if self._closed:
+            raise RuntimeError("The SQLite writer is closed")
+        future: Future = Future()
+        self._queue.put((future, write, args))
+        return future
+
+    def close(self):
+        """Commit the queued writes and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                batch = [job]
+                stop = False
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stop = True
+                        break
+                    batch.append(job)
+                self._commit(conn, batch)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple[Future, Callable[..., Any], tuple]]):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, write, args in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    results.append((future, write(conn, *args), None))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"SQLite commit of {len(batch)} writes failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, _, _ in batch:
+                future.set_exception(e)
+            return
+        metrics.inc("a2a_sqlite_commits_total", help="Transactions committed by the SQLite writer")
+        metrics.inc("a2a_sqlite_writes_total", len(batch), help="Writes committed by the SQLite writer")
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class SQLiteTaskManager(DatabaseTaskManager):
+    """Task manager that persists tasks and artifacts in an embedded SQLite database.
+
+    For single-node deployments that should not need a database server. The database
+    runs in WAL mode, so reads proceed while a write commits. Writes go through a
+    SQLiteWriter, and reads use a small pool of connections of their own. Stored rows
+    and session cursors are the same as DatabaseTaskManager's.
+    """
+
+    def __init__(
+        self,
+        agent,
+        path: str,
+        max_concurrent_runs: Optional[int] = None,
+        file_store: Optional[FileStore] = None,
+        storage_codec: Optional[StorageCodec] = None,
+        scheduler: Optional[TaskScheduler] = None,
+        synchronous: str = "NORMAL",
+        busy_timeout: float = 5.0,
+        max_batch: int = 64,
+        lease_ttl: float = 30.0,
+    ):
+        """Open the database, creating it and its tables if needed.
+
+        Args:
+            agent: The agent, or registry of agents, running the tasks.
+            path: Database file.
+            max_concurrent_runs: Concurrency limit for agent runs.
+            file_store: Store for files uploaded in task messages.
+            storage_codec: Compresses large messages and artifact parts, if set.
+            scheduler: Hands out agent run slots by priority class.
+            synchronous: SQLite synchronous setting. NORMAL survives process crashes but
+                may lose the last commits on power loss; FULL syncs every commit.
+            busy_timeout: Seconds a connection waits for a lock held by another process.
+            max_batch: Most writes committed in one transaction.
+            lease_ttl: Seconds a run's lease on its task lasts unless renewed.
+        """
+        super().__init__(
+            agent,
+            max_concurrent_runs=max_concurrent_runs,
+            file_store=file_store,
+            storage_codec=storage_codec,
+            scheduler=scheduler,
+            lease_ttl=lease_ttl,
+        )
+        if synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Unsupported SQLite synchronous setting: {synchronous}")
+        self.path = path
+        self.synchronous = synchronous.upper()
+        self.busy_timeout = busy_timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._migrate(conn)
+        finally:
+            conn.close()
+
+        self._readers: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = SQLiteWriter(self._connect, max_batch=max_batch)
+        metrics.gauge_callback(
+            "a2a_sqlite_pending_writes", lambda: self._writer.pending, help="Writes waiting for the SQLite writer"
+        )
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Create the tables, or bring those of an earlier schema version up to date."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version == 0:
+                for statement in TABLES:
+                    conn.execute(statement)
+            else:
+                for target in range(version + 1, SCHEMA_VERSION + 1):
+                    for statement in MIGRATIONS.get(target, []):
+                        conn.execute(statement)
+            for statement in INDEXES:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if version not in (0, SCHEMA_VERSION):
+            logger.info(f"Migrated {self.path} from schema version {version} to {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, with transactions begun explicitly; reader connections are
+        # handed between threads but only used by one at a time
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection, reading from one snapshot of the database."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+            self._readers.put(conn)
+
+    async def _write(self, write: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self._writer.submit(write, *args))
+
+    def start(self):
+        """Nothing to start: the writer runs from construction. Lets the store be run as a server service."""
+
+    async def stop(self):
+        """Close the store when the server shuts down."""
+        await asyncio.to_thread(self.close)
+
+    def close(self):
+        """Commit the queued writes and close the database."""
+        self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    async def health_status(self) -> Dict[str, Dict[str, Any]]:
+        """Checks the agent components and the database."""
+        status = await AgentTaskManager.health_status(self)
+        status["database"] = await run_check(self._check_database)
+        return status
+
+    def _check_database(self) -> Dict[str, Any]:
+        with self._reader() as conn:
+            conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchall()
+        return {"path": self.path, "pending_writes": self._writer.pending}
+
+    def _load_artifacts(self, conn: sqlite3.Connection, task_id: str) -> List[Artifact]:
+        """Load a task's artifacts in insertion order."""
+        return [
+            Artifact(parts=_loads(parts, parts_blob), index=index, append=bool(append))
+            for index, append, parts, parts_blob in conn.execute(_SELECT_ARTIFACTS, (task_id,))
+        ]
+
+    def _task_from_row(self, conn: sqlite3.Connection, row: Tuple) -> Task:
+        task_id, session_id, state, message, message_blob, updated_at = row
+        return Task(
+            id=task_id,
+            sessionId=session_id,
+            status=TaskStatus(
+                state=state,
+                message=self._message_from_db(_loads(message, message_blob), task_id),
+                timestamp=datetime.fromisoformat(updated_at),
+            ),
+            artifacts=self._load_artifacts(conn, task_id),
+        )
+
+    def _load_task(self, task_id: str) -> Optional[Task]:
+        # Called by get_task in a worker thread, so the read never blocks the event loop
+        with self._reader() as conn:
+            row = conn.execute(_SELECT_TASK, (task_id,)).fetchone()
+            return self._task_from_row(conn, row) if row else None
+
+    def _task_values(self, task_params) -> Tuple:
+        """Encode the values a new run stores for a send request, off the writer thread."""
+        message, message_blob = self._encode_payload(self._input_message_json(task_params))
+        return task_params.id, task_params.sessionId, _dumps(message), message_blob, self._get_skill_id(task_params)
+
+    def _start_task_row(self, conn: sqlite3.Connection, values: Tuple):
+        task_id, session_id, message, message_blob, skill_id = values
+        now = _timestamp()
+        conn.execute(
+            _START_TASK,
+            (
+                task_id, session_id, TaskState.WORKING.value, message, message_blob, message, message_blob,
+                now, now, self.lease_owner, _timestamp(self._lease_expiry()), skill_id,
+            ),
+        )
+
+    def _claim(self, conn: sqlite3.Connection, values: Tuple, msg_json: Any) -> bool:
+        # Writes are serialized, so nothing else can change the row between check and write
+        row = conn.execute(_SELECT_INPUT, (values[0],)).fetchone()
+        if row is not None and is_duplicate_submission(TaskState(row[0]), _loads(row[1], row[2]), msg_json):
+            return False
+        self._start_task_row(conn, values)
+        return True
+
+    async def claim_task(self, task_params) -> Tuple[bool, Optional[Task]]:
+        """Start a run for a send request unless the task was already submitted.
+
+        The tasks row is the deduplication record, checked and written by the writer
+        thread in one step.
+        """
+        msg_json = self._input_message_json(task_params)
+        if await self._write(self._claim, self._task_values(task_params), msg_json):
+            return True, None
+        return False, await self.get_task(task_params.id)
+
+    async def upsert_task(self, task_params):
+        """Create or update a task record in the database."""
+        await self._write(self._start_task_row, self._task_values(task_params))
+
+    @staticmethod
+    def _update_task_row(
+        conn: sqlite3.Connection, task_id: str, state: str, message: Tuple, artifacts: List[Tuple]
+    ) -> Tuple[str, List[Tuple]]:
+        now = _timestamp()
+        conn.execute(_UPDATE_TASK, (task_id, state, *message, now, now))
+        if artifacts:
+            conn.executemany(_INSERT_ARTIFACT, [(task_id, *artifact, now) for artifact in artifacts])
+        session_id = conn.execute("SELECT session_id FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+        return session_id, conn.execute(_SELECT_ARTIFACTS, (task_id,)).fetchall()
+
+    async def update_store(self, task_id: str, task_status: TaskStatus, artifacts: List[Artifact] = None) -> Task:
+        """Update task status and artifacts in the database and return the updated Task."""
+        msg_json = self._status_message_json(task_status, artifacts)
+        message, message_blob = self._encode_payload(msg_json)
+        artifact_rows = []
+        for art in artifacts or []:
+            parts, parts_blob = self._encode_payload(self._prepare_parts_for_db(art.parts))
+            artifact_rows.append((art.index, bool(art.append), _dumps(parts), parts_blob))
+
+        session_id, stored_artifacts = await self._write(
+            self._update_task_row, task_id, TaskState(task_status.state).value, (_dumps(message), message_blob), artifact_rows
+        )
+        return Task(
+            id=task_id,
+            sessionId=session_id,
+            status=TaskStatus(state=task_status.state, message=self._message_from_db(msg_json, task_id)),
+            artifacts=[
+                Artifact(parts=_loads(parts, parts_blob), index=index, append=bool(append))
+                for index, append, parts, parts_blob in stored_artifacts
+            ],
+        )
+
+    def _iter_session_rows(
+        self,
+        session_id: str,
+        limit: int,
+        position: Optional[Tuple[datetime, str]],
+        history_length: Optional[int],
+    ) -> Iterator[Tuple[Task, str]]:
+        with self._reader() as conn:
+            if position:
+                rows = conn.execute(_SELECT_SESSION_AFTER, (session_id, _timestamp(position[0]), position[1], limit))
+            else:
+                rows = conn.execute(_SELECT_SESSION, (session_id, limit))
+            for task_id, session, state, message, message_blob, input_message, input_blob, created_at, updated_at in rows:
+                task = self._history_task(
+                    task_id,
+                    session,
+                    state,
+                    _loads(message, message_blob),
+                    _loads(input_message, input_blob),
+                    datetime.fromisoformat(updated_at),
+                    history_length,
+                )
+                yield task, _encode_cursor(datetime.fromisoformat(created_at), task_id)
+
+    def _renew_rows(self, conn: sqlite3.Connection, task_ids: List[str]):
+        expires = _timestamp(self._lease_expiry())
+        conn.executemany(_RENEW_LEASE, [(expires, task_id, self.lease_owner) for task_id in task_ids])
+
+    async def renew_leases(self, task_ids: List[str]):
+        """Extend this process's leases on the tasks it is running."""
+        if task_ids:
+            await self._write(self._renew_rows, list(task_ids))
+
+    def _take_over_rows(self, conn: sqlite3.Connection, limit: int) -> List[Tuple]:
+        rows = conn.execute(_SELECT_ORPHANS, (_timestamp(), limit)).fetchall()
+        expires = _timestamp(self._lease_expiry())
+        conn.executemany(_TAKE_OVER, [(self.lease_owner, expires, row[0]) for row in rows])
+        return rows
+
+    async def claim_orphaned_tasks(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Take over in-flight tasks whose lease has expired, oldest first.
+
+        Tasks without a lease, started by a version that kept none, are never taken
+        over. The check and the takeover are one write, so two processes sharing the
+        database never take over the same task.
+        """
+        rows = await self._write(self._take_over_rows, limit)
+        return [
+            {
+                "id": task_id,
+                "session_id": session_id,
+                "message": _loads(message, message_blob),
+                "skill_id": skill_id,
+                "lease_owner": lease_owner,
+            }
+            for task_id, session_id, message, message_blob, skill_id, lease_owner in rows
+        ]
@@ -1,3 +1,4 @@
 from a2a_service.tools.search import search_web
+from a2a_service.tools.delegate import make_delegation_tool
 
-__all__ = ['search_web'] 
\ No newline at end of file
+__all__ = ['search_web', 'make_delegation_tool']
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from a2a_service.client import A2AClient, close_http_clients
+from a2a_service.types import (
+    Message,
+    TaskArtifactUpdateEvent,
+    TaskSendParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DelegationRequest(BaseModel):
+    agent: str = Field(description="Name of the agent to ask.")
+    query: str = Field(description="The question or sub-task for that agent, self-contained.")
+
+
+class DelegationInput(BaseModel):
+    requests: List[DelegationRequest] = Field(description="Sub-tasks to send, at most one per agent and topic.")
+
+
+def _stream_writer():
+    """Return the graph's custom stream writer, or a no-op outside a streamed graph run."""
+    try:
+        from langgraph.config import get_stream_writer
+        return get_stream_writer()
+    except Exception:
+        return lambda chunk: None
+
+
+def _text(parts: List[Any]) -> str:
+    return "".join(part.text for part in parts or [] if isinstance(part, TextPart))
+
+
+def make_delegation_tool(
+    peers: Dict[str, Dict[str, Any]],
+    timeout: float = 60.0,
+    name: str = "delegate_to_agents",
+) -> StructuredTool:
+    """Create a tool that sends sub-tasks to peer A2A agents concurrently.
+
+    All sub-tasks run at once and share one deadline: the tool timeout, or what is left of
+    the task's own deadline if that is sooner. Agents that have not answered by then are
+    cancelled and contribute what they had streamed so far, so a call costs the latency of
+    the slowest peer within the deadline rather than the sum over all peers. Streamed
+    answers are also forwarded as progress updates of the calling task.
+
+    Each sub-task runs in its own session on the peer, derived from the calling session,
+    the peer and the sub-task's position, so sub-tasks sent to the same peer at once do
+    not share a conversation. Cancelling a sub-task only closes its stream: the peer is
+    not told and finishes the task, as A2AServer does not implement tasks/cancel.
+
+    Args:
+        peers: Peer agents by name, each with "url" and optionally "skill_id",
+            "description" and "headers" (e.g. an API key).
+        timeout: Deadline in seconds for all sub-tasks of one call.
+        name: Tool name.
+    """
+    clients = {
+        peer_name: A2AClient(peer["url"], headers=peer.get("headers"), timeout=timeout, retries=1)
+        for peer_name, peer in peers.items()
+    }
+
+    async def ask(request: DelegationRequest, partial: List[str], session_id: str, write) -> str:
+        peer = peers[request.agent]
+        params = TaskSendParams(
+            id=uuid4().hex,
+            sessionId=session_id,
+            acceptedOutputModes=["text"],
+            message=Message(role="user", parts=[TextPart(text=request.query)]),
+            metadata={"skill_id": peer["skill_id"]} if peer.get("skill_id") else None,
+        )
+        status_text = ""
+        async for event in clients[request.agent].send_task_streaming(params):
+            if event.error is not None:
+                raise RuntimeError(event.error.message)
+            result = event.result
+            if isinstance(result, TaskArtifactUpdateEvent):
+                text = _text(result.artifact.parts)
+                if not result.artifact.append:
+                    partial.clear()
+                partial.append(text)
+                if text:
+                    write({"content": f"[{request.agent}] {text}"})
+            elif isinstance(result, TaskStatusUpdateEvent) and result.final:
+                status_text = _text(result.status.message.parts) if result.status.message else ""
+                if result.status.state == TaskState.FAILED:
+                    raise RuntimeError(status_text or "the task failed")
+        return "".join(partial) or status_text
+
+    async def delegate(requests: List[DelegationRequest], config: RunnableConfig = None) -> str:
+        metadata = (config or {}).get("metadata") or {}
+        deadline = time.time() + timeout
+        if metadata.get("deadline"):
+            deadline = min(deadline, metadata["deadline"])
+        session_id = str(((config or {}).get("configurable") or {}).get("thread_id") or uuid4().hex)
+        write = _stream_writer()
+
+        requests = [DelegationRequest.model_validate(r) for r in requests]
+        known = [r for r in requests if r.agent in peers]
+        partials: List[List[str]] = [[] for _ in known]
+        tasks = [
+            # One peer session per sub-task, stable across turns of the calling session
+            asyncio.create_task(ask(request, partial, f"{session_id}:{request.agent}:{index}", write))
+            for index, (request, partial) in enumerate(zip(known, partials))
+        ]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.time()))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        sections = []
+        for request, task, partial in zip(known, tasks, partials):
+            if task.cancelled():
+                so_far = "".join(partial)
+                outcome = f"no answer before the deadline. Partial answer: {so_far}" if so_far else "no answer before the deadline."
+            elif task.exception() is not None:
+                outcome = f"failed: {task.exception()}"
+            else:
+                outcome = task.result()
+            sections.append(f"[{request.agent}] {outcome}")
+        for request in requests:
+            if request.agent not in peers:
+                sections.append(f"[{request.agent}] unknown agent; available: {', '.join(peers)}")
+        return "\n\n".join(sections)
+
+    def delegate_sync(requests: List[DelegationRequest], config: RunnableConfig = None) -> str:
+        # Synchronous graph runs execute tools in worker threads without an event loop
+        async def run():
+            try:
+                return await delegate(requests, config)
+            finally:
+                await close_http_clients()
+        return asyncio.run(run())
+
+    described = "\n".join(
+        f"- {peer_name}: {peer.get('description') or peer['url']}" for peer_name, peer in peers.items()
+    )
+    return StructuredTool.from_function(
+        func=delegate_sync,
+        coroutine=delegate,
+        name=name,
+        description=(
+            "Ask other agents for help. All requests are sent at the same time, so put every "
+            f"sub-task in one call. Available agents:\n{described}"
+        ),
+        args_schema=DelegationInput,
+    )
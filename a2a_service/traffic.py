@@ -0,0 +1,315 @@
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from uuid import uuid4
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from a2a_service.metrics import metrics
+from a2a_service.types import TaskSendParams
+
+logger = logging.getLogger(__name__)
+
+# Parameters of the task submitted by the request being handled, so model and tool
+# calls made while running it can be recorded or replayed against its session
+current_task_params: ContextVar[Optional[TaskSendParams]] = ContextVar("current_task_params", default=None)
+
+# Metadata key a replayed task names its recorded session under
+REPLAY_SESSION_KEY = "replay_session"
+
+
+def read_traffic(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a traffic recording in the order they were written.
+
+    A recording cut short, e.g. by the process being killed, is read up to its last
+    complete entry.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except (EOFError, zlib.error) as e:
+            logger.warning(f"Traffic recording {path} is truncated: {e}")
+
+
+class TrafficRecorder(BaseCallbackHandler):
+    """Records task requests, with the model and tool outputs of their runs, to a file.
+
+    The recording is gzip-compressed JSON lines. Each task request is written with its
+    arrival time; each model call and tool call of a task is written with its output
+    and latency. Only request bodies are recorded, never headers, so credentials are
+    not captured. File contents are replaced with placeholders of the same size.
+
+    Attach the recorder to an A2AServer for requests, and to the agents' run callbacks
+    for model and tool outputs.
+    """
+
+    # Write events in the order they happen, rather than from executor threads
+    run_inline = True
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        redact_metadata: Sequence[str] = (),
+        flush_interval: float = 1.0,
+    ):
+        """Initialize the recorder.
+
+        Args:
+            path: File the recording is written to; an existing file is overwritten.
+            sample_rate: Fraction of sessions recorded. Sessions are recorded whole or not at all.
+            redact_metadata: Task metadata keys left out of recorded requests.
+            flush_interval: Seconds between flushes of the recording to disk.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.redact_metadata = set(redact_metadata)
+        self.flush_interval = flush_interval
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._flushed = self._started
+        # Model and tool runs being recorded: run id -> (session, start time, tool name, args)
+        self._runs: Dict[Any, Tuple[str, float, Optional[str], Any]] = {}
+        # Runs inside recorded runs (e.g. a model called by a tool), replaced with them on replay
+        self._nested: set = set()
+
+    def _sampled(self, session_id: str) -> bool:
+        return self.sample_rate >= 1 or zlib.crc32(session_id.encode("utf-8")) % 10000 < self.sample_rate * 10000
+
+    def _write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            now = time.monotonic()
+            if now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+        metrics.inc("a2a_traffic_recorded_total", help="Entries written to the traffic recording", kind=entry["kind"])
+
+    def _sanitize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params.get("metadata") and self.redact_metadata:
+            params["metadata"] = {k: v for k, v in params["metadata"].items() if k not in self.redact_metadata}
+        params.pop("pushNotification", None)
+        for part in (params.get("message") or {}).get("parts", []):
+            file = part.get("file") if part.get("type") == "file" else None
+            if not file:
+                continue
+            if file.get("bytes"):
+                # Base64 of zero bytes, so uploads keep their size
+                file["bytes"] = "A" * len(file["bytes"])
+            if file.get("uri"):
+                # Signed URLs carry credentials in their query string
+                file["uri"] = urlunsplit(urlsplit(file["uri"])._replace(query="", fragment=""))
+        return params
+
+    def record_request(self, method: str, params: TaskSendParams):
+        """Record a task request as it arrives."""
+        if not self._sampled(params.sessionId):
+            return
+        self._write({
+            "kind": "request",
+            "t": round(time.monotonic() - self._started, 6),
+            "method": method,
+            "params": self._sanitize(params.model_dump(mode="json", exclude_none=True)),
+        })
+
+    def _start_run(self, run_id: Any, parent_run_id: Any, name: Optional[str] = None, args: Any = None):
+        if parent_run_id in self._runs or parent_run_id in self._nested:
+            self._nested.add(run_id)
+            return
+        params = current_task_params.get()
+        if params is not None and self._sampled(params.sessionId):
+            self._runs[run_id] = (params.sessionId, time.monotonic(), name, args)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        self._start_run(run_id, parent_run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        self._start_run(run_id, parent_run_id)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id, parent_run_id=None, inputs=None, **kwargs: Any) -> None:
+        self._start_run(run_id, parent_run_id, serialized.get("name") or kwargs.get("name"), inputs if inputs is not None else input_str)
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id, parent_run_id=None, **kwargs: Any) -> None:
+        if parent_run_id in self._runs or parent_run_id in self._nested:
+            self._nested.add(run_id)
+
+    def on_chain_end(self, outputs: Any, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+
+    def on_llm_end(self, response: Any, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+        run = self._runs.pop(run_id, None)
+        if run is None or not response.generations or not response.generations[0]:
+            return
+        from langchain_core.messages import AIMessage, message_to_dict
+
+        generation = response.generations[0][0]
+        message = getattr(generation, "message", None) or AIMessage(content=generation.text)
+        self._write({
+            "kind": "llm",
+            "session": run[0],
+            "latency": round(time.monotonic() - run[1], 6),
+            "message": message_to_dict(message),
+        })
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+        self._runs.pop(run_id, None)
+
+    def on_tool_end(self, output: Any, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        self._write({
+            "kind": "tool",
+            "session": run[0],
+            "name": run[2],
+            "args": run[3],
+            "latency": round(time.monotonic() - run[1], 6),
+            # Tools called with a tool call return a ToolMessage
+            "output": getattr(output, "content", output),
+        })
+
+    def on_tool_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._nested.discard(run_id)
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        self._write({
+            "kind": "tool",
+            "session": run[0],
+            "name": run[2],
+            "args": run[3],
+            "latency": round(time.monotonic() - run[1], 6),
+            "error": str(error),
+        })
+
+    def close(self):
+        """Finish the recording file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 4)
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1], 4)}
+
+
+async def replay_traffic(
+    path: str,
+    url: str,
+    speed: float = 1.0,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 600.0,
+) -> Dict[str, Any]:
+    """Send the requests of a traffic recording to a server and measure how it serves them.
+
+    Requests are sent at their recorded times divided by ``speed`` (0 sends them all at
+    once). The turns of a session are sent one after another, each no earlier than the
+    previous turn's answer. Every replay uses new task and session ids, and names the
+    recorded session in the task metadata for a server replaying the same recording.
+
+    Args:
+        path: The traffic recording.
+        url: URL of the A2A server.
+        speed: Factor by which the recorded request timing is sped up.
+        headers: Headers sent with every request, e.g. an API key.
+        timeout: Seconds to wait for a response, or between events of a stream.
+
+    Returns:
+        Request count, failures, duration, throughput, and latency percentiles in seconds
+        (with time to first event for streamed tasks).
+    """
+    from a2a_service.client import A2AClient, close_http_clients
+    from a2a_service.types import TaskState
+
+    requests = [entry for entry in read_traffic(path) if entry["kind"] == "request"]
+    first_t = requests[0]["t"] if requests else 0.0
+    client = A2AClient(url, headers=headers, timeout=timeout, retries=0)
+    loop = asyncio.get_running_loop()
+    ids: Dict[str, str] = defaultdict(lambda: uuid4().hex)
+    latencies: List[float] = []
+    first_events: List[float] = []
+    failures: List[str] = []
+
+    async def send(entry: Dict[str, Any], previous: Optional[asyncio.Task], start: float):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        delay = start + ((entry["t"] - first_t) / speed if speed > 0 else 0) - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        params = dict(entry["params"])
+        recorded_session = params.get("sessionId")
+        params["id"] = ids["task:" + params["id"]]
+        params["sessionId"] = ids["session:" + (recorded_session or params["id"])]
+        params["metadata"] = {**(params.get("metadata") or {}), REPLAY_SESSION_KEY: recorded_session}
+        sent = loop.time()
+        try:
+            if entry["method"] == "tasks/sendSubscribe":
+                state = None
+                async for event in client.send_task_streaming(params):
+                    if state is None:
+                        first_events.append(loop.time() - sent)
+                        state = "streaming"
+                    if event.error is not None:
+                        raise RuntimeError(event.error.message)
+                    status = getattr(event.result, "status", None)
+                    if getattr(event.result, "final", False) and status is not None:
+                        state = status.state
+            else:
+                response = await client.send_task(params)
+                if response.error is not None:
+                    raise RuntimeError(response.error.message)
+                state = response.result.status.state
+            if state == TaskState.FAILED:
+                raise RuntimeError("task failed")
+        except Exception as e:
+            failures.append(f"{entry['params']['id']}: {e}")
+        latencies.append(loop.time() - sent)
+
+    start = loop.time()
+    sessions: Dict[str, asyncio.Task] = {}
+    tasks = []
+    for entry in requests:
+        session = entry["params"].get("sessionId") or entry["params"]["id"]
+        task = sessions[session] = asyncio.create_task(send(entry, sessions.get(session), start))
+        tasks.append(task)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await close_http_clients()
+    duration = loop.time() - start
+
+    if failures:
+        logger.warning(f"{len(failures)} replayed tasks failed, e.g. {failures[0]}")
+    return {
+        "requests": len(requests),
+        "failed": len(failures),
+        "duration": round(duration, 3),
+        "throughput": round(len(requests) / duration, 3) if duration else None,
+        "latency": _percentiles(latencies),
+        "first_event_latency": _percentiles(first_events),
+    }
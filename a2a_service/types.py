@@ -14,14 +14,12 @@ from pydantic import (
 
 
 # Configure all Pydantic models to allow serialization to dict/JSON
+# Datetimes are serialized as ISO 8601 by pydantic-core natively, so no custom encoders are needed
 class BaseModelWithConfig(BaseModel):
     """Base model with JSON serialization configuration."""
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
         populate_by_name=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat(),
-        }
     )
 
 
@@ -0,0 +1,70 @@
+"""compressed payload columns
+
+Revision ID: 4a7e1c9d2b60
+Revises: 67c32256189b
+Create Date: 2026-10-19 14:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from a2a_service.compression import decompress_json
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7e1c9d2b60'
+down_revision: Union[str, None] = '67c32256189b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_TYPE = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+# Rows decompressed per round trip on downgrade
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Payloads compressed by the storage codec go to these columns instead of the JSON ones
+    op.add_column('tasks', sa.Column('message_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('tasks', sa.Column('input_message_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('artifacts', sa.Column('parts_blob', sa.LargeBinary(), nullable=True))
+    with op.batch_alter_table('artifacts') as batch_op:
+        batch_op.alter_column('parts', existing_type=JSON_TYPE, nullable=True)
+
+
+def _restore_json(table: str, key: str, json_column: str, blob_column: str) -> None:
+    """Decompress a table's blob column back into its JSON column."""
+    bind = op.get_bind()
+    rows = sa.table(table, sa.column(key), sa.column(json_column, JSON_TYPE), sa.column(blob_column, sa.LargeBinary()))
+    keys = bind.execute(sa.select(rows.c[key]).where(rows.c[blob_column].isnot(None))).scalars().all()
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = bind.execute(
+            sa.select(rows.c[key], rows.c[blob_column]).where(rows.c[key].in_(keys[start:start + BATCH_SIZE]))
+        )
+        for key_value, blob in batch.all():
+            bind.execute(
+                rows.update()
+                    .where(rows.c[key] == key_value)
+                    .values({json_column: decompress_json(blob), blob_column: None})
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if context.is_offline_mode():
+        raise RuntimeError(
+            "Downgrading 4a7e1c9d2b60 decompresses stored payloads and cannot be rendered as SQL; "
+            "run it against the database"
+        )
+    # Compressed payloads go back to their JSON columns before the blob columns are dropped
+    _restore_json('tasks', 'id', 'message', 'message_blob')
+    _restore_json('tasks', 'id', 'input_message', 'input_message_blob')
+    _restore_json('artifacts', 'id', 'parts', 'parts_blob')
+    with op.batch_alter_table('artifacts') as batch_op:
+        batch_op.alter_column('parts', existing_type=JSON_TYPE, nullable=False)
+    op.drop_column('artifacts', 'parts_blob')
+    op.drop_column('tasks', 'input_message_blob')
+    op.drop_column('tasks', 'message_blob')
@@ -0,0 +1,37 @@
+"""session history keyset index and input message
+
+Revision ID: 67c32256189b
+Revises: b3edc73ed1fc
+Create Date: 2026-10-19 11:47:03.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '67c32256189b'
+down_revision: Union[str, None] = 'b3edc73ed1fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the user's message once the agent's reply replaces tasks.message
+    op.add_column('tasks', sa.Column('input_message', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True))
+    op.execute("UPDATE tasks SET input_message = message WHERE message->>'role' = 'user'")
+
+    # Keyset pagination needs a unique, totally ordered key: (session_id, updated_at, id)
+    op.create_index('ix_tasks_session_id_updated_at_id', 'tasks', ['session_id', 'updated_at', 'id'], unique=False)
+    op.drop_index('ix_tasks_session_id_updated_at', table_name='tasks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_tasks_session_id_updated_at', 'tasks', ['session_id', 'updated_at'], unique=False)
+    op.drop_index('ix_tasks_session_id_updated_at_id', table_name='tasks')
+    op.drop_column('tasks', 'input_message')
@@ -0,0 +1,41 @@
+"""task leases
+
+Revision ID: 9d2e6b1f4a37
+Revises: 4a7e1c9d2b60
+Create Date: 2026-10-19 18:42:07.615904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e6b1f4a37'
+down_revision: Union[str, None] = '4a7e1c9d2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IN_FLIGHT = sa.text("state IN ('submitted', 'working')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Leases of running tasks, heartbeated by their process, so crashed runs are found
+    op.add_column('tasks', sa.Column('lease_owner', sa.String(), nullable=True))
+    op.add_column('tasks', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tasks', sa.Column('skill_id', sa.String(), nullable=True))
+    # Only in-flight tasks are searched for expired leases, and there are few of them
+    op.create_index(
+        'ix_tasks_in_flight_lease_expires_at', 'tasks', ['lease_expires_at'], unique=False,
+        postgresql_where=IN_FLIGHT, sqlite_where=IN_FLIGHT,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_in_flight_lease_expires_at', table_name='tasks')
+    op.drop_column('tasks', 'skill_id')
+    op.drop_column('tasks', 'lease_expires_at')
+    op.drop_column('tasks', 'lease_owner')
@@ -0,0 +1,73 @@
+"""jsonb columns and composite indexes
+
+Revision ID: b3edc73ed1fc
+Revises: 5f150a4e2023
+Create Date: 2026-10-19 09:12:45.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3edc73ed1fc'
+down_revision: Union[str, None] = '5f150a4e2023'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    # JSONB is stored pre-parsed, so reads don't re-parse the text on every access
+    if is_postgres:
+        op.alter_column('tasks', 'message',
+                        type_=postgresql.JSONB(),
+                        postgresql_using='message::jsonb')
+        op.alter_column('artifacts', 'parts',
+                        type_=postgresql.JSONB(),
+                        postgresql_using='parts::jsonb')
+
+    # Primary keys are already indexed; these only cost write amplification
+    op.drop_index('ix_tasks_id', table_name='tasks')
+    op.drop_index('ix_artifacts_id', table_name='artifacts')
+
+    # Composite indexes for the real access patterns. They cover the old
+    # single-column indexes, which become redundant.
+    op.create_index('ix_artifacts_task_id_id', 'artifacts', ['task_id', 'id'], unique=False)
+    op.drop_index('ix_artifacts_task_id', table_name='artifacts')
+    op.create_index('ix_tasks_session_id_updated_at', 'tasks', ['session_id', 'updated_at'], unique=False)
+    op.drop_index('ix_tasks_session_id', table_name='tasks')
+
+    # Deleting a task removes its artifacts in the same statement
+    with op.batch_alter_table('artifacts') as batch_op:
+        batch_op.drop_constraint('artifacts_task_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('artifacts_task_id_fkey', 'tasks', ['task_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.batch_alter_table('artifacts') as batch_op:
+        batch_op.drop_constraint('artifacts_task_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('artifacts_task_id_fkey', 'tasks', ['task_id'], ['id'])
+
+    op.create_index('ix_tasks_session_id', 'tasks', ['session_id'], unique=False)
+    op.drop_index('ix_tasks_session_id_updated_at', table_name='tasks')
+    op.create_index('ix_artifacts_task_id', 'artifacts', ['task_id'], unique=False)
+    op.drop_index('ix_artifacts_task_id_id', table_name='artifacts')
+    op.create_index('ix_artifacts_id', 'artifacts', ['id'], unique=False)
+    op.create_index('ix_tasks_id', 'tasks', ['id'], unique=False)
+
+    if is_postgres:
+        op.alter_column('artifacts', 'parts',
+                        type_=sa.JSON(),
+                        postgresql_using='parts::json')
+        op.alter_column('tasks', 'message',
+                        type_=sa.JSON(),
+                        postgresql_using='message::json')
@@ -0,0 +1,32 @@
+"""session history keyed on created_at
+
+Revision ID: c4f1a8e3d572
+Revises: 9d2e6b1f4a37
+Create Date: 2026-10-19 21:14:36.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a8e3d572'
+down_revision: Union[str, None] = '9d2e6b1f4a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Session pages are keyed on (created_at, id), which unlike updated_at never changes,
+    # so a task updated between two page requests cannot move across the cursor
+    op.create_index('ix_tasks_session_id_created_at_id', 'tasks', ['session_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_tasks_session_id_updated_at_id', table_name='tasks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_tasks_session_id_updated_at_id', 'tasks', ['session_id', 'updated_at', 'id'], unique=False)
+    op.drop_index('ix_tasks_session_id_created_at_id', table_name='tasks')
@@ -0,0 +1,101 @@
+"""Microbenchmark for the A2A request/response codec.
+
+Compares the legacy path (``json.loads`` + manual dict picking, FastAPI's
+``jsonable_encoder``) against the fast path in ``a2a_service.codec``.
+
+Usage:
+    python benchmarks/bench_codec.py [iterations]
+"""
+import json
+import os
+import sys
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.codec import decode_task_request, encode_json
+from a2a_service.types import (
+    Artifact,
+    Message,
+    SendTaskRequest,
+    SendTaskResponse,
+    Task,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+def make_request_body(text_size: int) -> bytes:
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": "req-1",
+        "method": "tasks/send",
+        "params": {
+            "id": "task-1",
+            "sessionId": "session-1",
+            "acceptedOutputModes": ["text"],
+            "message": {"role": "user", "parts": [{"type": "text", "text": "q" * text_size}]},
+        },
+    }).encode("utf-8")
+
+
+def make_response(text_size: int, artifact_count: int) -> SendTaskResponse:
+    artifacts = [
+        Artifact(parts=[TextPart(text="a" * text_size)], index=i)
+        for i in range(artifact_count)
+    ]
+    task = Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(
+            state=TaskState.COMPLETED,
+            message=Message(role="agent", parts=[TextPart(text="done")]),
+        ),
+        artifacts=artifacts,
+    )
+    return SendTaskResponse(id="req-1", result=task)
+
+
+def legacy_decode(raw: bytes) -> SendTaskRequest:
+    body = json.loads(raw)
+    params_data = body.get("params", {})
+    params = TaskSendParams(
+        id=params_data.get("id", ""),
+        sessionId=params_data.get("sessionId", ""),
+        historyLength=params_data.get("historyLength", 10),
+        acceptedOutputModes=params_data.get("acceptedOutputModes", ["text"]),
+        pushNotification=params_data.get("pushNotification", None),
+    )
+    params.message = params_data["message"]
+    return SendTaskRequest(id=body.get("id", ""), params=params)
+
+
+def legacy_encode(response: SendTaskResponse) -> bytes:
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    for text_size, artifact_count in [(100, 1), (10_000, 1), (10_000, 20)]:
+        raw = make_request_body(text_size)
+        response = make_response(text_size, artifact_count)
+        results = {
+            "decode legacy": timeit.timeit(lambda: legacy_decode(raw), number=iterations),
+            "decode fast": timeit.timeit(lambda: decode_task_request(raw, SendTaskRequest), number=iterations),
+            "encode legacy": timeit.timeit(lambda: legacy_encode(response), number=iterations),
+            "encode fast": timeit.timeit(lambda: encode_json(response), number=iterations),
+        }
+        print(f"text={text_size} artifacts={artifact_count}")
+        for name, seconds in results.items():
+            print(f"  {name:<14} {seconds / iterations * 1e6:10.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
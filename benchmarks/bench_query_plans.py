@@ -0,0 +1,106 @@
+"""Query-plan benchmark for the tasks and artifacts tables.
+
+Seeds the database with a large synthetic dataset and prints ``EXPLAIN
+(ANALYZE, BUFFERS)`` output plus timings for the server's hot queries. Run it
+once per schema revision to compare before and after a migration:
+
+    alembic upgrade 5f150a4e2023 && python benchmarks/bench_query_plans.py --seed
+    alembic upgrade head && python benchmarks/bench_query_plans.py
+
+Seeding uses ``generate_series`` so millions of rows load in seconds. Only run
+this against a disposable database: ``--seed`` truncates both tables.
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.database import engine
+
+SEED_SQL = [
+    "TRUNCATE artifacts, tasks",
+    """
+    INSERT INTO tasks (id, session_id, state, message, created_at, updated_at)
+    SELECT 'task-' || g,
+           'session-' || (g % :sessions),
+           'completed',
+           '{"role": "agent", "parts": [{"type": "text", "text": "answer"}]}',
+           now() - (g || ' seconds')::interval,
+           now() - (g || ' seconds')::interval
+    FROM generate_series(1, :tasks) AS g
+    """,
+    """
+    INSERT INTO artifacts (task_id, index, append, parts, created_at)
+    SELECT 'task-' || ((g % :tasks) + 1),
+           0,
+           false,
+           '[{"type": "text", "text": "artifact body"}]',
+           now() - (g || ' seconds')::interval
+    FROM generate_series(1, :artifacts) AS g
+    """,
+    "ANALYZE tasks",
+    "ANALYZE artifacts",
+]
+
+QUERIES = {
+    "task by id": (
+        "SELECT * FROM tasks WHERE id = :task_id",
+        {"task_id": "task-4242"},
+    ),
+    "artifacts for task": (
+        "SELECT * FROM artifacts WHERE task_id = :task_id ORDER BY id",
+        {"task_id": "task-4242"},
+    ),
+    "latest tasks in session": (
+        "SELECT * FROM tasks WHERE session_id = :session_id ORDER BY created_at DESC LIMIT 20",
+        {"session_id": "session-42"},
+    ),
+}
+
+
+def seed(conn, tasks: int, artifacts: int, sessions: int):
+    start = time.perf_counter()
+    params = {"tasks": tasks, "artifacts": artifacts, "sessions": sessions}
+    for statement in SEED_SQL:
+        conn.execute(text(statement), params)
+    conn.commit()
+    print(f"Seeded {tasks} tasks and {artifacts} artifacts in {time.perf_counter() - start:.1f}s\n")
+
+
+def explain(conn, repeat: int):
+    for name, (sql, params) in QUERIES.items():
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params).scalars().all()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"== {name}: median {timings[len(timings) // 2] * 1000:.2f} ms")
+        print("\n".join(plan))
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="Truncate and reseed the tables first")
+    parser.add_argument("--tasks", type=int, default=2_000_000)
+    parser.add_argument("--artifacts", type=int, default=4_000_000)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        if args.seed:
+            seed(conn, args.tasks, args.artifacts, args.sessions)
+        explain(conn, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
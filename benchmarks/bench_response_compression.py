@@ -0,0 +1,140 @@
+"""Bytes on the wire and latency of task responses with and without compression.
+
+Serves task responses of several answer sizes, and an SSE stream of artifact chunks,
+through ResponseCompressionMiddleware in-process, and reports for each encoding the
+body size on the wire and the mean time per request (including decompression by the
+client). Latency here is CPU cost only; on a real network smaller bodies also save
+transfer time.
+
+Usage:
+    python benchmarks/bench_response_compression.py [iterations]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+import zlib
+
+import httpx
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.codec import encode_json, encode_sse_event
+from a2a_service.middleware import ResponseCompressionMiddleware
+from a2a_service.types import (
+    Artifact,
+    SendTaskResponse,
+    SendTaskStreamingResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+WORDS = (
+    "the agent found that results search answer capital city population report "
+    "according to data source year value table summary request user model tool"
+).split()
+
+
+def make_answer(words: int) -> str:
+    rng = random.Random(0)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_response(words: int) -> bytes:
+    task = Task(
+        id="task-1",
+        sessionId="session-1",
+        status=TaskStatus(state=TaskState.COMPLETED),
+        artifacts=[Artifact(parts=[TextPart(text=make_answer(words))])],
+    )
+    return encode_json(SendTaskResponse(id="req-1", result=task))
+
+
+def make_stream(chunks: int) -> list:
+    answer = make_answer(chunks * 3).split(" ")
+    return [
+        encode_sse_event(SendTaskStreamingResponse(
+            id="req-1",
+            result=TaskArtifactUpdateEvent(
+                id="task-1",
+                artifact=Artifact(parts=[TextPart(text=" ".join(answer[i:i + 3]) + " ")], index=0, append=i > 0),
+            ),
+        ))
+        for i in range(0, len(answer), 3)
+    ]
+
+
+SIZES = {"200_words": 200, "2k_words": 2000, "20k_words": 20000}
+STREAM = make_stream(500)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    bodies = {name: make_response(words) for name, words in SIZES.items()}
+
+    @app.get("/task/{name}")
+    async def task(name: str):
+        return Response(content=bodies[name], media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for event in STREAM:
+                yield event
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_middleware(ResponseCompressionMiddleware, algorithms=("zstd", "gzip"), minimum_size=1024)
+    return app
+
+
+def decoder(content_encoding: str):
+    if content_encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    if content_encoding == "gzip":
+        return zlib.decompressobj(31)
+    return None
+
+
+async def measure(client: httpx.AsyncClient, path: str, encoding: str, iterations: int):
+    wire_bytes = 0
+    body = b""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        async with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+            decompressor = decoder(response.headers.get("content-encoding", "identity"))
+            body = b""
+            async for raw in response.aiter_raw():
+                wire_bytes += len(raw)
+                body += decompressor.decompress(raw) if decompressor else raw
+    elapsed = (time.perf_counter() - start) / iterations
+    return wire_bytes // iterations, elapsed, body
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    transport = httpx.ASGITransport(app=make_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'response':<16} {'encoding':<9} {'wire_bytes':>10} {'ratio':>6} {'latency_us':>11}")
+        paths = {name: f"/task/{name}" for name in SIZES}
+        paths["sse_500_chunks"] = "/stream"
+        for name, path in paths.items():
+            baseline = expected = None
+            for encoding in ("identity", "gzip", "zstd"):
+                wire_bytes, latency, body = await measure(client, path, encoding, iterations)
+                baseline = baseline or wire_bytes
+                expected = expected or body
+                assert body == expected, f"{name} decoded differently with {encoding}"
+                print(f"{name:<16} {encoding:<9} {wire_bytes:>10} {baseline / wire_bytes:>6.1f} {latency * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
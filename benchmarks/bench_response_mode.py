@@ -0,0 +1,71 @@
+"""Latency and token benchmark for the agent's response modes.
+
+Runs the same queries through an Agent in "structured" mode (separate
+structured-output call after the ReAct loop) and "tool" mode (final answer as a
+respond tool call), and reports wall time, LLM calls and tokens per task.
+Calls the real model, so OPENAI_API_KEY must be set.
+
+Usage:
+    python benchmarks/bench_response_mode.py [model] [repeats]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.agent import Agent
+from a2a_service.metrics import metrics
+
+QUERIES = [
+    "What is the capital of France?",
+    "Who won the World Cup in 2018?",
+    "Summarize what the A2A protocol is for in two sentences.",
+]
+
+
+def run_mode(model: str, mode: str, repeats: int) -> dict:
+    agent = Agent(model_name=model, response_mode=mode)
+    agent.warm_up()
+
+    before = {
+        name: metrics.get(name, model=model)
+        for name in ("a2a_llm_requests_total", "a2a_llm_input_tokens_total", "a2a_llm_output_tokens_total")
+    }
+    timings = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            agent.invoke(query, uuid.uuid4().hex)
+            timings.append(time.perf_counter() - start)
+
+    tasks = len(timings)
+    return {
+        "median_s": statistics.median(timings),
+        "p90_s": sorted(timings)[int(tasks * 0.9) - 1],
+        **{
+            name.removeprefix("a2a_llm_").removesuffix("_total") + "_per_task":
+                (metrics.get(name, model=model) - value) / tasks
+            for name, value in before.items()
+        },
+    }
+
+
+def main():
+    load_dotenv()
+    model = sys.argv[1] if len(sys.argv) > 1 else "gpt-4.1-mini"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    for mode in ("structured", "tool"):
+        results = run_mode(model, mode, repeats)
+        print(f"{mode:<10} " + "  ".join(f"{key}={value:.2f}" for key, value in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Startup-time benchmark.
+
+Measures the wall time of importing ``main`` in a fresh interpreter and,
+separately, the time to compile the agent graph during warm-up. ``main()``
+imports the server and only the subsystems that are configured, so anything
+showing up here is paid by every process. Uses ``-X importtime`` to list the
+most expensive imports so regressions are easy to pin down.
+
+Each run starts two interpreters, and the graph warm-up dominates: the default
+of 5 runs takes about 10 seconds, a single run about 3.
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_snippet(code: str, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def top_imports(code: str, limit: int = 15) -> list[tuple[int, str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env_code = "import os; os.environ.setdefault('OPENAI_API_KEY', 'bench');"
+
+    import_main = time_snippet("import main", runs)
+    warm_up = time_snippet(env_code + "import main; main.Agent(main.MODEL).warm_up()", runs)
+
+    print(f"import main:           median {statistics.median(import_main) * 1000:8.1f} ms")
+    print(f"import + graph warmup: median {statistics.median(warm_up) * 1000:8.1f} ms")
+    print("\nMost expensive imports for 'import main' (cumulative us):")
+    for cumulative, name in top_imports("import main"):
+        print(f"  {cumulative:>10}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compression ratio and CPU cost of the storage codec for stored payloads.
+
+Encodes typical message and artifact payloads (a long agent answer, a JSON tool
+dump, a short reply) with each algorithm and level, and reports the compressed
+size relative to the JSON size and the time to compress and decompress.
+
+Usage:
+    python benchmarks/bench_storage_compression.py [iterations]
+"""
+import json
+import os
+import random
+import sys
+import timeit
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.compression import StorageCodec, decompress_json
+
+WORDS = (
+    "the agent found that results search answer capital city population report "
+    "according to data source year value table summary request user model tool"
+).split()
+
+
+def make_answer(words: int) -> dict:
+    rng = random.Random(0)
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return {"role": "agent", "parts": [{"type": "text", "text": text, "metadata": None}]}
+
+
+def make_tool_dump(rows: int) -> list:
+    rng = random.Random(1)
+    data = [
+        {"id": i, "name": f"item-{i}", "score": round(rng.random(), 4), "tags": rng.sample(WORDS, 3)}
+        for i in range(rows)
+    ]
+    return [{"type": "data", "data": {"rows": data}}]
+
+
+PAYLOADS = {
+    "answer_2k_words": make_answer(2000),
+    "tool_dump_500_rows": make_tool_dump(500),
+    "short_reply": make_answer(20),
+}
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"{'payload':<20} {'codec':<8} {'json_bytes':>10} {'stored':>8} {'ratio':>6} {'compress_us':>12} {'decompress_us':>14}")
+    for name, payload in PAYLOADS.items():
+        json_size = len(json.dumps(payload, separators=(",", ":")))
+        for algorithm, level in (("gzip", 1), ("gzip", 6), ("zstd", 1), ("zstd", 3), ("zstd", 9)):
+            codec = StorageCodec(algorithm, threshold=0, level=level)
+            _, blob = codec.encode(payload)
+            compress = timeit.timeit(lambda: codec.encode(payload), number=iterations) / iterations
+            decompress = timeit.timeit(lambda: decompress_json(blob), number=iterations) / iterations
+            print(
+                f"{name:<20} {algorithm + ':' + str(level):<8} {json_size:>10} {len(blob):>8} "
+                f"{json_size / len(blob):>6.1f} {compress * 1e6:>12.1f} {decompress * 1e6:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
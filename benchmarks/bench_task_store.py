@@ -0,0 +1,139 @@
+"""Throughput benchmark of the SQLite and Postgres task stores.
+
+Runs the same workload against each store: concurrent sessions whose tasks are
+claimed, retried, updated with a status message and completed with an artifact, as
+a server does, then paged through by session. Reports operations per second and
+mean latencies. tests/test_task_store_parity.py checks that the stores agree.
+
+    python benchmarks/bench_task_store.py --tasks 2000 --concurrency 50
+    DATABASE_URL=postgresql://.../a2a_bench python benchmarks/bench_task_store.py --postgres
+
+Postgres is only benchmarked with --postgres. Only run it against a disposable
+database: its tasks and artifacts tables are emptied first.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.task_managers.sqlite_task_manager import SQLiteTaskManager
+from a2a_service.types import Artifact, Message, TaskSendParams, TaskState, TaskStatus, TextPart
+
+
+def params(task: int, session: int, text: str) -> TaskSendParams:
+    return TaskSendParams(
+        id=f"task-{task}",
+        sessionId=f"session-{session}",
+        message=Message(role="user", parts=[TextPart(text=text)]),
+    )
+
+
+async def run_workload(store, tasks: int, sessions: int, concurrency: int, answer_words: int) -> dict:
+    """Drive a store like a server would and return its timings."""
+    answer = " ".join(["answer"] * answer_words)
+    timings = {"claim": 0.0, "update": 0.0, "get": 0.0}
+    counts = dict.fromkeys(timings, 0)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(name, call):
+        start = time.perf_counter()
+        result = await call
+        timings[name] += time.perf_counter() - start
+        counts[name] += 1
+        return result
+
+    async def one(i: int):
+        async with limit:
+            send = params(i, i % sessions, f"question {i}")
+            await timed("claim", store.claim_task(send))
+            await timed("claim", store.claim_task(send))
+            working = TaskStatus(state=TaskState.WORKING, message=Message(role="agent", parts=[TextPart(text="working")]))
+            await timed("update", store.update_store(send.id, working))
+            if i % 5 == 0:
+                # Ask for input, then continue the task with a second message
+                asked = TaskStatus(state=TaskState.INPUT_REQUIRED, message=Message(role="agent", parts=[TextPart(text="which one?")]))
+                await timed("update", store.update_store(send.id, asked))
+                await timed("claim", store.claim_task(send))
+                await timed("claim", store.claim_task(params(i, i % sessions, f"the first, {i}")))
+            artifact = Artifact(parts=[TextPart(text=f"{answer} {i}")], index=0)
+            await timed("update", store.update_store(send.id, TaskStatus(state=TaskState.COMPLETED), [artifact]))
+            await timed("get", store.get_task(send.id))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(tasks)))
+    elapsed = time.perf_counter() - start
+
+    # Page through every session
+    start = time.perf_counter()
+    for session in range(sessions):
+        cursor = None
+        while True:
+            page = list(store.iter_session_history(f"session-{session}", 7, cursor, 2))
+            if len(page) < 7 or page[-1][1] == cursor:
+                # A cursor that does not advance would page forever
+                break
+            cursor = page[-1][1]
+    history_elapsed = time.perf_counter() - start
+
+    return {
+        "ops_per_s": sum(counts.values()) / elapsed,
+        "history_elapsed": history_elapsed,
+        # Mean latency per operation, in seconds
+        "latency": {name: timings[name] / counts[name] for name in timings},
+    }
+
+
+def postgres_store():
+    from a2a_service.database import Base, engine
+    from a2a_service.models.db_models import ArtifactModel, TaskModel  # noqa: F401, registers the tables
+    from a2a_service.task_managers.db_task_manager import DatabaseTaskManager
+    from sqlalchemy import text
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE artifacts, tasks"))
+    return DatabaseTaskManager(None)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50, help="Tasks in flight at once")
+    parser.add_argument("--answer-words", type=int, default=200, help="Size of each stored answer")
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous setting")
+    parser.add_argument("--postgres", action="store_true", help="Also run against DATABASE_URL")
+    args = parser.parse_args()
+
+    stores = {}
+    directory = tempfile.mkdtemp()
+    stores["sqlite"] = lambda: SQLiteTaskManager(None, os.path.join(directory, "bench.db"), synchronous=args.synchronous)
+    if args.postgres:
+        stores["postgres"] = postgres_store
+
+    runs = {}
+    for name, make in stores.items():
+        store = make()
+        try:
+            runs[name] = await run_workload(store, args.tasks, args.sessions, args.concurrency, args.answer_words)
+        finally:
+            if hasattr(store, "close"):
+                store.close()
+
+    print(f"{'store':<10} {'ops/s':>10} {'claim_ms':>10} {'update_ms':>10} {'get_ms':>10} {'history_s':>10}")
+    for name, run in runs.items():
+        latency = run["latency"]
+        print(
+            f"{name:<10} {run['ops_per_s']:>10.0f} {latency['claim'] * 1000:>10.2f} "
+            f"{latency['update'] * 1000:>10.2f} {latency['get'] * 1000:>10.2f} {run['history_elapsed']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
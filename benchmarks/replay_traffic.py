@@ -0,0 +1,74 @@
+"""Replay recorded traffic against a server and report latency and throughput.
+
+Record traffic by running a server with TRAFFIC_RECORD_FILE set. To replay it, start
+the version under test with the recording as its model and tool outputs, preferably
+against a scratch database:
+
+    DATABASE_URL=postgresql://.../a2a_replay TRAFFIC_REPLAY_FILE=traffic.jsonl.gz python main.py
+
+and re-drive it with the recorded requests:
+
+    python benchmarks/replay_traffic.py traffic.jsonl.gz http://localhost:10000 \\
+        --speed 2 --output new.json --compare old.json
+
+--speed scales the recorded request timing (0 sends all requests at once), and the
+server's TRAFFIC_REPLAY_LATENCY_SCALE scales the recorded model and tool latencies
+(0 measures server overhead alone). No model provider or network access is needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Make the repo root importable when run as a script
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from a2a_service.traffic import replay_traffic
+
+
+def print_report(report: dict, baseline: dict = None):
+    rows = [
+        ("requests", report["requests"], baseline and baseline["requests"]),
+        ("failed", report["failed"], baseline and baseline["failed"]),
+        ("duration_s", report["duration"], baseline and baseline["duration"]),
+        ("throughput_rps", report["throughput"], baseline and baseline["throughput"]),
+    ]
+    for metric in ("latency", "first_event_latency"):
+        for q, value in report[metric].items():
+            rows.append((f"{metric}_{q}_s", value, baseline and baseline[metric][q]))
+
+    print(f"{'metric':<28} {'value':>10}" + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for name, value, base in rows:
+        line = f"{name:<28} {value if value is not None else '-':>10}"
+        if baseline:
+            change = f"{(value - base) / base * 100:+.1f}%" if value is not None and base else "-"
+            line += f" {base if base is not None else '-':>10} {change:>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="Traffic recording (TRAFFIC_RECORD_FILE)")
+    parser.add_argument("url", help="URL of the server under test")
+    parser.add_argument("--speed", type=float, default=1.0, help="Request timing speed-up; 0 sends all at once")
+    parser.add_argument("--header", action="append", default=[], help="Request header as Name:value, e.g. an API key")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    headers = dict(h.split(":", 1) for h in args.header)
+    report = asyncio.run(replay_traffic(args.recording, args.url, speed=args.speed, headers=headers))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,34 @@ wait_for_db() {
   fi
 }
 
+# Check whether the database schema is already at the latest revision.
+# This only reads the alembic_version table, which is much cheaper than
+# starting a full "alembic upgrade" run.
+schema_at_head() {
+  python - <<'PYEOF'
+import os
+import sys
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+
+heads = set(ScriptDirectory.from_config(Config("alembic.ini")).get_heads())
+try:
+    engine = create_engine(os.environ["DATABASE_URL"])
+    with engine.connect() as conn:
+        current = {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+except Exception:
+    sys.exit(1)
+sys.exit(0 if current == heads else 1)
+PYEOF
+}
+
 # Run database migrations
 run_migrations() {
+  if schema_at_head; then
+    echo "Database schema is already at head, skipping migrations."
+    return
+  fi
   echo "Running database migrations..."
   alembic upgrade head
   echo "Migrations completed!"
@@ -41,8 +67,14 @@ case "$1" in
     run_migrations
     ;;
   start)
-    wait_for_db
-    run_migrations
+    # The embedded SQLite store creates its own tables
+    if [ "${TASK_STORE:-postgres}" != "sqlite" ]; then
+      wait_for_db
+      # Migrations can be run by a separate job (see docker-compose.yaml)
+      if [ "${SKIP_MIGRATIONS:-false}" != "true" ]; then
+        run_migrations
+      fi
+    fi
     echo "Starting A2A LangGraph Agent..."
     exec python main.py
     ;;
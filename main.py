@@ -1,10 +1,12 @@
 import os
+import json
 import logging
 from dotenv import load_dotenv
-from a2a_service.server import A2AServer
 from a2a_service.types import AgentCapabilities, AgentSkill, AgentCard
-from a2a_service.agent import Agent
-from a2a_service.task_managers.db_task_manager import DatabaseTaskManager
+from a2a_service.agent import Agent, configure_checkpointer
+
+# The server, the task stores and optional subsystems are imported in main(), the
+# optional ones only when configured, so importing this module stays cheap.
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +19,104 @@ logger = logging.getLogger(__name__)
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 10000))
 MODEL = os.getenv("OPENAI_MODEL", "o4-mini")
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", 0)) or None
+CACHE_PROMPT_PREFIX = os.getenv("CACHE_PROMPT_PREFIX", "true").lower() == "true"
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "structured")
+MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", 0)) or None
+MODEL_HEDGE_DELAY = float(os.getenv("MODEL_HEDGE_DELAY", 0)) or None
+MODEL_REQUEST_TIMEOUT = float(os.getenv("MODEL_REQUEST_TIMEOUT", 60))
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", 2))
+MODEL_MAX_CONNECTIONS = int(os.getenv("MODEL_MAX_CONNECTIONS", 100))
+TASK_TIMEOUT = float(os.getenv("TASK_TIMEOUT", 0)) or None
+
+# Model routing: MODEL_ROUTES (JSON list of routes) or the primary model plus FALLBACK_MODELS
+if os.getenv("MODEL_ROUTES"):
+    MODEL_ROUTES = json.loads(os.environ["MODEL_ROUTES"])
+else:
+    fallback_models = [m.strip() for m in os.getenv("FALLBACK_MODELS", "").split(",") if m.strip()]
+    MODEL_ROUTES = [{"model": m} for m in [MODEL, *fallback_models]]
+    # Provider quotas for the primary model; set "rpm"/"tpm" per route in MODEL_ROUTES
+    MODEL_ROUTES[0]["rpm"] = float(os.getenv("MODEL_RPM", 0)) or None
+    MODEL_ROUTES[0]["tpm"] = float(os.getenv("MODEL_TPM", 0)) or None
+
+# Additional skills served by their own agent configuration, as JSON mapping skill id to
+# card fields ("name", "description") and Agent settings, with tools given by name
+AGENT_SKILLS = json.loads(os.getenv("AGENT_SKILLS", "{}"))
+
+# Peer A2A agents the agent can delegate sub-tasks to, as JSON mapping a name to "url" and
+# optionally "skill_id", "description" and "headers"; adds the delegate_to_agents tool
+PEER_AGENTS = json.loads(os.getenv("PEER_AGENTS", "{}"))
+DELEGATION_TIMEOUT = float(os.getenv("DELEGATION_TIMEOUT", 60))
+
+# Directory for files uploaded in task messages; file parts are only accepted when set.
+# Stored files are served under FILE_BASE_URL, the URL clients reach this server at,
+# which defaults to AGENT_URL.
+FILE_STORE_DIR = os.getenv("FILE_STORE_DIR")
+FILE_BASE_URL = os.getenv("FILE_BASE_URL") or os.getenv("AGENT_URL")
+FILE_MAX_BYTES = int(os.getenv("FILE_MAX_BYTES", 50 * 1024 * 1024))
+# Largest task request body; by default room for a file of FILE_MAX_BYTES in base64
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", FILE_MAX_BYTES * 4 // 3 + 1024 * 1024))
+
+# Task store: "postgres" (DATABASE_URL) or "sqlite", an embedded database file for
+# single-node deployments
+TASK_STORE = os.getenv("TASK_STORE", "postgres").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/a2a_service.db")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Crash recovery: runs hold a lease on their task, renewed while they run. Tasks whose
+# lease expired are taken over and finished from the agent's last checkpoint, which
+# needs a persistent checkpoint store (sqlite:///path or postgresql://...); with the
+# default in-memory checkpoints they are marked failed instead.
+LEASE_TTL = float(os.getenv("LEASE_TTL", 30))
+RECOVERY_INTERVAL = float(os.getenv("RECOVERY_INTERVAL", 0)) or None
+CHECKPOINT_URL = os.getenv("CHECKPOINT_URL")
+
+# Compression of large stored messages and artifacts: "zstd", "gzip" or "none"
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "none").lower()
+STORAGE_COMPRESSION_THRESHOLD = int(os.getenv("STORAGE_COMPRESSION_THRESHOLD", 4096))
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", 0)) or None
+
+# Priority classes sharing the agent slots, as JSON mapping class name to "weight",
+# "max_concurrent" and the "skills"/"principals" whose tasks belong to the class
+PRIORITY_CLASSES = json.loads(os.getenv("PRIORITY_CLASSES", "{}"))
+DEFAULT_PRIORITY_CLASS = os.getenv("DEFAULT_PRIORITY_CLASS", "default")
+
+# Authentication: API keys as JSON mapping principal to key, and/or JWT bearer tokens
+# verified with a shared secret or the issuer's JWKS. Requests are open if neither is set.
+API_KEYS = json.loads(os.getenv("API_KEYS", "{}"))
+JWT_SECRET = os.getenv("JWT_SECRET")
+JWT_JWKS_URL = os.getenv("JWT_JWKS_URL")
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE")
+JWT_ISSUER = os.getenv("JWT_ISSUER")
+JWT_ALGORITHMS = [a.strip() for a in os.getenv("JWT_ALGORITHMS", "").split(",") if a.strip()] or None
+CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", 600))
+
+# HTTP: response compression ("zstd,gzip" in order of preference, or "none"; zstd needs
+# the zstd extra), idle connection keep-alive, HTTP/2 (http2 extra) and TLS
+HTTP_COMPRESSION = [a.strip() for a in os.getenv("HTTP_COMPRESSION", "gzip").split(",") if a.strip() not in ("", "none")]
+HTTP_COMPRESSION_MIN_SIZE = int(os.getenv("HTTP_COMPRESSION_MIN_SIZE", 1024))
+HTTP_KEEP_ALIVE_TIMEOUT = float(os.getenv("HTTP_KEEP_ALIVE_TIMEOUT", 75))
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"
+SSL_CERTFILE = os.getenv("SSL_CERTFILE")
+SSL_KEYFILE = os.getenv("SSL_KEYFILE")
+
+# Principals (API key names or JWT subjects) allowed to use the /admin profiling endpoints
+ADMIN_PRINCIPALS = [p.strip() for p in os.getenv("ADMIN_PRINCIPALS", "").split(",") if p.strip()]
+
+# Per-caller quotas on task requests and LLM tokens per minute
+CALLER_RPM = float(os.getenv("CALLER_RPM", 0)) or None
+CALLER_TPM = float(os.getenv("CALLER_TPM", 0)) or None
+MAX_EVENT_LOOP_LAG = float(os.getenv("MAX_EVENT_LOOP_LAG", 0.5))
+
+# Traffic recording for replay: task requests with their model and tool outputs, for a
+# sample of sessions. A server started with TRAFFIC_REPLAY_FILE answers replayed tasks
+# with the recorded outputs instead of calling models and tools.
+TRAFFIC_RECORD_FILE = os.getenv("TRAFFIC_RECORD_FILE")
+TRAFFIC_SAMPLE_RATE = float(os.getenv("TRAFFIC_SAMPLE_RATE", 1.0))
+TRAFFIC_REDACT_METADATA = [k.strip() for k in os.getenv("TRAFFIC_REDACT_METADATA", "").split(",") if k.strip()]
+TRAFFIC_REPLAY_FILE = os.getenv("TRAFFIC_REPLAY_FILE")
+TRAFFIC_REPLAY_LATENCY_SCALE = float(os.getenv("TRAFFIC_REPLAY_LATENCY_SCALE", 1.0))
 
 # Create agent capabilities and skills
 capabilities = AgentCapabilities(streaming=False, pushNotifications=False)
@@ -33,29 +133,197 @@ skill = AgentSkill(
 agent_card = AgentCard(
     name="LangGraph Agent",
     description="A versatile agent that can answer questions using search tools",
-    url=f"http://{HOST}:{PORT}/",
+    # AGENT_URL is the public URL; the bind address is only reachable on the host itself
+    url=os.getenv("AGENT_URL") or f"http://{HOST}:{PORT}/",
     version="1.0.0",
-    defaultInputModes=Agent.SUPPORTED_CONTENT_TYPES,
+    defaultInputModes=Agent.SUPPORTED_CONTENT_TYPES + ["data"] + (["file"] if FILE_STORE_DIR else []),
     defaultOutputModes=Agent.SUPPORTED_CONTENT_TYPES,
     capabilities=capabilities,
-    skills=[skill],
+    skills=[skill] + [
+        AgentSkill(id=skill_id, name=config.get("name", skill_id), description=config.get("description"))
+        for skill_id, config in AGENT_SKILLS.items()
+        if skill_id != skill.id
+    ],
 )
 
+
+def build_tools():
+    """Returns the tools available to agents by name."""
+    from a2a_service import tools as agent_tools
+
+    tools = {"search_web": agent_tools.search_web}
+    if PEER_AGENTS:
+        tools["delegate_to_agents"] = agent_tools.make_delegation_tool(PEER_AGENTS, timeout=DELEGATION_TIMEOUT)
+    return tools
+
+
+def skill_agent_settings(config, tools):
+    """Returns the Agent settings of an AGENT_SKILLS entry."""
+    settings = {key: value for key, value in config.items() if key not in ("name", "description")}
+    if "tools" in settings:
+        settings["tools"] = [tools[name] for name in settings["tools"]]
+    return settings
+
+
 def main():
     """Creates and starts the A2A LangGraph Agent server."""
     try:
-        # Initialize agent with specified model
-        agent = Agent(model_name=MODEL)
+        from a2a_service.server import A2AServer
+        from a2a_service.registry import AgentRegistry
+        from a2a_service.recovery import TaskRecovery
+        from a2a_service.scheduler import PriorityClass, TaskScheduler
+
+        # Without peers, replay or per-skill tools, agents load their default tools
+        # when the graph is built, after the server is up
+        tools = None
+        if PEER_AGENTS or TRAFFIC_REPLAY_FILE or any("tools" in config for config in AGENT_SKILLS.values()):
+            tools = build_tools()
+
+        recorder = None
+        agent_overrides = {}
+        if TRAFFIC_RECORD_FILE:
+            from a2a_service.traffic import TrafficRecorder
+
+            recorder = TrafficRecorder(
+                TRAFFIC_RECORD_FILE,
+                sample_rate=TRAFFIC_SAMPLE_RATE,
+                redact_metadata=TRAFFIC_REDACT_METADATA,
+            )
+            agent_overrides["callbacks"] = [recorder]
+        if TRAFFIC_REPLAY_FILE:
+            from a2a_service.callbacks import UsageMetricsHandler
+            from a2a_service.replay import TrafficReplay
+
+            replay = TrafficReplay(TRAFFIC_REPLAY_FILE, latency_scale=TRAFFIC_REPLAY_LATENCY_SCALE)
+            agent_overrides["model"] = replay.chat_model(callbacks=[UsageMetricsHandler("replay")])
+            replayed = replay.tools(list(tools.values()))
+            tools = {key: replayed[tool.name] for key, tool in tools.items()}
+            logger.info(f"Replaying model and tool outputs from {TRAFFIC_REPLAY_FILE}")
+
+        configure_checkpointer(CHECKPOINT_URL)
+
+        # Initialize the agents, one per distinct skill configuration
+        agent = AgentRegistry(
+            defaults=dict(
+                model_name=MODEL,
+                context_max_tokens=CONTEXT_MAX_TOKENS,
+                cache_prompt_prefix=CACHE_PROMPT_PREFIX,
+                response_mode=RESPONSE_MODE,
+                model_routes=MODEL_ROUTES,
+                model_timeout=MODEL_TIMEOUT,
+                hedge_delay=MODEL_HEDGE_DELAY,
+                request_timeout=MODEL_REQUEST_TIMEOUT,
+                max_retries=MODEL_MAX_RETRIES,
+                max_connections=MODEL_MAX_CONNECTIONS,
+                task_timeout=TASK_TIMEOUT,
+                tools=list(tools.values()) if tools else None,
+                **agent_overrides,
+            ),
+            skills={skill_id: skill_agent_settings(config, tools) for skill_id, config in AGENT_SKILLS.items()},
+        )
+        # Check every skill's settings before the server starts; graphs are still built later
+        agent.agents()
         
-        # Create database-backed task manager
-        task_manager = DatabaseTaskManager(agent=agent)
+        # Create the task manager on the configured store
+        file_store = None
+        if FILE_STORE_DIR:
+            from a2a_service.files import FileStore
+
+            if not FILE_BASE_URL:
+                raise ValueError("FILE_STORE_DIR requires FILE_BASE_URL or AGENT_URL, the URL clients download files from")
+            file_store = FileStore(FILE_STORE_DIR, FILE_BASE_URL, max_file_size=FILE_MAX_BYTES)
+        storage_codec = None
+        if STORAGE_COMPRESSION != "none":
+            from a2a_service.compression import StorageCodec
+
+            storage_codec = StorageCodec(STORAGE_COMPRESSION, threshold=STORAGE_COMPRESSION_THRESHOLD)
+        scheduler = TaskScheduler(
+            max_concurrent=MAX_CONCURRENT_RUNS,
+            classes=[PriorityClass(name, **config) for name, config in PRIORITY_CLASSES.items()],
+            default_class=DEFAULT_PRIORITY_CLASS,
+        )
+        services = []
+        if TASK_STORE == "sqlite":
+            from a2a_service.task_managers.sqlite_task_manager import SQLiteTaskManager
+
+            task_manager = SQLiteTaskManager(
+                agent=agent,
+                path=SQLITE_PATH,
+                file_store=file_store,
+                storage_codec=storage_codec,
+                scheduler=scheduler,
+                synchronous=SQLITE_SYNCHRONOUS,
+                lease_ttl=LEASE_TTL,
+            )
+            # Closes the database on shutdown
+            services.append(task_manager)
+        elif TASK_STORE == "postgres":
+            from a2a_service.task_managers.db_task_manager import DatabaseTaskManager
+
+            task_manager = DatabaseTaskManager(
+                agent=agent,
+                file_store=file_store,
+                storage_codec=storage_codec,
+                scheduler=scheduler,
+                lease_ttl=LEASE_TTL,
+            )
+        else:
+            raise ValueError(f"Unsupported TASK_STORE: {TASK_STORE}")
+        # Heartbeat the leases of runs and recover tasks orphaned by a crash
+        services.append(TaskRecovery(task_manager, interval=RECOVERY_INTERVAL))
+        
+        # Expire finished tasks in the background if a retention policy is configured
+        if TASK_STORE == "postgres":
+            from a2a_service.retention import RetentionPolicy, RetentionWorker
+
+            retention_policy = RetentionPolicy.from_env()
+            if retention_policy:
+                services.append(RetentionWorker(retention_policy))
+        elif any(key.startswith("RETENTION_TTL_") for key in os.environ):
+            logger.warning("Task retention requires the postgres task store; RETENTION_* settings are ignored")
         
+        authenticators = []
+        if API_KEYS:
+            from a2a_service.auth import ApiKeyAuthenticator
+
+            authenticators.append(ApiKeyAuthenticator(API_KEYS))
+        if JWT_SECRET or JWT_JWKS_URL:
+            from a2a_service.auth import JWTAuthenticator
+
+            authenticators.append(JWTAuthenticator(
+                secret=JWT_SECRET,
+                jwks_url=JWT_JWKS_URL,
+                audience=JWT_AUDIENCE,
+                issuer=JWT_ISSUER,
+                algorithms=JWT_ALGORITHMS,
+            ))
+        quotas = None
+        if CALLER_RPM or CALLER_TPM:
+            from a2a_service.ratelimit import CallerQuotas
+
+            quotas = CallerQuotas(rpm=CALLER_RPM, tpm=CALLER_TPM)
+
         # Create and start server
         server = A2AServer(
             agent_card=agent_card,
             task_manager=task_manager,
             host=HOST,
             port=PORT,
+            max_event_loop_lag=MAX_EVENT_LOOP_LAG,
+            services=services,
+            authenticators=authenticators,
+            quotas=quotas,
+            cors_origins=CORS_ORIGINS,
+            cors_max_age=CORS_MAX_AGE,
+            compression=HTTP_COMPRESSION,
+            compression_min_size=HTTP_COMPRESSION_MIN_SIZE,
+            keep_alive_timeout=HTTP_KEEP_ALIVE_TIMEOUT,
+            http2=HTTP2,
+            ssl_certfile=SSL_CERTFILE,
+            ssl_keyfile=SSL_KEYFILE,
+            recorder=recorder,
+            admin_principals=ADMIN_PRINCIPALS,
+            max_request_size=MAX_REQUEST_BYTES,
         )
 
         logger.info(f"Starting LangGraph Agent server on {HOST}:{PORT}")
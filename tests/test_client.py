@@ -0,0 +1,78 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+
+from a2a_service import client as client_module
+from a2a_service.client import A2AClient
+from a2a_service.types import A2AClientHTTPError, Message, TaskSendParams, TextPart
+
+EVENT = (
+    b'data: {"jsonrpc": "2.0", "id": 1, "result": {"id": "t1", '
+    b'"status": {"state": "working"}, "final": false}}\n\n'
+)
+FINAL = (
+    b'data: {"jsonrpc": "2.0", "id": 1, "result": {"id": "t1", '
+    b'"status": {"state": "completed"}, "final": true}}\n\n'
+)
+
+PARAMS = TaskSendParams(id="t1", sessionId="s1", message=Message(role="user", parts=[TextPart(text="hi")]))
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """Sends one event, then loses the connection."""
+
+    async def __aiter__(self):
+        yield EVENT
+        raise httpx.ReadError("connection reset")
+
+
+def stream_events(monkeypatch, responses: List[httpx.Response]) -> List[httpx.Request]:
+    """Serve the responses in turn to the client's requests, returning the requests made."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(client_module, "get_http_client", lambda *args: http)
+    return requests
+
+
+async def collect(client: A2AClient) -> list:
+    return [event.result.status.state.value async for event in client.send_task_streaming(PARAMS)]
+
+
+def test_retries_a_stream_that_did_not_start(monkeypatch):
+    requests = stream_events(
+        monkeypatch,
+        [
+            httpx.Response(503, headers={"Retry-After": "0"}),
+            httpx.Response(200, content=EVENT + FINAL, headers={"Content-Type": "text/event-stream"}),
+        ],
+    )
+
+    assert asyncio.run(collect(A2AClient("http://agent", backoff=0))) == ["working", "completed"]
+    assert len(requests) == 2
+
+
+def test_does_not_resend_a_task_whose_stream_broke(monkeypatch):
+    requests = stream_events(
+        monkeypatch,
+        [
+            httpx.Response(200, stream=BrokenStream(), headers={"Content-Type": "text/event-stream"}),
+            httpx.Response(200, content=EVENT + FINAL, headers={"Content-Type": "text/event-stream"}),
+        ],
+    )
+    events = []
+
+    async def scenario():
+        async for event in A2AClient("http://agent", backoff=0).send_task_streaming(PARAMS):
+            events.append(event.result.status.state.value)
+
+    with pytest.raises(A2AClientHTTPError, match="broke"):
+        asyncio.run(scenario())
+    assert events == ["working"]
+    assert len(requests) == 1
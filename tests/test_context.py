@@ -0,0 +1,68 @@
+import uuid
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from pydantic import Field
+
+from a2a_service.agent import Agent
+from a2a_service.context import ContextCompactor
+
+
+class RecordingChatModel(BaseChatModel):
+    """Answers every turn with a respond call and records the size of each model input."""
+
+    answer: str = "x" * 400
+    # Number of messages received by each agent call, summarization calls excluded
+    calls: List[int] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "RecordingChatModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if isinstance(messages[0], SystemMessage) and messages[0].content == ContextCompactor.SUMMARY_PROMPT:
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Earlier turns."))])
+        self.calls.append(len(messages))
+        call = {
+            "name": Agent.RESPONSE_TOOL_NAME,
+            "args": {"status": "completed", "message": self.answer},
+            "id": str(uuid.uuid4()),
+        }
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+def test_compaction_bounds_every_model_call():
+    model = RecordingChatModel()
+    agent = Agent(model=model, tools=[lookup], response_mode="tool", context_max_tokens=300)
+    session_id = str(uuid.uuid4())
+
+    turns = 20
+    for i in range(turns):
+        response = agent.invoke(f"question {i} " + "y" * 100, session_id)
+        assert response["is_task_complete"]
+
+    # Each turn adds a user message, the respond call and its tool message
+    history = len(agent.graph.get_state(agent._run_config(session_id)).values["messages"])
+    assert history == 3 * turns
+    assert len(model.calls) == turns
+    # System prompt, an optional summary, and the turns that fit in the budget
+    assert max(model.calls) <= 8
+    assert model.calls[-1] < history
+
+
+def test_compaction_requires_tool_response_mode():
+    with pytest.raises(ValueError, match="tool"):
+        Agent(model=RecordingChatModel(), response_mode="structured", context_max_tokens=300)
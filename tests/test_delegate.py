@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from a2a_service.tools import delegate
+from a2a_service.types import (
+    Artifact,
+    Message,
+    SendTaskStreamingResponse,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+# Answers of the fake peers by URL: the chunks they stream and the delay before each
+PEERS: Dict[str, Dict[str, Any]] = {
+    "http://fast": {"chunks": ["Sales ", "are up."], "delay": 0.01},
+    "http://slow": {"chunks": ["Revenue ", "grew ", "by 5%."], "delay": 0.2},
+}
+
+
+class FakePeerClient:
+    """Streams a canned answer chunk by chunk, recording the tasks sent to it."""
+
+    sent: List[Any] = []
+    closed: List[str] = []
+
+    def __init__(self, url: str, **kwargs: Any):
+        self.url = url
+
+    async def send_task_streaming(self, params):
+        self.sent.append((self.url, params))
+        peer = PEERS[self.url]
+        try:
+            for index, chunk in enumerate(peer["chunks"]):
+                await asyncio.sleep(peer["delay"])
+                artifact = Artifact(parts=[TextPart(text=chunk)], index=0, append=index > 0)
+                yield SendTaskStreamingResponse(result=TaskArtifactUpdateEvent(id=params.id, artifact=artifact))
+            status = TaskStatus(state=TaskState.COMPLETED, message=Message(role="agent", parts=[TextPart(text="done")]))
+            yield SendTaskStreamingResponse(result=TaskStatusUpdateEvent(id=params.id, status=status, final=True))
+        finally:
+            self.closed.append(params.id)
+
+
+@pytest.fixture
+def tool(monkeypatch):
+    FakePeerClient.sent, FakePeerClient.closed = [], []
+    monkeypatch.setattr(delegate, "A2AClient", FakePeerClient)
+    return delegate.make_delegation_tool(
+        {"reports": {"url": "http://fast"}, "finance": {"url": "http://slow"}}, timeout=0.3
+    )
+
+
+def ask(tool, requests: List[Dict[str, str]], thread_id: str = "caller") -> str:
+    config = {"configurable": {"thread_id": thread_id}}
+    return asyncio.run(tool.ainvoke({"requests": requests}, config))
+
+
+def test_returns_every_peer_answer(tool):
+    answer = ask(tool, [{"agent": "reports", "query": "sales?"}, {"agent": "nobody", "query": "?"}])
+
+    assert "[reports] Sales are up." in answer
+    assert "[nobody] unknown agent" in answer
+
+
+def test_cancels_peers_at_the_deadline_with_their_partial_answer(tool):
+    start = time.monotonic()
+    answer = ask(tool, [{"agent": "reports", "query": "sales?"}, {"agent": "finance", "query": "revenue?"}])
+
+    assert time.monotonic() - start < 0.5
+    assert "[reports] Sales are up." in answer
+    assert "[finance] no answer before the deadline. Partial answer: Revenue" in answer
+    # The straggler's stream was closed
+    finance_task = next(params.id for url, params in FakePeerClient.sent if url == "http://slow")
+    assert finance_task in FakePeerClient.closed
+
+
+def test_gives_each_sub_task_its_own_peer_session(tool):
+    ask(tool, [{"agent": "reports", "query": "north?"}, {"agent": "reports", "query": "south?"}])
+
+    sessions = [params.sessionId for _, params in FakePeerClient.sent]
+    assert len(set(sessions)) == 2
+    assert all(session.startswith("caller:reports:") for session in sessions)
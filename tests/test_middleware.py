@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from a2a_service.middleware import ResponseCompressionMiddleware
+from a2a_service.server import A2AServer
+from a2a_service.types import AgentCapabilities, AgentCard
+
+BODY = {"text": "x" * 2000}
+
+
+def versioned(request):
+    return JSONResponse(BODY, headers={"ETag": '"v1"'})
+
+
+def client() -> TestClient:
+    app = Starlette(routes=[Route("/", versioned)])
+    return TestClient(ResponseCompressionMiddleware(app, algorithms=["gzip"]))
+
+
+def test_marks_the_etag_of_an_encoded_response_weak():
+    response = client().get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.json() == BODY
+
+
+def test_keeps_the_etag_of_an_identity_response():
+    response = client().get("/", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_an_explicitly_refused_coding_overrides_the_wildcard():
+    middleware = ResponseCompressionMiddleware(None, algorithms=["gzip"])
+
+    assert middleware._negotiate("*") == "gzip"
+    assert middleware._negotiate("*, gzip;q=0") is None
+    assert middleware._negotiate("gzip;q=0, *") is None
+    assert middleware._negotiate("*;q=0, gzip") == "gzip"
+
+
+def test_agent_card_revalidates_with_a_weak_etag():
+    card = AgentCard(name="t", url="http://x", version="1", capabilities=AgentCapabilities(), skills=[])
+    server = A2AServer(card, task_manager=None, compression=["gzip"], compression_min_size=0)
+
+    http = TestClient(server.app)
+
+    response = http.get("/.well-known/agent.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+
+    response = http.get("/.well-known/agent.json", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
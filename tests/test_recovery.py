@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+from a2a_service.agent import Agent
+from a2a_service.recovery import TaskRecovery
+from a2a_service.task_managers.async_inmem_task_manager import AgentTaskManager
+from a2a_service.task_managers.sqlite_task_manager import SQLiteTaskManager
+from a2a_service.types import Message, TaskSendParams, TaskState, TextPart
+
+
+class SearchingChatModel(BaseChatModel):
+    """Searches for every question, then answers with the search result."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "searching"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "SearchingChatModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            call = {"name": "search", "args": {"query": last.content}, "id": uuid.uuid4().hex}
+            message = AIMessage(content="", tool_calls=[call])
+        elif isinstance(last, ToolMessage):
+            message = AIMessage(content=f"Answer: {last.content}")
+        else:
+            args = {"status": "completed", "message": last.content}
+            message = AIMessage(content="", tool_calls=[{"name": "ResponseFormat", "args": args, "id": uuid.uuid4().hex}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+crash = {"on": False}
+
+
+@tool
+def search(query: str) -> str:
+    """Search the web."""
+    if crash["on"]:
+        # Not caught by the tool node, like the process dying mid-run
+        raise SystemExit("process died")
+    return f"found {query}"
+
+
+def interrupted_run(agent: Agent, query: str, session_id: str, task_id: str):
+    crash["on"] = True
+    try:
+        with pytest.raises(SystemExit):
+            agent.invoke(query, session_id, task_id=task_id)
+    finally:
+        crash["on"] = False
+
+
+def test_resumes_the_run_of_the_task():
+    agent = Agent(model=SearchingChatModel(), tools=[search])
+    interrupted_run(agent, "paris", "s1", "t1")
+
+    response = agent.resume("t1", "s1")
+    assert response["is_task_complete"] and response["content"] == "Answer: found paris"
+
+
+def test_does_not_resume_another_task_of_the_session():
+    agent = Agent(model=SearchingChatModel(), tools=[search])
+    # The same question twice: the task, not the last user message, identifies the run
+    agent.invoke("paris", "s1", task_id="t1")
+    interrupted_run(agent, "paris", "s1", "t2")
+
+    assert agent.resume("t1", "s1") is None
+    assert agent.resume("t2", "s1")["content"] == "Answer: found paris"
+    assert agent.resume("t2", "s2") is None
+
+
+def test_leaves_tasks_without_a_lease_alone(tmp_path):
+    store = SQLiteTaskManager(None, str(tmp_path / "tasks.db"), lease_ttl=0.01)
+    send = TaskSendParams(id="t1", sessionId="s1", message=Message(role="user", parts=[TextPart(text="hi")]))
+
+    async def scenario():
+        await store.claim_task(send)
+        legacy = TaskSendParams(id="t2", sessionId="s1", message=send.message)
+        await store.claim_task(legacy)
+        # As written by a version that kept no leases
+        await store._write(lambda conn: conn.execute("UPDATE tasks SET lease_owner = NULL, lease_expires_at = NULL WHERE id = 't2'"))
+        await asyncio.sleep(0.05)
+        return await store.claim_orphaned_tasks()
+
+    try:
+        orphans = asyncio.run(scenario())
+        assert [orphan["id"] for orphan in orphans] == ["t1"]
+        assert asyncio.run(store.get_task("t2")).status.state == TaskState.WORKING
+    finally:
+        store.close()
+
+
+def test_recovery_is_off_for_task_managers_without_leases():
+    recovery = TaskRecovery(AgentTaskManager(Agent(model=SearchingChatModel(), tools=[search])))
+
+    async def scenario():
+        recovery.start()
+        await recovery.stop()
+
+    asyncio.run(scenario())
+    assert not recovery.enabled and recovery._task is None
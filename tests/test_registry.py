@@ -0,0 +1,52 @@
+import uuid
+from typing import Any, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from a2a_service.agent import Agent
+from a2a_service.registry import AgentRegistry
+
+
+class CountingChatModel(BaseChatModel):
+    """Answers every turn with a respond call, recording the user messages it was sent."""
+
+    calls: List[List[str]] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "CountingChatModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls.append([m.content for m in messages if isinstance(m, HumanMessage)])
+        call = {"name": Agent.RESPONSE_TOOL_NAME, "args": {"status": "completed", "message": "ok"}, "id": str(uuid.uuid4())}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+
+
+def test_skills_keep_separate_conversations_in_a_session():
+    model = CountingChatModel()
+    registry = AgentRegistry(
+        {"model": model, "tools": [], "response_mode": "tool"},
+        {
+            "translate": {"system_instruction": "Translate."},
+            "summarize": {"system_instruction": "Summarize."},
+            # The same settings as summarize, so the compiled graph is shared
+            "digest": {"system_instruction": "Summarize."},
+        },
+    )
+
+    for skill_id in ("translate", "summarize", "digest", "translate"):
+        registry.invoke(f"to {skill_id}", "s1", skill_id)
+
+    assert registry.agent_for("summarize") is registry.agent_for("digest")
+    assert model.calls == [
+        ["to translate"],
+        ["to summarize"],
+        ["to digest"],
+        ["to translate", "to translate"],
+    ]
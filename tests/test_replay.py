@@ -0,0 +1,51 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import ToolException, tool
+
+from a2a_service.replay import TrafficReplay
+from a2a_service.traffic import current_task_params
+from a2a_service.types import TaskSendParams
+
+
+@tool
+def search_web(query: str) -> str:
+    """Search the web."""
+    raise AssertionError("the real tool is not called during replay")
+
+
+@pytest.fixture
+def replayed(tmp_path):
+    path = tmp_path / "traffic.jsonl.gz"
+    # Each recorded call answers one replayed call
+    entries = [
+        {"kind": "tool", "session": "s1", "name": "search_web", "args": {"query": "paris"}, "latency": 0.5, "output": "found paris"}
+        for _ in range(3)
+    ]
+    entries.append({"kind": "tool", "session": "s1", "name": "search_web", "args": {"query": "rome"}, "latency": 0.5, "error": "rate limited"})
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(entry) + "\n" for entry in entries)
+    current_task_params.set(TaskSendParams(id="t1", sessionId="s1", message={"role": "user", "parts": []}))
+    return TrafficReplay(str(path), latency_scale=0).tools([search_web])["search_web"]
+
+
+def test_answers_a_tool_call_with_a_tool_message(replayed):
+    call = {"type": "tool_call", "id": "call-1", "name": "search_web", "args": {"query": "paris"}}
+
+    message = replayed.invoke(call)
+    assert isinstance(message, ToolMessage)
+    assert message.content == "found paris" and message.tool_call_id == "call-1"
+
+
+def test_answers_plain_arguments_with_the_output(replayed):
+    assert replayed.invoke({"query": "paris"}) == "found paris"
+    assert asyncio.run(replayed.ainvoke({"query": "paris"})) == "found paris"
+    assert replayed.run({"query": "paris"}) == "found paris"
+
+
+def test_raises_the_recorded_error(replayed):
+    with pytest.raises(ToolException, match="rate limited"):
+        replayed.invoke({"query": "rome"})
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.outputs import ChatResult
+from langgraph.prebuilt import create_react_agent
+
+from a2a_service.router import ModelBackend, ModelRouter, ModelRouterError
+
+
+class FakeBackendModel(FakeListChatModel):
+    """FakeListChatModel that can be slow to answer or fail, and counts its calls."""
+
+    delay: float = 0.0
+    error: Optional[str] = None
+    calls: int = 0
+
+    def _start(self):
+        self.calls += 1
+        if self.error:
+            raise RuntimeError(self.error)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.delay)
+        self._start()
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        self._start()
+        return super()._generate(messages, stop, None, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        time.sleep(self.delay)
+        self._start()
+        yield from super()._stream(messages, stop, run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self.delay)
+        self._start()
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+def backend(name: str, **kwargs: Any) -> ModelBackend:
+    return ModelBackend(name, FakeBackendModel(responses=[f"answer from {name}"], **kwargs))
+
+
+def router(*backends: ModelBackend, **kwargs: Any) -> ModelRouter:
+    return ModelRouter(backends=list(backends), **kwargs)
+
+
+def routed_to(message) -> str:
+    return message.response_metadata["router_backend"]
+
+
+def test_falls_back_when_a_backend_fails():
+    model = router(backend("primary", error="boom"), backend("fallback"))
+
+    assert model.invoke("hi").content == "answer from fallback"
+    message = asyncio.run(model.ainvoke("hi"))
+    assert message.content == "answer from fallback" and routed_to(message) == "fallback"
+
+
+def test_raises_when_every_backend_fails():
+    model = router(backend("a", error="boom"), backend("b", error="bang"))
+
+    with pytest.raises(ModelRouterError, match="a: error .*b: error"):
+        model.invoke("hi")
+    with pytest.raises(ModelRouterError):
+        asyncio.run(model.ainvoke("hi"))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_abandons_a_backend_past_its_timeout(use_async):
+    model = router(backend("slow", delay=1.0), backend("fast"), timeout=0.1)
+
+    start = time.monotonic()
+    message = asyncio.run(model.ainvoke("hi")) if use_async else model.invoke("hi")
+    assert routed_to(message) == "fast"
+    assert time.monotonic() - start < 0.8
+
+
+def test_backend_timeout_overrides_the_router_timeout():
+    slow = backend("slow", delay=0.3)
+    slow.timeout = 1.0
+    model = router(slow, backend("fast"), timeout=0.1)
+
+    assert routed_to(model.invoke("hi")) == "slow"
+
+
+def test_stops_at_the_task_deadline():
+    model = router(backend("slow", delay=1.0), backend("slower", delay=1.0))
+
+    start = time.monotonic()
+    with pytest.raises(ModelRouterError, match="timeout"):
+        asyncio.run(model.ainvoke("hi", config={"metadata": {"deadline": time.time() + 0.1}}))
+    assert time.monotonic() - start < 0.8
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_hedges_a_slow_backend(use_async):
+    slow, fast = backend("slow", delay=0.5), backend("fast")
+    model = router(slow, fast, hedge_delay=0.05)
+
+    start = time.monotonic()
+    message = asyncio.run(model.ainvoke("hi")) if use_async else model.invoke("hi")
+    assert routed_to(message) == "fast"
+    assert time.monotonic() - start < 0.4
+    assert fast.model.calls == 1
+
+
+def test_does_not_hedge_a_fast_backend():
+    fast, hedge = backend("fast"), backend("hedge")
+    model = router(fast, hedge, hedge_delay=0.5)
+
+    assert routed_to(asyncio.run(model.ainvoke("hi"))) == "fast"
+    assert hedge.model.calls == 0
+
+
+def test_prefers_backends_for_the_skill():
+    chat, coding = backend("chat"), backend("coding")
+    chat.skills, coding.skills = {"chat"}, {"code"}
+    model = router(chat, coding)
+
+    assert routed_to(model.invoke("hi", config={"metadata": {"skill_id": "code"}})) == "coding"
+    assert routed_to(model.invoke("hi", config={"metadata": {"skill_id": "chat"}})) == "chat"
+
+
+def test_streams_from_the_chosen_backend():
+    model = router(backend("primary", error="boom"), backend("fallback"))
+
+    chunks = list(model.stream("hi"))
+    assert len(chunks) > 1
+    assert "".join(c.content for c in chunks) == "answer from fallback"
+
+    async def collect() -> List[Any]:
+        return [chunk async for chunk in model.astream("hi")]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1
+    assert "".join(c.content for c in chunks) == "answer from fallback"
+
+
+def test_stream_abandons_a_backend_past_its_timeout():
+    model = router(backend("slow", delay=1.0), backend("fast"), timeout=0.1)
+
+    async def collect() -> List[Any]:
+        return [chunk async for chunk in model.astream("hi")]
+
+    start = time.monotonic()
+    assert "".join(c.content for c in asyncio.run(collect())) == "answer from fast"
+    assert time.monotonic() - start < 0.8
+
+
+def test_graph_streams_each_token_once():
+    graph = create_react_agent(router(backend("primary"), backend("fallback"), timeout=5), tools=[])
+
+    async def collect() -> List[str]:
+        tokens = []
+        async for chunk, _ in graph.astream({"messages": [("user", "hi")]}, stream_mode="messages"):
+            tokens.append(chunk.content)
+        return tokens
+
+    tokens = asyncio.run(collect())
+    assert len(tokens) > 1
+    assert "".join(tokens) == "answer from primary"
@@ -0,0 +1,95 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from a2a_service.scheduler import PriorityClass, SchedulerQueueFullError, TaskScheduler
+
+
+async def hold(scheduler: TaskScheduler, class_name: str, caller: str, admitted: List[str], release: asyncio.Event):
+    async with scheduler.slot(class_name, caller):
+        admitted.append(class_name)
+        await release.wait()
+
+
+def test_admits_waiting_classes_in_proportion_to_their_weights():
+    scheduler = TaskScheduler(1, [PriorityClass("interactive", weight=3), PriorityClass("batch", weight=1)])
+    admitted: List[str] = []
+
+    async def scenario():
+        blocker = asyncio.Event()
+        first = asyncio.create_task(hold(scheduler, "default", "c0", [], blocker))
+        await asyncio.sleep(0)
+        release = asyncio.Event()
+        release.set()
+        waiting = [
+            asyncio.create_task(hold(scheduler, name, f"caller-{i}", admitted, release))
+            for i in range(8)
+            for name in ("batch", "interactive")
+        ]
+        await asyncio.sleep(0)
+        blocker.set()
+        await asyncio.gather(first, *waiting)
+
+    asyncio.run(scenario())
+    assert admitted[:8].count("interactive") == 6
+    assert admitted[:8].count("batch") == 2
+    # The low-weight class still drains
+    assert admitted.count("batch") == 8
+
+
+def test_releases_the_slot_of_a_failed_or_cancelled_run():
+    scheduler = TaskScheduler(1)
+
+    async def failing():
+        async with scheduler.slot("default", "c1"):
+            raise RuntimeError("agent failed")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await failing()
+        assert scheduler.running == 0
+
+        never = asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, "default", "c1", [], never))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(scheduler, "default", "c2", [], never))
+        await asyncio.sleep(0)
+        assert scheduler.running == 1 and scheduler.classes["default"].waiting == 1
+
+        # A cancelled waiter leaves the queue, a cancelled run frees its slot
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert scheduler.classes["default"].waiting == 0
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        assert scheduler.running == 0
+
+        async with scheduler.slot("default", "c3"):
+            assert scheduler.running == 1
+
+    asyncio.run(scenario())
+
+
+def test_refuses_runs_when_the_class_queue_is_full():
+    scheduler = TaskScheduler(1, [PriorityClass("batch", max_waiting=1)])
+
+    async def scenario():
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, "batch", "c1", [], release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(scheduler, "batch", "c2", [], release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerQueueFullError):
+            async with scheduler.slot("batch", "c3"):
+                pass
+        # Other classes still queue
+        other = asyncio.create_task(hold(scheduler, "default", "c4", [], release))
+        await asyncio.sleep(0)
+        assert scheduler.classes["default"].waiting == 1
+
+        release.set()
+        await asyncio.gather(running, queued, other)
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from a2a_service.auth import ApiKeyAuthenticator
+from a2a_service.ratelimit import CallerQuotas
+from a2a_service.server import A2AServer
+from a2a_service.types import AgentCapabilities, AgentCard, SendTaskResponse, Task, TaskState, TaskStatus
+
+CARD = AgentCard(name="t", url="http://x", version="1", capabilities=AgentCapabilities(), skills=[])
+
+SEND = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tasks/send",
+    "params": {"id": "t1", "sessionId": "s1", "message": {"role": "user", "parts": [{"type": "text", "text": "hi"}]}},
+}
+GET_BATCH = [{"jsonrpc": "2.0", "id": i, "method": "tasks/get", "params": {"id": "t1"}} for i in range(3)]
+
+
+class FakeTaskManager:
+    """Completes every task at once."""
+
+    async def on_send_task(self, request):
+        return SendTaskResponse(id=request.id, result=await self.get_task(request.params.id))
+
+    async def get_task(self, task_id):
+        return Task(id=task_id, status=TaskStatus(state=TaskState.COMPLETED))
+
+
+def test_refuses_a_request_body_over_the_limit():
+    http = TestClient(A2AServer(CARD, task_manager=None, max_request_size=100).app)
+
+    response = http.post("/", content=b"x" * 101, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+
+    # Without a Content-Length the body is counted as it arrives
+    chunks = (b"x" * 60 for _ in range(2))
+    response = http.post("/send_task_subscribe", content=chunks, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+
+
+def test_refuses_unauthenticated_and_non_admin_callers():
+    server = A2AServer(
+        CARD,
+        FakeTaskManager(),
+        authenticators=[ApiKeyAuthenticator({"alice": "alice-key", "root": "root-key"})],
+        admin_principals=["root"],
+    )
+    http = TestClient(server.app)
+
+    for headers in ({}, {"X-API-Key": "wrong"}):
+        response = http.post("/", json=SEND, headers=headers)
+        assert response.status_code == 401
+        assert response.headers["WWW-Authenticate"] == "apiKey"
+    assert http.post("/", json=SEND, headers={"X-API-Key": "alice-key"}).status_code == 200
+
+    assert http.get("/admin/tasks", headers={"X-API-Key": "alice-key"}).status_code == 403
+    assert http.get("/admin/tasks", headers={"X-API-Key": "root-key"}).status_code == 200
+
+
+def test_counts_sends_but_not_reads_against_the_quota():
+    http = TestClient(A2AServer(CARD, FakeTaskManager(), quotas=CallerQuotas(rpm=2)).app)
+
+    for _ in range(2):
+        assert http.post("/", content=json.dumps(GET_BATCH)).status_code == 200
+        assert http.post("/", json=SEND).status_code == 200
+    response = http.post("/", json=SEND)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    # Polling for results still works once sends are refused
+    response = http.post("/", content=json.dumps(GET_BATCH))
+    assert response.status_code == 200 and len(response.json()) == 3
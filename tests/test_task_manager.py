@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+from a2a_service.task_managers.async_inmem_task_manager import AgentTaskManager
+from a2a_service.types import Message, SendTaskRequest, TaskSendParams, TaskState, TextPart
+
+
+class FakeAgent:
+    """Asks which flight to book, then books it; blocks each run until released."""
+
+    SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
+    is_ready = True
+
+    def __init__(self):
+        self.queries: List[str] = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def invoke(self, query: str, session_id: str, skill_id: Optional[str] = None, task_id: Optional[str] = None) -> Dict[str, Any]:
+        self.queries.append(query)
+        self.release.wait()
+        if query == "book a flight":
+            return {"is_task_complete": False, "require_user_input": True, "content": "Which flight?"}
+        return {"is_task_complete": True, "require_user_input": False, "content": f"Booked: {query}"}
+
+
+def send(text: str) -> SendTaskRequest:
+    message = Message(role="user", parts=[TextPart(text=text)])
+    return SendTaskRequest(params=TaskSendParams(id="t1", sessionId="s1", message=message, acceptedOutputModes=["text"]))
+
+
+def test_a_retry_of_a_running_task_attaches_to_its_run():
+    agent = FakeAgent()
+    manager = AgentTaskManager(agent)
+
+    async def scenario():
+        agent.release.clear()
+        first = asyncio.create_task(manager.on_send_task(send("the 9:15")))
+        while not agent.queries:
+            await asyncio.sleep(0.01)
+        retry = asyncio.create_task(manager.on_send_task(send("the 9:15")))
+        await asyncio.sleep(0.05)
+        assert not retry.done()
+        agent.release.set()
+        return await first, await retry
+
+    first, retry = asyncio.run(scenario())
+    assert agent.queries == ["the 9:15"]
+    assert first.result.status.state == retry.result.status.state == TaskState.COMPLETED
+    assert retry.result.artifacts[0].parts[0].text == "Booked: the 9:15"
+
+
+def test_a_retry_of_a_finished_task_returns_the_stored_task():
+    agent = FakeAgent()
+    manager = AgentTaskManager(agent)
+
+    async def scenario():
+        await manager.on_send_task(send("the 9:15"))
+        return await manager.on_send_task(send("the 9:15"))
+
+    retry = asyncio.run(scenario())
+    assert agent.queries == ["the 9:15"]
+    assert retry.result.status.state == TaskState.COMPLETED
+    assert retry.result.artifacts[0].parts[0].text == "Booked: the 9:15"
+
+
+def test_a_new_message_continues_a_task_waiting_for_input():
+    agent = FakeAgent()
+    manager = AgentTaskManager(agent)
+
+    async def scenario():
+        asked = await manager.on_send_task(send("book a flight"))
+        repeated = await manager.on_send_task(send("book a flight"))
+        answered = await manager.on_send_task(send("the 9:15"))
+        return asked, repeated, answered
+
+    asked, repeated, answered = asyncio.run(scenario())
+    # Re-sending the question is a retry; the answer to it runs the task again
+    assert agent.queries == ["book a flight", "the 9:15"]
+    assert asked.result.status.state == repeated.result.status.state == TaskState.INPUT_REQUIRED
+    assert answered.result.status.state == TaskState.COMPLETED
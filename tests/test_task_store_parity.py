@@ -0,0 +1,178 @@
+"""Checks that the persistent task stores keep the task manager contract alike.
+
+The same workload runs against each store: concurrent sessions whose tasks are claimed,
+retried, updated with a status message and completed with an artifact, as a server
+does. Postgres is only checked when TEST_DATABASE_URL names a disposable database; its
+tasks and artifacts tables are emptied first.
+"""
+import asyncio
+import os
+from typing import Any, Dict
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from a2a_service.database import Base
+from a2a_service.models.db_models import ArtifactModel, TaskModel  # noqa: F401, registers the tables
+from a2a_service.task_managers import db_task_manager
+from a2a_service.task_managers.db_task_manager import DatabaseTaskManager
+from a2a_service.task_managers.sqlite_task_manager import SQLiteTaskManager
+from a2a_service.types import Artifact, Message, TaskSendParams, TaskState, TaskStatus, TextPart
+
+TASKS = 60
+SESSIONS = 6
+PAGE_SIZE = 7
+
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def params(task: int, session: int, text: str) -> TaskSendParams:
+    return TaskSendParams(
+        id=f"task-{task}",
+        sessionId=f"session-{session}",
+        message=Message(role="user", parts=[TextPart(text=text)]),
+    )
+
+
+def summary(task) -> tuple:
+    """The parts of a task every store must agree on; timestamps differ between runs."""
+    if task is None:
+        return None
+    message = task.status.message.parts[0].text if task.status.message else None
+    history = [m.parts[0].text for m in task.history or []]
+    artifacts = [(a.index, a.append, [p.text for p in a.parts]) for a in task.artifacts or []]
+    return task.id, task.sessionId, task.status.state.value, message, history, artifacts
+
+
+async def run_workload(store) -> Dict[str, Any]:
+    """Drive a store like a server would and return what it answered."""
+    results = {}
+    limit = asyncio.Semaphore(10)
+
+    async def one(i: int):
+        async with limit:
+            send = params(i, i % SESSIONS, f"question {i}")
+            claimed, _ = await store.claim_task(send)
+            retried, existing = await store.claim_task(send)
+            working = TaskStatus(state=TaskState.WORKING, message=Message(role="agent", parts=[TextPart(text="working")]))
+            await store.update_store(send.id, working)
+            if i % 5 == 0:
+                # Ask for input, then continue the task with a second message
+                asked = TaskStatus(state=TaskState.INPUT_REQUIRED, message=Message(role="agent", parts=[TextPart(text="which one?")]))
+                await store.update_store(send.id, asked)
+                repeat, _ = await store.claim_task(send)
+                follow_up, _ = await store.claim_task(params(i, i % SESSIONS, f"the first, {i}"))
+            else:
+                repeat = follow_up = None
+            artifact = Artifact(parts=[TextPart(text=f"answer {i}")], index=0)
+            updated = await store.update_store(send.id, TaskStatus(state=TaskState.COMPLETED), [artifact])
+            stored = await store.get_task(send.id)
+            results[send.id] = (claimed, retried, summary(existing), repeat, follow_up, summary(updated), summary(stored))
+
+    await asyncio.gather(*(one(i) for i in range(TASKS)))
+
+    # Page through every session; pages must neither repeat nor skip tasks
+    pages = {}
+    for session in range(SESSIONS):
+        cursor, tasks = None, []
+        while True:
+            page = list(store.iter_session_history(f"session-{session}", PAGE_SIZE, cursor, 2))
+            tasks += [summary(task) for task, _ in page]
+            if len(page) < PAGE_SIZE or page[-1][1] == cursor:
+                # A cursor that does not advance would page forever; the checks report it
+                break
+            cursor = page[-1][1]
+        pages[session] = tasks
+    return {"results": results, "pages": pages}
+
+
+def postgres_store(monkeypatch: pytest.MonkeyPatch) -> DatabaseTaskManager:
+    engine = create_engine(POSTGRES_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE artifacts, tasks"))
+    monkeypatch.setattr(db_task_manager, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    return DatabaseTaskManager(None)
+
+
+STORES = {
+    "sqlite": lambda path, monkeypatch: SQLiteTaskManager(None, str(path / "tasks.db")),
+    "postgres": lambda path, monkeypatch: postgres_store(monkeypatch),
+}
+
+# Workload results per store, shared by the contract and parity checks
+_runs: Dict[str, Dict[str, Any]] = {}
+
+
+def store_run(name: str, tmp_path_factory: pytest.TempPathFactory) -> Dict[str, Any]:
+    if name not in _runs:
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            store = STORES[name](tmp_path_factory.mktemp(name), monkeypatch)
+            try:
+                _runs[name] = asyncio.run(run_workload(store))
+            finally:
+                if hasattr(store, "close"):
+                    store.close()
+    return _runs[name]
+
+
+@pytest.fixture(
+    params=[
+        "sqlite",
+        pytest.param("postgres", marks=pytest.mark.skipif(not POSTGRES_URL, reason="TEST_DATABASE_URL is not set")),
+    ]
+)
+def run(request, tmp_path_factory) -> Dict[str, Any]:
+    return store_run(request.param, tmp_path_factory)
+
+
+def test_store_keeps_the_task_manager_contract(run):
+    for task_id, (claimed, retried, existing, repeat, follow_up, updated, stored) in run["results"].items():
+        assert claimed and not retried, f"{task_id} was not claimed exactly once"
+        assert existing[2] == "working", f"retry of {task_id} returned {existing}"
+        assert repeat in (None, False) and follow_up in (None, True), f"input-required handling of {task_id}"
+        assert updated[2:] == stored[2:], f"update_store and get_task disagree on {task_id}"
+        assert stored[2] == "completed" and len(stored[5]) == 1, f"{task_id} stored as {stored}"
+    listed = [task for page in run["pages"].values() for task in page]
+    assert len(listed) == TASKS and len({task[0] for task in listed}) == TASKS, "session pages repeat or skip tasks"
+
+
+def test_store_returns_the_same_results_as_sqlite(run, tmp_path_factory):
+    reference = store_run("sqlite", tmp_path_factory)
+    assert run["results"] == reference["results"]
+    for session, tasks in reference["pages"].items():
+        assert sorted(run["pages"][session]) == sorted(tasks), f"stores differ in session-{session}"
+
+
+@pytest.fixture(
+    params=[
+        "sqlite",
+        pytest.param("postgres", marks=pytest.mark.skipif(not POSTGRES_URL, reason="TEST_DATABASE_URL is not set")),
+    ]
+)
+def store(request, tmp_path):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        store = STORES[request.param](tmp_path, monkeypatch)
+        yield store
+        if hasattr(store, "close"):
+            store.close()
+
+
+def test_session_pages_are_stable_while_tasks_are_updated(store):
+    async def scenario():
+        for i in range(10):
+            await store.claim_task(params(i, 0, f"question {i}"))
+        first = list(store.iter_session_history("session-0", 4))
+        # Tasks on every page finish while the client is still paging
+        for i in range(10):
+            await store.update_store(f"task-{i}", TaskStatus(state=TaskState.COMPLETED))
+        cursor, tasks = first[-1][1], [task.id for task, _ in first]
+        while cursor:
+            page = list(store.iter_session_history("session-0", 4, cursor))
+            tasks += [task.id for task, _ in page]
+            cursor = page[-1][1] if len(page) == 4 else None
+        return tasks
+
+    tasks = asyncio.run(scenario())
+    assert sorted(tasks) == sorted(f"task-{i}" for i in range(10))